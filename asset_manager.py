@@ -0,0 +1,94 @@
+"""Реестр ресурсов из каталога assets.
+
+Каждый файл читается с диска и декодируется ровно один раз, после чего
+все элементы интерфейса получают общие неизменяемые копии: строки для
+текстовых файлов и QPixmap для изображений. Загрузку можно выполнить
+заранее в фоновом потоке.
+"""
+
+import os
+import threading
+
+from PyQt5.QtGui import QImage, QPixmap
+
+# Расширения текстовых ресурсов
+TEXT_EXTENSIONS = (".txt", ".json")
+
+
+class AssetManager:
+    """Загружает и раздает ресурсы из каталога."""
+
+    def __init__(self, directory):
+        """Создает реестр для ресурсов из каталога directory."""
+        self.directory = directory  # Каталог с ресурсами
+        # Имена всех файлов каталога
+        self.names = sorted(
+            name for name in os.listdir(directory)
+            if os.path.isfile(os.path.join(directory, name)))
+        # Загруженные ресурсы: строки и декодированные изображения QImage
+        self.loaded = {}
+        # Изображения, уже преобразованные в QPixmap (только поток GUI)
+        self.pixmaps = {}
+        self.disk_reads = 0  # Количество чтений с диска
+        # Блокировка гарантирует, что каждый файл читается один раз
+        self.lock = threading.RLock()
+        self.thread = None  # Поток фоновой загрузки
+
+    def path(self, name):
+        """Возвращает полный путь к ресурсу."""
+        return os.path.join(self.directory, name)
+
+    def _read(self, name):
+        """Читает ресурс с диска; безопасно вызывать из любого потока."""
+        if name.endswith(TEXT_EXTENSIONS):
+            with open(self.path(name), "r", encoding="utf-8") as file:
+                return file.read()
+        # QImage, в отличие от QPixmap, можно создавать вне потока GUI
+        return QImage(self.path(name))
+
+    def get(self, name):
+        """Возвращает ресурс, загружая его при первом обращении."""
+        with self.lock:
+            value = self.loaded.get(name)
+            if value is None:
+                value = self._read(name)
+                self.loaded[name] = value
+                self.disk_reads += 1
+            return value
+
+    def text(self, name):
+        """Возвращает содержимое текстового ресурса."""
+        return self.get(name)
+
+    def pixmap(self, name):
+        """Возвращает общий QPixmap для изображения."""
+        pixmap = self.pixmaps.get(name)
+        if pixmap is None:
+            pixmap = QPixmap.fromImage(self.get(name))
+            self.pixmaps[name] = pixmap
+        return pixmap
+
+    def preload(self, names=None, background=False):
+        """Загружает ресурсы заранее.
+
+        Если background равен True, загрузка выполняется в фоновом потоке,
+        а обращение к еще не загруженному ресурсу просто дождется его.
+        """
+        names = self.names if names is None else list(names)
+        if not background:
+            for name in names:
+                self.get(name)
+            return
+
+        def load():
+            """Загружает ресурсы по одному, не блокируя поток GUI надолго."""
+            for name in names:
+                self.get(name)
+
+        self.thread = threading.Thread(target=load, daemon=True)
+        self.thread.start()
+
+    def wait(self):
+        """Дожидается окончания фоновой загрузки."""
+        if self.thread is not None:
+            self.thread.join()
@@ -0,0 +1,227 @@
+"""Пакетный прогон аквариума в модельном времени без графического интерфейса.
+
+Пример: состояние аквариума после двух суток без ухода
+
+    python batch.py --hours 48 --seed 1
+
+Прогон использует те же правила, что и окно приложения, но время
+продвигается так быстро, как позволяет процессор.
+"""
+
+import argparse
+import os
+import struct
+import time
+
+import species_config
+from simulation import Aquarium, Settings, SETTING_NAMES, check_setting
+
+# Каталог с ресурсами приложения
+ASSETS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# Интервал выбора направления рыбами в ускоренном прогоне (в
+# миллисекундах, см. --fast-steering). По умолчанию прогон, как и окно,
+# выбирает направление каждые TIMER_FISH_BEHAVIOUR мс
+BATCH_FISH_BEHAVIOUR = 250
+
+# Подписи показателей сводки
+SUMMARY_LABELS = [
+    ("simulated_hours", "Модельное время, ч"),
+    ("wall_seconds", "Реальное время, с"),
+    ("speedup", "Ускорение"),
+    ("fish", "Рыб"),
+    ("health_mean", "Среднее здоровье"),
+    ("health_min", "Минимальное здоровье"),
+    ("health_max", "Максимальное здоровье"),
+    ("hunger_mean", "Средний голод"),
+    ("hunger_max", "Максимальный голод"),
+    ("starving", "Голодающих рыб"),
+    ("dead", "Рыб без здоровья"),
+    ("water_cleanliness", "Чистота воды"),
+    ("aquarium_cleanliness", "Чистота аквариума"),
+    ("food_dropped", "Брошено корма"),
+    ("food_eaten", "Съедено корма"),
+]
+
+
+def read_image_size(path):
+    """Возвращает размер изображения PNG или GIF, читая только заголовок.
+
+    Формат определяется по содержимому, а не по расширению файла. Для
+    других форматов выбрасывается ValueError: рыбы нулевого размера
+    отражались бы от стенок и ели бы корм иначе, чем в окне.
+    """
+    with open(path, "rb") as file:
+        header = file.read(24)
+    if header[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", header[16:24])
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", header[6:10])
+    raise ValueError(f"{path}: неизвестный формат изображения, "
+                     "ожидается PNG или GIF")
+
+
+def populate(aquarium, fish=None, species_path=None):
+    """Заселяет аквариум рыбами из описания видов.
+
+    Без параметра fish численность берется из описания видов, иначе
+    в случайные места добавляется по fish рыб каждого вида.
+    species_path - файл описания видов (по умолчанию из assets).
+    """
+    configs = species_config.load(species_path or os.path.join(
+        ASSETS_DIRECTORY, species_config.SPECIES_FILE))
+    # Описания в пакетном режиме не нужны, поэтому не читаются
+    species_config.populate(
+        aquarium, configs,
+        image_size=lambda image: read_image_size(
+            os.path.join(ASSETS_DIRECTORY, image)),
+        count=fish)
+
+
+def summarize(aquarium, wall_seconds):
+    """Возвращает словарь со сводной статистикой аквариума."""
+    stats = aquarium.stats
+    simulated_seconds = aquarium.time / 1000
+    return {
+        "simulated_hours": simulated_seconds / 3600,
+        "wall_seconds": wall_seconds,
+        "speedup": simulated_seconds / wall_seconds if wall_seconds else 0,
+        "fish": stats.health.count,
+        "health_mean": stats.health.mean,
+        "health_min": stats.health.min,
+        "health_max": stats.health.max,
+        "hunger_mean": stats.hunger.mean,
+        "hunger_max": stats.hunger.max,
+        "starving": stats.starving,
+        "dead": stats.dead,
+        "water_cleanliness": aquarium.water_cleanliness,
+        "aquarium_cleanliness": aquarium.aquarium_cleanliness,
+        "food_dropped": aquarium.food_dropped,
+        "food_eaten": aquarium.food_eaten,
+    }
+
+
+def format_summary(summary):
+    """Форматирует сводку в виде строк «подпись: значение»."""
+    lines = []
+    for key, label in SUMMARY_LABELS:
+        value = summary[key]
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+        lines.append(f"{label}: {value}")
+    return "\n".join(lines)
+
+
+def parse_setting(text):
+    """Разбирает строку вида «FISH_SPEED=1.5» в пару (имя, значение).
+
+    Значение проверяется так же, как параметры аквариума (см.
+    simulation.check_setting).
+    """
+    name, _, value = text.partition("=")
+    name = name.strip().upper()
+    if not value:
+        raise argparse.ArgumentTypeError(
+            f"ожидается ИМЯ=ЗНАЧЕНИЕ, получено «{text}»")
+    if name not in SETTING_NAMES:
+        raise argparse.ArgumentTypeError(
+            f"неизвестная константа {name}; доступны: "
+            f"{', '.join(SETTING_NAMES)}")
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"значение {name} должно быть числом, получено «{value}»")
+    if number.is_integer():
+        number = int(number)
+    try:
+        check_setting(name, number)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+    return name.lower(), number
+
+
+def run(hours, seed=None, fish=None, feed_every=None, clean_every=None,
+        water_every=None, report_every=None, report=print, settings=None,
+        species_path=None, fast_steering=False):
+    """Прогоняет аквариум hours модельных часов и возвращает сводку.
+
+    feed_every, clean_every и water_every задают в минутах, как часто
+    условный посетитель кормит рыб, чистит аквариум и меняет воду.
+    Если задан report_every (в часах), промежуточные сводки передаются
+    функции report. settings - словарь переопределенных параметров
+    правил (см. simulation.Settings), species_path - файл описания видов.
+    С fast_steering рыбы выбирают направление реже, каждые
+    BATCH_FISH_BEHAVIOUR мс, если интервал не переопределен в settings.
+    """
+    settings = dict(settings or {})
+    if fast_steering:
+        settings.setdefault("timer_fish_behaviour", BATCH_FISH_BEHAVIOUR)
+    aquarium = Aquarium(seed=seed, settings=Settings(**settings))
+    populate(aquarium, fish, species_path)
+
+    # Действия посетителя планируются тем же планировщиком, что и правила
+    minute = 60 * 1000
+    if feed_every:
+        aquarium.scheduler.every(feed_every * minute, aquarium.drop_food)
+    if clean_every:
+        aquarium.scheduler.every(clean_every * minute,
+                                 aquarium.clear_aquarium)
+    if water_every:
+        aquarium.scheduler.every(water_every * minute, aquarium.change_water)
+
+    start = time.perf_counter()
+    if report_every:
+        aquarium.scheduler.every(
+            report_every * 60 * minute,
+            lambda: report(format_summary(
+                summarize(aquarium, time.perf_counter() - start)) + "\n"))
+    aquarium.step(hours * 60 * minute)
+    return summarize(aquarium, time.perf_counter() - start)
+
+
+def main(argv=None):
+    """Точка входа пакетного прогона."""
+    parser = argparse.ArgumentParser(
+        description="Прогон аквариума в модельном времени без окна")
+    parser.add_argument("--hours", type=float, required=True,
+                        help="длительность прогона в модельных часах")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="зерно генератора случайных чисел")
+    parser.add_argument("--fish", type=int, default=None,
+                        help="количество рыб каждого вида "
+                             "(по умолчанию из описания видов)")
+    parser.add_argument("--species", default=None, metavar="ФАЙЛ",
+                        help="файл описания видов "
+                             f"(по умолчанию assets/"
+                             f"{species_config.SPECIES_FILE})")
+    parser.add_argument("--feed-every", type=float, default=None,
+                        help="кормить рыб каждые N минут")
+    parser.add_argument("--clean-every", type=float, default=None,
+                        help="чистить аквариум каждые N минут")
+    parser.add_argument("--water-every", type=float, default=None,
+                        help="менять воду каждые N минут")
+    parser.add_argument("--report-every", type=float, default=None,
+                        help="печатать промежуточную сводку каждые N часов")
+    parser.add_argument("--set", type=parse_setting, action="append",
+                        default=[], metavar="ИМЯ=ЗНАЧЕНИЕ",
+                        help="переопределить константу правил, "
+                             "например FISH_SPEED=2.4")
+    parser.add_argument("--fast-steering", action="store_true",
+                        help="выбирать направление рыб каждые "
+                             f"{BATCH_FISH_BEHAVIOUR} мс вместо "
+                             "интервала окна")
+    args = parser.parse_args(argv)
+
+    summary = run(args.hours, seed=args.seed, fish=args.fish,
+                  feed_every=args.feed_every, clean_every=args.clean_every,
+                  water_every=args.water_every,
+                  report_every=args.report_every,
+                  settings=dict(args.set), species_path=args.species,
+                  fast_steering=args.fast_steering)
+    print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Замеры производительности аквариума в зависимости от числа рыб.
+
+Для каждого размера популяции замеряются:
+
+* sim - модель без Qt: стоимость тика и отдельных правил (движение,
+  выбор направления, голод, загрязнение, падение корма);
+* gui - окно MyWindow на платформе offscreen: стоимость тика окна,
+  отрисовки кадра и получаемая частота кадров;
+* gui-batched - то же окно, рисующее всех рыб одним элементом сцены.
+
+Дополнительно фиксируются выделения памяти Python (tracemalloc) и пиковый
+размер резидентной памяти процесса. Каждый замер выполняется в отдельном
+процессе, чтобы пиковая память не смешивалась между замерами. Результаты
+пишутся в JSON и могут сравниваться с результатами другого коммита:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# Размеры популяции по умолчанию
+DEFAULT_SIZES = [5, 100, 1000, 10000]
+# Количество замеряемых тиков по умолчанию
+DEFAULT_TICKS = 200
+
+
+def measure(function, repeat):
+    """Возвращает среднее процессорное время вызова function в мс."""
+    start = time.process_time()
+    for _ in range(repeat):
+        function()
+    return (time.process_time() - start) / repeat * 1000
+
+
+def traced(function, repeat):
+    """Возвращает пик и число блоков памяти Python за repeat вызовов."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    for _ in range(repeat):
+        function()
+    _, peak = tracemalloc.get_traced_memory()
+    blocks = len(tracemalloc.take_snapshot().traces)
+    tracemalloc.stop()
+    return {"alloc_peak_kb": (peak - base) / 1024, "alloc_blocks": blocks}
+
+
+def peak_rss_kb():
+    """Возвращает пиковый размер резидентной памяти процесса в КБ."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В macOS ru_maxrss измеряется в байтах, в Linux - в килобайтах
+    return usage / 1024 if sys.platform == "darwin" else usage
+
+
+def bench_sim(fish, ticks):
+    """Замеряет модель аквариума с fish рыбами."""
+    import batch
+    from simulation import Aquarium, TIMER_UPDATE_HEALTH
+
+    aquarium = Aquarium(seed=0)
+    batch.populate(aquarium, fish=0)
+    species_count = len(aquarium.population.species)
+    # Распределяем рыб по видам как можно равномернее
+    for index, species in enumerate(aquarium.population.species):
+        share = fish // species_count + (index < fish % species_count)
+        width, height = batch.read_image_size(
+            os.path.join(batch.ASSETS_DIRECTORY, species.image))
+        aquarium.spawn_fish(species, share, width, height)
+
+    def tick():
+        aquarium.step(TIMER_UPDATE_HEALTH)
+
+    def fall():
+        if not aquarium.food:
+            aquarium.drop_food()
+        aquarium.fall_food()
+
+    settings = aquarium.settings
+    result = {
+        "tick_ms": measure(tick, ticks),
+        "components": {
+            "move_ms": measure(lambda: aquarium.movement.step(
+                settings.fish_speed, aquarium.scene_width,
+                aquarium.scene_height), ticks),
+            "steer_ms": measure(aquarium.steer_fishes, ticks // 10 or 1),
+            "status_ms": measure(aquarium.update_fish_status, ticks),
+            "cleanliness_ms": measure(aquarium.decrease_cleanliness, ticks),
+            "food_fall_ms": measure(fall, ticks),
+        },
+    }
+    result["ticks_per_second"] = 1000 / result["tick_ms"] \
+        if result["tick_ms"] else None
+    result.update(traced(tick, min(ticks, 50)))
+    return result
+
+
+class StepClock:
+    """Часы окна, между замерами которых всегда проходит step мс.
+
+    Подменяют QElapsedTimer окна, чтобы каждый тик выполнял ровно один
+    шаг модели и переносил его на сцену: с настоящими часами тики подряд
+    почти не двигают модель, а медленные кадры догоняют её пачкой шагов.
+    """
+
+    def __init__(self, step):
+        self.step = step
+
+    def restart(self):
+        return self.step
+
+
+def bench_gui(fish, ticks, renderer="items"):
+    """Замеряет окно приложения с fish рыбами на платформе offscreen.
+
+    renderer - способ отрисовки рыб (см. main.RENDERERS). Каждый тик
+    продвигает модель ровно на один шаг цикла (см. StepClock).
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    import main
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    # Уровень детализации фиксирован, чтобы замер не менял его на ходу
+    window = main.MyWindow(detail=main.LOD_FULL, renderer=renderer)
+    # В окне уже есть рыбы по умолчанию
+    window.spawnFishes(max(0, fish - window.aquarium.population.count))
+    window.show()
+    app.processEvents()
+    # Таймер окна не должен вмешиваться в замер
+    window.tick_timer.stop()
+    window.clock = StepClock(window.loop.step)
+    viewport = window.view.viewport()
+
+    def frame():
+        window.tick()
+        viewport.repaint()
+
+    result = {
+        "tick_ms": measure(window.tick, ticks),
+        "paint_ms": measure(viewport.repaint, ticks),
+    }
+    start = time.perf_counter()
+    for _ in range(ticks):
+        frame()
+    elapsed = time.perf_counter() - start
+    result["frame_ms"] = elapsed / ticks * 1000
+    result["fps"] = ticks / elapsed if elapsed else None
+    result.update(traced(frame, min(ticks, 20)))
+    return result
+
+
+def bench_gui_batched(fish, ticks):
+    """Замеряет окно, рисующее всех рыб одним элементом сцены."""
+    return bench_gui(fish, ticks, renderer="batched")
+
+
+# Замеры по видам
+BENCHMARKS = {"sim": bench_sim, "gui": bench_gui,
+              "gui-batched": bench_gui_batched}
+
+
+def run_case(mode, fish, ticks):
+    """Выполняет один замер в отдельном процессе и возвращает результат."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--case", mode,
+         str(fish), "--ticks", str(ticks)],
+        check=True, capture_output=True, text=True).stdout
+    # Последняя строка вывода - результат в JSON
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def current_commit():
+    """Возвращает хеш текущего коммита или None вне репозитория."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Возвращает строки сравнения времени кадра и тика с baseline."""
+    old = {(r["mode"], r["fish"]): r for r in baseline["results"]}
+    lines = []
+    for result in results:
+        previous = old.get((result["mode"], result["fish"]))
+        if previous is None:
+            continue
+        for key in ("tick_ms", "frame_ms", "rss_peak_kb"):
+            if key in result and previous.get(key):
+                change = (result[key] / previous[key] - 1) * 100
+                lines.append(f"{result['mode']:>3} {result['fish']:>6} "
+                             f"{key:<12} {previous[key]:10.3f} -> "
+                             f"{result[key]:10.3f} ({change:+.1f}%)")
+    return lines
+
+
+def main(argv=None):
+    """Точка входа замеров."""
+    parser = argparse.ArgumentParser(
+        description="Замеры производительности аквариума")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="размеры популяции")
+    parser.add_argument("--modes", nargs="+", choices=sorted(BENCHMARKS),
+                        default=sorted(BENCHMARKS, reverse=True),
+                        help="виды замеров")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS,
+                        help="количество замеряемых тиков")
+    parser.add_argument("--output", default=None,
+                        help="файл для результатов в JSON")
+    parser.add_argument("--compare", default=None,
+                        help="JSON с прошлыми результатами для сравнения")
+    parser.add_argument("--case", nargs=2, metavar=("ВИД", "РЫБ"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        # Режим дочернего процесса: один замер, результат в stdout
+        mode, fish = args.case[0], int(args.case[1])
+        result = BENCHMARKS[mode](fish, args.ticks)
+        result.update(mode=mode, fish=fish, rss_peak_kb=peak_rss_kb())
+        print(json.dumps(result))
+        return
+
+    results = []
+    for mode in args.modes:
+        for fish in args.sizes:
+            result = run_case(mode, fish, args.ticks)
+            results.append(result)
+            frame = result.get("frame_ms", result["tick_ms"])
+            print(f"{mode:>3} {fish:>6} рыб: {frame:9.3f} мс, "
+                  f"RSS {result['rss_peak_kb'] / 1024:7.1f} МБ", flush=True)
+
+    report = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ticks": args.ticks,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            print("\n".join(compare(results, json.load(file))))
+
+
+if __name__ == "__main__":
+    main()
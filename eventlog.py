@@ -0,0 +1,273 @@
+"""Запись действий пользователя в журнал и воспроизведение журнала.
+
+Журнал пополняется по мере работы окна: каждый кадр (шаг модельного
+времени), каждое действие пользователя и периодические контрольные точки
+со снимком аквариума дописываются в конец файла. Воспроизведение
+выполняет те же шаги над моделью без окна и без ожидания реального
+времени, поэтому повторяет исходный прогон в точности.
+
+Чтобы перейти к кадру в середине длинного журнала, воспроизведение
+начинается не с начала, а с последней контрольной точки перед ним.
+
+Пример: состояние аквариума после 5000-го кадра записанного журнала
+
+    python eventlog.py session.aqlog --tick 5000
+
+Формат файла:
+
+    заголовок   "<4sH": сигнатура AQEL, версия
+    записи      тип записи (один байт) и ее данные
+
+Контрольная точка содержит номер кадра, длину снимка и сам снимок
+(см. snapshot.py). Если запись оборвалась на последней записи
+(например, приложение упало), журнал читается до этой записи.
+"""
+
+import argparse
+import struct
+import time
+
+import snapshot
+from batch import format_summary, summarize
+
+# Сигнатура файла журнала
+EVENTLOG_MAGIC = b"AQEL"
+# Текущая версия формата
+EVENTLOG_VERSION = 1
+# Через сколько кадров в журнал пишется контрольная точка
+CHECKPOINT_EVERY = 3600
+# Через сколько секунд реального времени кадры сбрасываются на диск
+FLUSH_INTERVAL = 1.0
+
+# Типы записей журнала
+EVENT_TICK = 1  # Кадр: шаг модели на dt мс
+EVENT_FEED = 2  # Кормление рыб
+EVENT_CLEAN = 3  # Чистка аквариума
+EVENT_WATER = 4  # Смена воды
+EVENT_CLICK = 5  # Нажатие на рыбу
+EVENT_RESIZE = 6  # Изменение границ движения рыб
+EVENT_CHECKPOINT = 7  # Контрольная точка со снимком аквариума
+
+_HEADER = struct.Struct("<4sH")
+_KIND = struct.Struct("<B")
+_CHECKPOINT = struct.Struct("<QI")
+# Данные записей каждого типа (кроме контрольной точки)
+_PAYLOADS = {
+    EVENT_TICK: struct.Struct("<d"),
+    EVENT_FEED: struct.Struct("<"),
+    EVENT_CLEAN: struct.Struct("<"),
+    EVENT_WATER: struct.Struct("<"),
+    EVENT_CLICK: struct.Struct("<I"),
+    EVENT_RESIZE: struct.Struct("<dd"),
+}
+
+
+class EventLogError(ValueError):
+    """Ошибка чтения журнала: чужой файл, неизвестная версия или запись."""
+
+
+class Recorder:
+    """Потоковая запись журнала действий.
+
+    Окно вызывает tick() после каждого шага модели и соответствующий
+    метод после каждого действия пользователя, уже выполненного над
+    моделью. Действия пользователя сбрасываются на диск сразу, кадры -
+    не реже чем раз в flush_interval секунд, поэтому при падении
+    приложения теряется не больше последней секунды журнала.
+    """
+
+    def __init__(self, path, aquarium, checkpoint_every=CHECKPOINT_EVERY,
+                 flush_interval=FLUSH_INTERVAL):
+        """Открывает журнал path и записывает начальное состояние."""
+        self.aquarium = aquarium  # Записываемый аквариум
+        # Через сколько кадров пишется контрольная точка
+        self.checkpoint_every = checkpoint_every
+        # Через сколько секунд кадры сбрасываются на диск
+        self.flush_interval = flush_interval
+        self.flushed = time.monotonic()  # Время последнего сброса
+        self.ticks = 0  # Количество записанных кадров
+        self.file = open(path, "wb")
+        self.file.write(_HEADER.pack(EVENTLOG_MAGIC, EVENTLOG_VERSION))
+        self.checkpoint()
+
+    def _write(self, kind, *values):
+        """Дописывает запись kind с данными values."""
+        self.file.write(_KIND.pack(kind) + _PAYLOADS[kind].pack(*values))
+
+    def flush(self):
+        """Сбрасывает записанное на диск."""
+        self.file.flush()
+        self.flushed = time.monotonic()
+
+    def checkpoint(self):
+        """Дописывает контрольную точку с текущим снимком аквариума."""
+        data = snapshot.dumps(self.aquarium)
+        self.file.write(_KIND.pack(EVENT_CHECKPOINT)
+                        + _CHECKPOINT.pack(self.ticks, len(data)) + data)
+        self.flush()
+
+    def tick(self, dt):
+        """Записывает шаг модели на dt мс."""
+        self._write(EVENT_TICK, dt)
+        self.ticks += 1
+        if self.ticks % self.checkpoint_every == 0:
+            self.checkpoint()
+        elif time.monotonic() - self.flushed >= self.flush_interval:
+            self.flush()
+
+    def feed(self):
+        """Записывает кормление рыб."""
+        self._write(EVENT_FEED)
+        self.flush()
+
+    def clean(self):
+        """Записывает чистку аквариума."""
+        self._write(EVENT_CLEAN)
+        self.flush()
+
+    def water(self):
+        """Записывает смену воды."""
+        self._write(EVENT_WATER)
+        self.flush()
+
+    def click(self, fish):
+        """Записывает нажатие на рыбу fish."""
+        self._write(EVENT_CLICK, fish.index)
+        self.flush()
+
+    def resize(self, scene_width, scene_height):
+        """Записывает изменение границ движения рыб."""
+        self._write(EVENT_RESIZE, scene_width, scene_height)
+        self.flush()
+
+    def close(self):
+        """Сбрасывает записи на диск и закрывает журнал."""
+        self.file.close()
+
+
+def _read_header(file):
+    """Проверяет заголовок журнала."""
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise EventLogError("журнал обрывается")
+    magic, version = _HEADER.unpack(header)
+    if magic != EVENTLOG_MAGIC:
+        raise EventLogError("файл не является журналом аквариума")
+    if version != EVENTLOG_VERSION:
+        raise EventLogError(f"неизвестная версия журнала: {version}")
+
+
+def read_events(file, load=True):
+    """Перебирает записи журнала из открытого файла.
+
+    Возвращает тройки (смещение записи, тип, данные). Данные контрольной
+    точки - пара (номер кадра, снимок); без load снимок пропускается и
+    вместо него возвращается None. Оборванная последняя запись молча
+    отбрасывается.
+    """
+    while True:
+        offset = file.tell()
+        kind = file.read(_KIND.size)
+        if not kind:
+            return
+        kind, = _KIND.unpack(kind)
+        if kind == EVENT_CHECKPOINT:
+            header = file.read(_CHECKPOINT.size)
+            if len(header) < _CHECKPOINT.size:
+                return
+            tick, size = _CHECKPOINT.unpack(header)
+            if load:
+                data = file.read(size)
+                if len(data) < size:
+                    return
+            else:
+                data = None
+                file.seek(size, 1)
+            yield offset, kind, (tick, data)
+            continue
+        layout = _PAYLOADS.get(kind)
+        if layout is None:
+            raise EventLogError(f"неизвестный тип записи: {kind}")
+        data = file.read(layout.size)
+        if len(data) < layout.size:
+            return
+        yield offset, kind, layout.unpack(data)
+
+
+def checkpoints(path):
+    """Возвращает список пар (номер кадра, смещение) контрольных точек."""
+    with open(path, "rb") as file:
+        _read_header(file)
+        return [(values[0], offset)
+                for offset, kind, values in read_events(file, load=False)
+                if kind == EVENT_CHECKPOINT]
+
+
+def apply(aquarium, kind, values, on_click=None):
+    """Выполняет над аквариумом действие из записи журнала."""
+    if kind == EVENT_TICK:
+        aquarium.step(values[0])
+    elif kind == EVENT_FEED:
+        aquarium.drop_food()
+    elif kind == EVENT_CLEAN:
+        aquarium.clear_aquarium()
+    elif kind == EVENT_WATER:
+        aquarium.change_water()
+    elif kind == EVENT_RESIZE:
+        aquarium.resize(*values)
+    elif kind == EVENT_CLICK and on_click is not None:
+        on_click(aquarium.fishes[values[0]])
+
+
+def replay(path, tick=None, on_click=None):
+    """Воспроизводит журнал path и возвращает аквариум.
+
+    Без tick журнал воспроизводится до конца, иначе до состояния после
+    кадра с номером tick, начиная с ближайшей предшествующей контрольной
+    точки. on_click вызывается с рыбой для каждого записанного нажатия.
+    """
+    if tick is None:
+        start = 0
+    else:
+        start = max(offset for point, offset in checkpoints(path)
+                    if point <= tick)
+    aquarium = None
+    ticks = 0
+    with open(path, "rb") as file:
+        _read_header(file)
+        if start:
+            file.seek(start)
+        for _, kind, values in read_events(file):
+            if kind == EVENT_CHECKPOINT:
+                ticks = values[0]
+                if aquarium is None:
+                    aquarium = snapshot.loads(values[1])
+                continue
+            # Действия после кадра tick относятся к следующим кадрам
+            if kind == EVENT_TICK and ticks == tick:
+                break
+            apply(aquarium, kind, values, on_click)
+            if kind == EVENT_TICK:
+                ticks += 1
+    if aquarium is None:
+        raise EventLogError("в журнале нет начального состояния")
+    return aquarium
+
+
+def main(argv=None):
+    """Точка входа воспроизведения журнала."""
+    parser = argparse.ArgumentParser(
+        description="Воспроизведение журнала аквариума без окна")
+    parser.add_argument("path", help="файл журнала")
+    parser.add_argument("--tick", type=int, default=None,
+                        help="остановиться после кадра с этим номером "
+                             "(по умолчанию воспроизвести журнал целиком)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    aquarium = replay(args.path, args.tick)
+    print(format_summary(summarize(aquarium, time.perf_counter() - start)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Один элемент сцены, рисующий всех рыб прямо из массивов модели.
+
+Вместо отдельного элемента на каждую рыбу слой рисует всю популяцию за
+один вызов paint. Рыбы каждого вида выводятся одним вызовом: спрайтами
+через drawPixmapFragments или, на уровне детализации points, точками
+цвета вида через drawPoints. Рисуются только рыбы в перерисовываемой
+области. Нажатие на слой определяет рыбу по нарисованным позициям
+(Aquarium.fish_at), а не по элементам сцены.
+
+Если модель меняет другой поток (см. worker.py), слой рисует рыб и ищет
+рыбу под курсором только по массивам, переданным окном из кадра, и не
+читает массивы модели.
+"""
+
+import numpy as np
+from PyQt5.QtWidgets import QGraphicsItem
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF
+
+from lod import LOD_REDUCED, LOD_POINTS
+
+# Диаметр точки, изображающей рыбу
+FISH_DOT_SIZE = 6
+
+
+def sprite_color(pixmap):
+    """Возвращает средний цвет изображения без учета прозрачности."""
+    image = pixmap.toImage().scaled(1, 1, Qt.IgnoreAspectRatio,
+                                    Qt.SmoothTransformation)
+    color = QColor(image.pixelColor(0, 0))
+    color.setAlpha(255)
+    return color
+
+
+def points_polygon(xs, ys):
+    """Создает QPolygonF из массивов координат без цикла по точкам."""
+    polygon = QPolygonF(len(xs))
+    if len(xs):
+        # Точки QPolygonF лежат в памяти парами чисел double
+        buffer = polygon.data()
+        buffer.setsize(len(xs) * 2 * np.dtype(np.float64).itemsize)
+        points = np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2)
+        points[:, 0] = xs
+        points[:, 1] = ys
+    return polygon
+
+
+class FishLayer(QGraphicsItem):
+    """Элемент сцены, рисующий всех рыб аквариума."""
+
+    def __init__(self, aquarium, sprite_cache, level=LOD_POINTS):
+        """Создает слой для рыб аквариума aquarium.
+
+        level - уровень детализации рыб (см. lod.py).
+        """
+        super().__init__()
+        self.aquarium = aquarium  # Отображаемая модель аквариума
+        self.sprite_cache = sprite_cache  # Кэш изображений видов
+        self.level = level  # Уровень детализации
+        self.colors = {}  # Цвета точек по номеру вида
+        # Позиции рыб для отрисовки (None - текущие позиции модели)
+        self.positions = None
+        # Размеры и номера видов рыб для positions (None - из модели)
+        self.extents = None
+        self.kinds = None
+        # Модель меняет другой поток: без переданных позиций слой пуст
+        self.detached = False
+        # Перерисовываемая область передается в paint
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        # Область, в которой рисуются рыбы
+        self.bounds = QRectF(0, 0, aquarium.scene_width,
+                             aquarium.scene_height)
+
+    def setLevel(self, level):
+        """Меняет уровень детализации рыб."""
+        self.level = level
+        self.update()
+
+    def attach(self, fish):
+        """Сообщает модели размер рыбы fish по полноразмерному спрайту.
+
+        Рыбы слоя не имеют своих элементов сцены, поэтому размер для
+        отражения от границ задается здесь.
+        """
+        image = fish.species.image
+        if image:
+            pixmap = self.sprite_cache.original(image)
+            fish.width = pixmap.width()
+            fish.height = pixmap.height()
+
+    def sprite(self, species):
+        """Возвращает спрайт вида species для текущего уровня."""
+        original = self.sprite_cache.original(species.image)
+        if self.level == LOD_REDUCED:
+            return self.sprite_cache.get(
+                species.image, max(1, original.width() // 2),
+                max(1, original.height() // 2))
+        return self.sprite_cache.get(species.image)
+
+    def setBounds(self, width, height):
+        """Меняет область, в которой рисуются рыбы."""
+        self.prepareGeometryChange()
+        self.bounds = QRectF(0, 0, width, height)
+
+    def boundingRect(self):
+        """Возвращает область, в которой рисуются рыбы."""
+        margin = FISH_DOT_SIZE
+        return self.bounds.adjusted(-margin, -margin, margin, margin)
+
+    def color(self, species):
+        """Возвращает цвет точек вида species."""
+        color = self.colors.get(species.index)
+        if color is None:
+            if species.image:
+                color = sprite_color(self.sprite_cache.original(species.image))
+            else:
+                color = QColor(Qt.white)
+            self.colors[species.index] = color
+        return color
+
+    def setArrays(self, positions, extents=None, kinds=None):
+        """Задает массивы рыб для отрисовки и перерисовывает слой.
+
+        positions - позиции рыб (None - текущие позиции модели), extents
+        и kinds - размеры и номера видов этих рыб (None - из модели).
+        """
+        self.positions = positions
+        self.extents = extents
+        self.kinds = kinds
+        self.update()
+
+    def arrays(self):
+        """Возвращает позиции, размеры и номера видов рыб для отрисовки.
+
+        Возвращает None, если рисовать нечего.
+        """
+        positions = self.positions
+        if self.detached:
+            if positions is None or positions.shape[1] == 0:
+                return None
+            return positions, self.extents, self.kinds
+        movement = self.aquarium.movement
+        population = self.aquarium.population
+        count = population.count
+        if count == 0:
+            return None
+        if positions is None or positions.shape[1] > count:
+            positions = movement.position[:, :count]
+        # Рисуются рыбы, для которых есть позиции: рыбы, добавленные
+        # после их расчета, появятся на следующем кадре
+        count = positions.shape[1]
+        return (positions, movement.extent[:, :count],
+                population.kind[:count])
+
+    def paint(self, painter, option, widget):
+        """Рисует всех рыб: по одному вызову рисования на вид."""
+        arrays = self.arrays()
+        if arrays is None:
+            return
+        positions, extent, kinds = arrays
+        centers = positions + extent / 2
+        # Пропускаем рыб, не задевающих перерисовываемую область
+        exposed = option.exposedRect
+        half = np.maximum(extent / 2, FISH_DOT_SIZE)
+        visible = ((centers[0] + half[0] >= exposed.left())
+                   & (centers[0] - half[0] <= exposed.right())
+                   & (centers[1] + half[1] >= exposed.top())
+                   & (centers[1] - half[1] <= exposed.bottom()))
+        for species in self.aquarium.population.species:
+            mask = visible & (kinds == species.index)
+            if not mask.any():
+                continue
+            if self.level == LOD_POINTS or not species.image:
+                self._paint_points(painter, species, centers[:, mask])
+            else:
+                self._paint_sprites(painter, species, centers[:, mask])
+
+    def _paint_points(self, painter, species, centers):
+        """Рисует рыб вида species точками одним вызовом drawPoints."""
+        pen = QPen(self.color(species), FISH_DOT_SIZE)
+        pen.setCapStyle(Qt.RoundCap)
+        painter.setPen(pen)
+        painter.drawPoints(points_polygon(centers[0], centers[1]))
+
+    def _paint_sprites(self, painter, species, centers):
+        """Рисует рыб вида species спрайтами одним вызовом."""
+        pixmap = self.sprite(species)
+        source = QRectF(pixmap.rect())
+        # Фрагмент задается центром, поэтому уменьшенный спрайт
+        # оказывается в середине области рыбы
+        fragments = [QPainter.PixmapFragment.create(QPointF(x, y), source)
+                     for x, y in zip(*centers.tolist())]
+        painter.drawPixmapFragments(fragments, pixmap)
+
+    def mousePressEvent(self, event):
+        """Показывает информацию о рыбе под курсором."""
+        position = event.pos()
+        # Рыба ищется среди нарисованных позиций, а не текущих позиций
+        # модели, которые могли уйти вперед
+        if not self.detached:
+            fish = self.aquarium.fish_at(position.x(), position.y(),
+                                         self.positions)
+        elif self.positions is not None:
+            # Модель меняет другой поток: поиск только по массивам кадра
+            fish = self.aquarium.fish_at(position.x(), position.y(),
+                                         self.positions, self.extents)
+        else:
+            fish = None
+        if fish is None:
+            event.ignore()
+            return
+        window = self.scene().views()[0].window()  # Получаем главное окно
+        window.showFishInfo(fish)  # Показываем информацию о рыбе
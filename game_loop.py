@@ -0,0 +1,90 @@
+"""Игровой цикл с фиксированным шагом модели.
+
+Таймер окна срабатывает неравномерно: кадры опаздывают под нагрузкой и
+пока открыт модальный диалог. Цикл копит прошедшее время и продвигает
+модель целыми шагами фиксированной длины, поэтому модель не зависит от
+дрожания таймера. Остаток времени меньше шага используется для
+интерполяции: рыбы рисуются между двумя последними состояниями модели и
+движутся плавно при любой частоте кадров.
+
+После долгой паузы (например, закрытия диалога) цикл выполняет не больше
+max_steps шагов, а остальное время отбрасывает, чтобы догоняющие шаги не
+замедлили следующие кадры. Если кадр опаздывает и модели пришлось
+сделать несколько шагов, перенос состояния на сцену может быть пропущен
+(не больше max_skip кадров подряд), чтобы модель успевала за временем.
+Модуль не зависит от Qt.
+"""
+
+from simulation import TIMER_UPDATE_HEALTH
+
+# Длительность шага модели (в миллисекундах)
+LOOP_STEP = TIMER_UPDATE_HEALTH
+# Наибольшее число шагов модели за один кадр
+LOOP_MAX_STEPS = 15
+# Наибольшее число пропущенных подряд кадров отрисовки
+LOOP_MAX_SKIP = 2
+
+
+class FixedStepLoop:
+    """Накопитель времени для шагов модели фиксированной длины."""
+
+    def __init__(self, step=LOOP_STEP, max_steps=LOOP_MAX_STEPS,
+                 max_skip=LOOP_MAX_SKIP):
+        """Создает цикл с шагом step мс."""
+        self.step = step  # Длительность шага модели (мс)
+        self.max_steps = max_steps  # Наибольшее число шагов за кадр
+        # Наибольшее число пропущенных подряд кадров отрисовки
+        self.max_skip = max_skip
+        self.accumulator = 0.0  # Время, еще не отданное модели (мс)
+        self.steps = 0  # Количество выполненных шагов
+        self.dropped = 0.0  # Отброшенное время (мс)
+        self.skipped = 0  # Пропущенные подряд кадры отрисовки
+        self.skipped_total = 0  # Все пропущенные кадры отрисовки
+
+    def advance(self, elapsed):
+        """Учитывает elapsed мс и возвращает число шагов модели."""
+        self.accumulator += elapsed
+        steps = int(self.accumulator // self.step)
+        if steps > self.max_steps:
+            # Лишнее время не догоняем, иначе кадры начнут отставать
+            excess = (steps - self.max_steps) * self.step
+            self.dropped += excess
+            self.accumulator -= excess
+            steps = self.max_steps
+        self.accumulator -= steps * self.step
+        self.steps += steps
+        return steps
+
+    @property
+    def alpha(self):
+        """Доля шага между последними двумя состояниями модели."""
+        return self.accumulator / self.step
+
+    def should_render(self, steps):
+        """Решает, переносить ли состояние на сцену в этом кадре.
+
+        steps - число шагов модели, выполненных в кадре.
+        """
+        if steps > 1 and self.skipped < self.max_skip:
+            self.skipped += 1
+            self.skipped_total += 1
+            return False
+        self.skipped = 0
+        return True
+
+    def lines(self):
+        """Возвращает строки со статистикой цикла."""
+        return [f"Шагов модели: {self.steps}, "
+                f"пропущено кадров: {self.skipped_total}, "
+                f"отброшено: {self.dropped / 1000:.1f} с"]
+
+
+def interpolate(previous, current, alpha):
+    """Возвращает состояние между previous и current в доле alpha.
+
+    Если массивы разной формы (например, добавились рыбы), возвращает
+    current без интерполяции.
+    """
+    if previous is None or previous.shape != current.shape:
+        return current
+    return previous + (current - previous) * alpha
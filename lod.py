@@ -0,0 +1,84 @@
+"""Выбор уровня детализации рыб по измеренному времени кадра.
+
+Уровни детализации от самого подробного к самому дешевому:
+
+    full     - полноразмерные спрайты рыб
+    reduced  - уменьшенные вдвое спрайты из кэша
+    points   - точки цвета вида, рисуемые одним элементом сцены
+
+Контроллер сглаживает время работы кадра и понижает детализацию, когда
+кадр не укладывается в бюджет. Повышение детализации разрешено, только
+если кадр тратит малую часть бюджета и рыб заметно меньше, чем было,
+когда от этого уровня пришлось отказаться, поэтому уровни не мигают
+туда и обратно. Модуль не зависит от Qt.
+"""
+
+from simulation import TIMER_UPDATE_HEALTH
+
+# Уровни детализации
+LOD_FULL = "full"
+LOD_REDUCED = "reduced"
+LOD_POINTS = "points"
+# Уровни от самого подробного к самому дешевому
+LOD_LEVELS = (LOD_FULL, LOD_REDUCED, LOD_POINTS)
+# Автоматический выбор уровня
+LOD_AUTO = "auto"
+
+# Вес нового замера в сглаженном времени кадра
+LOD_SMOOTHING = 0.1
+# Доля бюджета, выше которой детализация понижается
+LOD_DOWNGRADE = 0.9
+# Доля бюджета, ниже которой детализацию можно повысить
+LOD_UPGRADE = 0.4
+# Доля численности, при которой уровень был отвергнут, ниже которой
+# к нему можно вернуться
+LOD_RETRY_POPULATION = 0.8
+# Сколько кадров уровень держится после переключения
+LOD_HOLD_FRAMES = 60
+
+
+class DetailController:
+    """Автоматический выбор уровня детализации."""
+
+    def __init__(self, budget=TIMER_UPDATE_HEALTH, level=LOD_FULL):
+        """Создает контроллер с бюджетом кадра budget мс."""
+        self.budget = budget  # Бюджет работы одного кадра (мс)
+        self.level = level  # Текущий уровень детализации
+        self.frame_ms = None  # Сглаженное время работы кадра (мс)
+        self.held = 0  # Кадров с последнего переключения
+        # Численность рыб, при которой уровень не уложился в бюджет
+        self.rejected = {}
+        self.switches = 0  # Количество переключений уровня
+
+    def _switch(self, level):
+        """Переключает уровень и начинает отсчет заново."""
+        self.level = level
+        self.held = 0
+        # Замеры прежнего уровня не говорят о стоимости нового
+        self.frame_ms = None
+        self.switches += 1
+
+    def update(self, frame_ms, count):
+        """Учитывает время работы кадра и возвращает уровень детализации.
+
+        count - количество рыб в аквариуме.
+        """
+        if self.frame_ms is None:
+            self.frame_ms = frame_ms
+        else:
+            self.frame_ms += (frame_ms - self.frame_ms) * LOD_SMOOTHING
+        self.held += 1
+        if self.held < LOD_HOLD_FRAMES:
+            return self.level
+
+        index = LOD_LEVELS.index(self.level)
+        if (self.frame_ms > self.budget * LOD_DOWNGRADE
+                and index + 1 < len(LOD_LEVELS)):
+            self.rejected[self.level] = count
+            self._switch(LOD_LEVELS[index + 1])
+        elif self.frame_ms < self.budget * LOD_UPGRADE and index > 0:
+            better = LOD_LEVELS[index - 1]
+            limit = self.rejected.get(better)
+            if limit is None or count < limit * LOD_RETRY_POPULATION:
+                self._switch(better)
+        return self.level
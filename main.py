@@ -1,377 +1,402 @@
 import sys
 import os
+import argparse
+import time
+from functools import partial
+
+# Начало запуска отсчитывается от импорта этого модуля
+from startup import StartupProfile
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QPushButton,
                              QGraphicsPixmapItem, QGraphicsScene,
                              QGraphicsView, QFrame, QHBoxLayout, QWidget,
-                             QVBoxLayout, QDialog)
-from PyQt5.QtCore import Qt, QTimer, QEvent
-from PyQt5.QtGui import QPixmap, QFont, QTransform, QBrush, QColor, QPalette
-
-# Константы для управления временем
-
-# Таймер для уменьшения чистоты аквариума (в миллисекундах)
-TIMER_CLEAN_AQUARIUM = 120000
-# Таймер для уменьшения чистоты воды (в миллисекундах)
-TIMER_CLEAN_WATER = 60000
-# Таймер для обновления позиции рыбы (в миллисекундах)
-TIMER_FISH_POSITION = 60000
-# Таймер для обновления здоровья и голода рыбы (в миллисекундах)
-TIMER_UPDATE_HEALTH = 16
-
-# Константы для управления состоянием рыб и аквариума
-FISH_HEALTH = 100  # Начальное здоровье рыбы
-WATER_CLEAN = 100  # Начальная чистота воды
-AQUARIUM_CLEAN = 100  # Начальная чистота аквариума
-FISH_HUNGER = 100  # Максимальный уровень голода рыбы
-FISH_BASE_HUNGER = 0  # Базовый уровень голода рыбы
-FISH_SPEED = 1.2  # Скорость движения рыбы
+                             QVBoxLayout, QGraphicsItem, QMessageBox)
+from PyQt5.QtCore import Qt, QTimer, QEvent, QElapsedTimer
+from PyQt5.QtGui import QFont, QTransform, QBrush, QColor, QPalette
+
+from simulation import Aquarium, TIMER_UPDATE_HEALTH
+from sprites import SpriteCache
+from asset_manager import AssetManager
+from pool import ItemPool
+from lod import (DetailController, LOD_AUTO, LOD_FULL, LOD_REDUCED,
+                 LOD_POINTS, LOD_LEVELS)
+from fish_layer import FishLayer
+from panels import InfoPanel
+from tank_stats import STATS_BUCKET
+from game_loop import FixedStepLoop, interpolate
+from metrics import (TimeSeries, CsvExport, MetricsServer, METRICS_PORT,
+                     aquarium_metrics)
+from tanks import TankGroup
+import species_config
 
 # Константы для управления внешним видом кнопок
 HEIGHT_BUTTON = 90  # Высота кнопок
 SPACING_BUTTON = 20  # Расстояние между кнопками
 
-
-def create_food_item(scene, pixmap, duration=5000, x=0, y=0):
-    """Создает объект корма и добавляет его на сцену."""
-
-    # Создаем объект QGraphicsPixmapItem для отображения корма
-    food_item = QGraphicsPixmapItem(pixmap)
-    # Устанавливаем начальную позицию корма
-    food_item.setPos(x, y)
-
-    # Добавляем объект корма на сцену
-    scene.addItem(food_item)
-
-    # Создаем таймер для анимации падения корма
-    fall_timer = QTimer()
-
-    def fall():
-        """Функция, отвечающая за падение корма."""
-        # Получаем текущую позицию корма
-        current_pos = food_item.pos()
-        # Вычисляем расстояние до дна
-        distance = 899 - current_pos.y()
-        # Вычисляем скорость падения,
-        # чтобы корм упал за заданное время (duration)
-        speed = distance / (duration / 50)
-        # Вычисляем новую координату Y
-        new_y = current_pos.y() + speed
-        # Устанавливаем новую позицию корма
-        food_item.setPos(current_pos.x(), new_y)
-
-        # Если корм достиг дна, останавливаем таймер и удаляем корм со сцены
-        if new_y >= 899:
-            fall_timer.stop()
-            scene.removeItem(food_item)
-
-    # Подключаем функцию fall к таймеру, чтобы она вызывалась при каждом тике
-    fall_timer.timeout.connect(fall)
-    # Запускаем таймер с интервалом 50 миллисекунд
-    fall_timer.start(50)
+# Режимы отрисовки сцены
+RENDER_FULL = "full"  # Перерисовка всего вида на каждом кадре
+RENDER_MINIMAL = "minimal"  # Перерисовка только измененных областей
+# Перерисовка одного прямоугольника, охватывающего все изменения
+RENDER_BOUNDING = "bounding"
+RENDER_MODES = {
+    RENDER_FULL: QGraphicsView.FullViewportUpdate,
+    RENDER_MINIMAL: QGraphicsView.MinimalViewportUpdate,
+    RENDER_BOUNDING: QGraphicsView.BoundingRectViewportUpdate,
+}
+
+# Способы отрисовки рыб
+RENDERER_ITEMS = "items"  # Отдельный элемент сцены на каждую рыбу
+# Один элемент сцены, рисующий всех рыб из массивов модели
+RENDERER_BATCHED = "batched"
+RENDERERS = (RENDERER_ITEMS, RENDERER_BATCHED)
+
+# Через сколько кадров обновляется наложение с замерами
+PROFILE_OVERLAY_FRAMES = 30
+# Через сколько кадров обновляется сводка рыб поверх сцены
+HUD_UPDATE_FRAMES = 30
+
+# Сколько свободных гранул корма хранится для повторного использования
+FOOD_POOL_CAPACITY = 32
+# Сколько свободных накладываемых изображений хранится в пуле
+OVERLAY_POOL_CAPACITY = 2
+# Наибольшее количество аквариумов в одном окне
+MAX_TANKS = 9
+# Изображения, которых нет на первом кадре: они декодируются в фоне
+# после первой отрисовки
+DEFERRED_ASSETS = ["food.gif", "clean.gif", "water.gif"]
 
 
 class MovingFish(QGraphicsPixmapItem):
-    """Класс, представляющий движущуюся рыбу в аквариуме."""
+    """Класс, отображающий рыбу из модели аквариума."""
+
+    def __init__(self, state, image_name, sprite_cache, scale_factor=1,
+                 attach=True):
+        """Инициализирует объект MovingFish.
 
-    def __init__(self, x, y, scene_width, scene_height,
-                 pixmap_path, fish_type, description, scale_factor=1):
-        """Инициализирует объект MovingFish."""
+        Если attach ложно (модель меняет поток модели), изображение не
+        читает и не меняет модель: размер рыбы уже задан при добавлении,
+        а позицию переносит окно.
+        """
         super().__init__()
-        # Направление движения по оси X (1 - вправо, -1 - влево)
-        self.direction_x = 1
-        # Направление движения по оси Y (1 - вниз, -1 - вверх)
-        self.direction_y = 1
-        self.scene_width = scene_width  # Ширина сцены
-        self.scene_height = scene_height  # Высота сцены
-        # Оригинальное изображение рыбы
-        self.original_pixmap = QPixmap(pixmap_path)
+        # Состояние рыбы в модели аквариума
+        self.state = state
         # Флаг для отображения метки с информацией о рыбе
         self.label_visible = False
-        # Тип рыбы
-        self.fish_type = fish_type
-        # Начальное здоровье рыбы
-        self.health = FISH_HEALTH
-        # Начальный уровень голода рыбы
-        self.hunger = FISH_BASE_HUNGER
-        # Описание рыбы
-        self.description = description
-        # Начальная чистота воды
-        self.water_cleanliness = WATER_CLEAN
-        # Начальная чистота аквариума
-        self.aquarium_cleanliness = AQUARIUM_CLEAN
-
-        # Загружаем и масштабируем изображение рыбы
-        pixmap = QPixmap(pixmap_path)
-        pixmap = pixmap.scaled(int(pixmap.width() * scale_factor),
-                               int(pixmap.height() * scale_factor))
+        self.image_name = image_name  # Имя изображения рыбы
+        self.sprite_cache = sprite_cache  # Общий кэш спрайтов
+
+        # Берем масштабированное изображение рыбы из общего кэша
+        original = sprite_cache.original(image_name)
+        pixmap = sprite_cache.get(image_name,
+                                  int(original.width() * scale_factor),
+                                  int(original.height() * scale_factor))
         self.setPixmap(pixmap)  # Устанавливаем изображение рыбы
-        self.setPos(x, y)  # Устанавливаем начальную позицию
+        self.full_pixmap = pixmap  # Изображение полной детализации
+        if attach:
+            # Сообщаем модели размер рыбы для отражения от границ
+            self.state.width = pixmap.width()
+            self.state.height = pixmap.height()
+            # Устанавливаем начальную позицию
+            self.setPos(self.state.x, self.state.y)
         # Разрешаем обработку событий наведения мыши
         self.setAcceptHoverEvents(True)
 
-        # Создаем таймер для обновления состояния рыбы
-        self.timer = QTimer()
-        # Подключаем метод updateStatus к таймеру
-        self.timer.timeout.connect(self.updateStatus)
-        self.timer.start(TIMER_FISH_POSITION)  # Запускаем таймер
-
-    def decreaseHealth(self):
-        """Уменьшает здоровье рыбы на 2 единицы."""
-        self.health -= 2
-        self.health = max(0, self.health)  # Здоровье не может быть меньше 0
-
-    def updateStatus(self):
-        """Обновляет здоровье и голод рыбы."""
-        self.decreaseHealth()  # Уменьшаем здоровье
-        self.hunger += 1  # Увеличиваем голод
-        # Голод не может быть больше максимального значения
-        self.hunger = min(FISH_HUNGER, self.hunger)
-
-    def getHungerLevel(self):
-        """Возвращает уровень голода рыбы."""
-        return self.hunger
-
-    def feedFish(self):
-        """Кормит рыбу, увеличивая ее здоровье и сбрасывая голод."""
-        # Здоровье не может быть больше 100
-        self.health = min(100, self.health + 100)
-        self.hunger = 0  # Сбрасываем голод
-
     def mousePressEvent(self, event):
         """Обрабатывает событие нажатия мыши на рыбу."""
         super().mousePressEvent(event)
         window = self.scene().views()[0].window()  # Получаем главное окно
-        window.showFishInfo(self)  # Показываем информацию о рыбе
-
-    def updatePosition(self):
-        """Обновляет позицию рыбы, двигая ее по сцене."""
-
-        # Получаем текущую координату X
-        current_x = self.x()
-
-        # Получаем текущую координату Y
-        current_y = self.y()
-
-        # Вычисляем новую координату X, добавляя к текущей X координате
-        # произведение направления по X на скорость рыбы
-        new_x = current_x + self.direction_x * FISH_SPEED
-
-        # Вычисляем новую координату Y, добавляя к текущей Y координате
-        # произведение направления по Y на скорость рыбы
-        new_y = current_y + self.direction_y * FISH_SPEED
-
-        # Проверяем, не вышла ли рыба за левую
-        # границу сцены (координата X меньше 0)
-        if new_x < 0:
-            # Если вышла, устанавливаем
-            # координату X на границу (0)
-            new_x = 0
-            # Меняем направление движения по X на противоположное
-            self.direction_x *= -1
-
-        # Проверяем, не вышла ли рыба за правую границу сцены
-        # (координата X больше ширины сцены минус ширина рыбы)
-        elif new_x > self.scene_width - self.pixmap().width():
-            # Если вышла, устанавливаем координату X на правую границу
-            new_x = self.scene_width - self.pixmap().width()
-            # Меняем направление движения по X на противоположное
-            self.direction_x *= -1
-
-        # Проверяем, не вышла ли рыба за
-        # верхнюю границу сцены (координата Y меньше 0)
-        if new_y < 0:
-            # Если вышла, устанавливаем координату Y на границу (0)
-            new_y = 0
-            # Меняем направление движения по Y на противоположное
-            self.direction_y *= -1
-
-        # Проверяем, не вышла ли рыба за нижнюю границу сцены
-        # (координата Y больше высоты сцены минус высота рыбы)
-        elif new_y > self.scene_height - self.pixmap().height():
-            # Если вышла, устанавливаем координату Y на нижнюю границу
-            new_y = self.scene_height - self.pixmap().height()
-            # Меняем направление движения по Y на противоположное
-            self.direction_y *= -1
-
-        # Устанавливаем новую позицию рыбы с учетом вычисленных координат
-        self.setPos(new_x, new_y)
+        window.showFishInfo(self.state)  # Показываем информацию о рыбе
+
+    def setDetail(self, level):
+        """Выбирает изображение рыбы для уровня детализации level.
+
+        На уровне reduced рисуется уменьшенный вдвое спрайт в центре
+        прежнего изображения, на уровне points рыба скрыта.
+        """
+        self.setVisible(level != LOD_POINTS)
+        if level == LOD_REDUCED:
+            width = self.full_pixmap.width()
+            height = self.full_pixmap.height()
+            self.setPixmap(self.sprite_cache.get(
+                self.image_name, max(1, width // 2), max(1, height // 2)))
+            self.setOffset(width / 4, height / 4)
+        else:
+            self.setPixmap(self.full_pixmap)
+            self.setOffset(0, 0)
+
+    def syncPosition(self, x, y):
+        """Переносит на сцену позицию рыбы, рассчитанную окном."""
+        self.setPos(x, y)
 
     def resetTransform(self):
         """Сбрасывает все преобразования изображения рыбы."""
         self.setTransform(QTransform())
 
     def paint(self, painter, option, widget):
-        """Перерисовывает изображение рыбы."""
-        painter.drawPixmap(
-            0, 0, self.original_pixmap.scaled(
-                self.pixmap().width(), self.pixmap().height()
-            )
-        )
+        """Перерисовывает изображение рыбы готовым спрайтом из кэша."""
+        painter.drawPixmap(self.offset(), self.pixmap())
+
+
+class Tank:
+    """Аквариум окна: модель, ее сцена и элементы сцены.
+
+    Ресурсы, кэш спрайтов, вид и игровой цикл у всех аквариумов окна
+    общие, а здесь хранится только то, что относится к одной модели.
+    """
+
+    def __init__(self, aquarium, scene):
+        """Создает аквариум окна для модели aquarium на сцене scene."""
+        self.aquarium = aquarium  # Модель аквариума
+        self.scene = scene  # Сцена аквариума
+        self.clean_water_image_item = None  # Изображение очистки воды
+        self.food_pool = None  # Пул элементов корма
+        self.overlay_pool = None  # Пул накладываемых изображений
+        self.food_items = {}  # Элементы сцены для корма из модели
+        self.water_item = None  # Элемент для отображения воды при ее смене
+        self.fish_layer = None  # Слой, рисующий всех рыб
+        # Элементы сцены для рыб (пусто при отрисовке RENDERER_BATCHED)
+        self.fishes = []
+        self.shown = 0  # Количество рыб модели, для которых есть изображения
+        # Позиции рыб перед последним шагом модели для интерполяции
+        self.previous_positions = None
+        # Журнал действий (None - запись выключена)
+        self.recorder = None
+
+    # Действия пользователя над моделью. При модели в отдельном потоке
+    # окно не вызывает их само, а ставит в очередь команд потока модели
+
+    def feed(self):
+        """Бросает корм в аквариум."""
+        self.aquarium.drop_food()
+        if self.recorder is not None:
+            self.recorder.feed()
+
+    def clean(self):
+        """Чистит аквариум."""
+        self.aquarium.clear_aquarium()
+        if self.recorder is not None:
+            self.recorder.clean()
+
+    def changeWater(self):
+        """Меняет воду в аквариуме."""
+        self.aquarium.change_water()
+        if self.recorder is not None:
+            self.recorder.water()
+
+    def resize(self, width, height):
+        """Меняет границы движения рыб."""
+        self.aquarium.resize(width, height)
+        if self.recorder is not None:
+            self.recorder.resize(width, height)
+
+    def click(self, fish):
+        """Записывает нажатие на рыбу fish в журнал."""
+        if self.recorder is not None:
+            self.recorder.click(fish)
+
+
+def _tank_field(name):
+    """Создает свойство окна, хранящееся в текущем аквариуме окна."""
+
+    def getter(self):
+        return getattr(self.tank, name)
+
+    def setter(self, value):
+        setattr(self.tank, name, value)
+
+    return property(getter, setter)
 
 
 class MyWindow(QMainWindow):
     """Основное окно приложения."""
 
-    def __init__(self):
-        """Инициализирует объект MyWindow."""
+    # Состояние текущего аквариума; остальные аквариумы продолжают
+    # жить в общем планировщике, но не отображаются
+    aquarium = _tank_field("aquarium")
+    scene = _tank_field("scene")
+    clean_water_image_item = _tank_field("clean_water_image_item")
+    food_pool = _tank_field("food_pool")
+    overlay_pool = _tank_field("overlay_pool")
+    food_items = _tank_field("food_items")
+    water_item = _tank_field("water_item")
+    fish_layer = _tank_field("fish_layer")
+    fishes = _tank_field("fishes")
+    previous_positions = _tank_field("previous_positions")
+    recorder = _tank_field("recorder")
+
+    def __init__(self, render_mode=RENDER_FULL, profile=False,
+                 profile_output=None, snapshot_path=None, record_path=None,
+                 detail=LOD_AUTO, renderer=RENDERER_ITEMS, metrics_csv=None,
+                 metrics_port=None, tanks=1, species_path=None,
+                 startup=None, threaded=False):
+        """Инициализирует объект MyWindow.
+
+        Если задан snapshot_path, состояние аквариума восстанавливается
+        из этого файла (если он существует) и периодически сохраняется
+        в него в фоновом потоке. Если задан record_path, кадры и действия
+        пользователя записываются в этот журнал (см. eventlog.py).
+        detail - уровень детализации рыб или LOD_AUTO для выбора уровня
+        по времени кадра (см. lod.py), renderer - способ отрисовки рыб.
+        Если задан metrics_csv или metrics_port, показатели аквариума
+        записываются в ряд (см. metrics.py), который выгружается
+        в CSV-файл и по HTTP на этом порту localhost.
+        tanks - количество независимых аквариумов в окне; снимок и журнал
+        относятся к первому из них. species_path - файл описания видов
+        и их численности (по умолчанию из assets, см. species_config.py).
+        startup - замер этапов запуска (см. startup.py); он печатается
+        после первой отрисовки. Если threaded истинно, модель продвигается
+        в отдельном потоке, а окно показывает ее кадры (см. worker.py).
+        """
         super().__init__()
-        self.water_item = None  # Элемент для отображения воды при ее смене
-        self.food_items = []  # Список объектов корма
+        self.startup = startup  # Замер запуска (None - не ведется)
+        # Поток модели (None - модель продвигает таймер окна)
+        self.worker = None
+        self.frame = None  # Последний кадр, взятый у потока модели
+        self.frame_sequence = None  # Номер кадра, перенесенного на сцену
+        # Профилировщик горячих участков (None - замеры выключены)
+        self.profiler = None
+        # Файл, в который замеры записываются при закрытии окна
+        self.profile_output = profile_output
         # Путь к текущей директории
         self.current_directory = os.path.dirname(os.path.abspath(__file__))
+        # Модель первого аквариума
+        restored = snapshot_path is not None and os.path.exists(snapshot_path)
+        if restored:
+            # Модули снимков, журнала и замеров импортируются,
+            # только если эти возможности включены
+            from snapshot import load as load_snapshot, SnapshotError
+            try:
+                first = load_snapshot(snapshot_path)
+            except (SnapshotError, OSError) as error:
+                # Снимок старой версии, оборванный или нечитаемый файл не
+                # мешает запуску: аквариум начинается заново, а файл
+                # перезапишет автосохранение
+                print(f"Не удалось восстановить аквариум из "
+                      f"{snapshot_path}: {error}; создан новый аквариум",
+                      file=sys.stderr)
+                restored = False
+        if not restored:
+            first = Aquarium()
+        # Остальные аквариумы регистрируют правила в планировщике первого,
+        # поэтому все модели продвигаются одним вызовом
+        self.group = TankGroup(first.scheduler)
+        self.group.add(first)
+        for _ in range(tanks - 1):
+            self.group.create()
+        # Реестр ресурсов: каждый файл из assets читается один раз
+        self.assets = AssetManager(
+            os.path.join(self.current_directory, "assets"))
+        # Виды рыб и их численность в новых аквариумах
+        if species_path is None:
+            self.species = species_config.loads(
+                self.assets.text(species_config.SPECIES_FILE))
+        else:
+            self.species = species_config.load(species_path)
+        # Общий кэш спрайтов для рыб, корма и анимаций
+        self.sprite_cache = SpriteCache(loader=self.assets.pixmap)
+        # Для первого кадра нужны только фон и спрайты заселенных видов.
+        # Описания видов читаются при показе информации о рыбе,
+        # остальные изображения - в фоне после первой отрисовки
+        self.background_pixmap = self.assets.pixmap("main.gif")
+        for image in species_config.used_assets(self.species):
+            self.sprite_cache.original(image)
+        self.markStartup("assets")
 
         # Настройки окна
         self.setWindowTitle("Эмулятор Аквариума")  # Заголовок окна
         self.setFixedSize(1725, 950)  # Фиксированный размер окна
 
-        # Создание сцены
-        self.scene = QGraphicsScene(self)  # Создаем сцену
-        self.scene.setSceneRect(0, 0, 1525, 700)  # Устанавливаем размер сцены
-
-        # Создание вида
-        self.view = QGraphicsView(self.scene, self)  # Создаем вид
+        # Создание вида; сцену ему задает текущий аквариум
+        self.view = QGraphicsView(self)  # Создаем вид
         # Отключаем горизонтальную полосу прокрутки
         self.view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         # Отключаем вертикальную полосу прокрутки
         self.view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         # Устанавливаем режим обновления вида
-        self.view.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        self.setupRendering(render_mode)
         # Отключаем рамку вида
         self.view.setFrameShape(QFrame.NoFrame)
         # Выравниваем вид по левому верхнему углу
         self.view.setAlignment(Qt.AlignLeft | Qt.AlignTop)
 
         # Установка фона
-        self.background_image_path = os.path.join(
-            self.current_directory, "assets", "main.gif")
-        # Загружаем фоновое изображение
-        self.background_pixmap = QPixmap(self.background_image_path)
-        # Создаем кисть с фоновым изображением
-        background_brush = QBrush(self.background_pixmap)
-        # Устанавливаем фон сцены
-        self.scene.setBackgroundBrush(background_brush)
-
-        # Добавление изображения для очистки воды
-        self.clean_image_path = os.path.join(
-            self.current_directory, "assets", "clean.gif")
-        # Загружаем изображение
-        clean_pixmap = QPixmap(self.clean_image_path)
-        # Масштабируем изображение
-        clean_pixmap = clean_pixmap.scaled(750, 750)
-        # Создаем объект изображения
-        self.clean_water_image_item = QGraphicsPixmapItem(clean_pixmap)
-        # Устанавливаем позицию
-        self.clean_water_image_item.setPos(350, 100)
-        # Скрываем изображение
-        self.clean_water_image_item.hide()
-        # Добавляем изображение на сцену
-        self.scene.addItem(self.clean_water_image_item)
-
-        # Загрузка описаний рыб
-        okun_description_path = os.path.join(
-            self.current_directory, "assets", "Karas_description.txt")
-        shuka_description_path = os.path.join(
-            self.current_directory, "assets", "Shuka_description.txt")
-        carp_description_path = os.path.join(
-            self.current_directory, "assets", "Carp_description.txt")
-        vobla_description_path = os.path.join(
-            self.current_directory, "assets", "Vobla_description.txt")
-        seld_description_path = os.path.join(
-            self.current_directory, "assets", "Seld_description.txt")
-
-        with open(okun_description_path, "r", encoding="utf-8") as file:
-            Karas_description = file.read()  # Читаем описание карася
-        with open(shuka_description_path, "r", encoding="utf-8") as file:
-            Shuka_description = file.read()  # Читаем описание щуки
-        with open(carp_description_path, "r", encoding="utf-8") as file:
-            Carp_description = file.read()  # Читаем описание карпа
-        with open(vobla_description_path, "r", encoding="utf-8") as file:
-            Vobla_description = file.read()  # Читаем описание воблы
-        with open(seld_description_path, "r", encoding="utf-8") as file:
-            Seld_description = file.read()  # Читаем описание сельди
-
-        # Создание рыб
-        self.fishes = [
-            MovingFish(
-                200, 200, 1600, 900,
-                os.path.join(self.current_directory, "assets", "fish1.gif"),
-                "Карась",
-                Karas_description),  # Создаем карася
-            MovingFish(
-                500, 300, 1600, 900,
-                os.path.join(self.current_directory, "assets", "fish2.gif"),
-                "Щука",
-                Shuka_description),  # Создаем щуку
-            MovingFish(
-                700, 500, 1600, 900,
-                os.path.join(self.current_directory, "assets", "fish3.gif"),
-                "Карп",
-                Carp_description),  # Создаем карпа
-            MovingFish(
-                1100, 50, 1600, 900,
-                os.path.join(self.current_directory, "assets", "fish4.gif"),
-                "Вобла",
-                Vobla_description),  # Создаем воблу
-            MovingFish(
-                500, 50, 1600, 900,
-                os.path.join(self.current_directory, "assets", "fish5.gif"),
-                "Сельдь",
-                Seld_description),  # Создаем сельдь
-        ]
-
-        # Добавление рыб на сцену
-        for fish in self.fishes:
-            self.scene.addItem(fish)  # Добавляем каждую рыбу на сцену
+        # Кисть с фоновым изображением, общая для сцен всех аквариумов
+        self.background_brush = QBrush(self.background_pixmap)
+
+        # Модель продвигается шагами фиксированной длины независимо
+        # от того, насколько точно срабатывает таймер
+        self.loop = FixedStepLoop()
+
+        # Слой, рисующий всех рыб одним элементом: всегда при отрисовке
+        # RENDERER_BATCHED, иначе только на уровне детализации points
+        self.renderer = renderer
+        self.detail = LOD_FULL  # Текущий уровень детализации рыб
+
+        # Сцены аквариумов; вид показывает сцену текущего аквариума
+        self.tanks = [self.createTank(aquarium, restored and index == 0)
+                      for index, aquarium in enumerate(self.group)]
+        self.tank = self.tanks[0]  # Текущий аквариум
+        self.view.setScene(self.scene)
+        self.markStartup("scene")
+        # Первая отрисовка отслеживается фильтром событий области вида
+        self.first_paint_pending = True
+        self.view.viewport().installEventFilter(self)
+
+        # Автоматический выбор уровня детализации
+        # (None - уровень задан явно)
+        self.detail_controller = None
+        self.paint_ms = 0.0  # Время последней отрисовки вида (мс)
+        # Флаг замера времени отрисовки вида
+        self.measure_paint = False
+        if detail == LOD_AUTO:
+            self.detail_controller = DetailController()
+            self.measurePaint()
+        else:
+            self.setDetail(detail)
+
+        # Ряд показателей и его выгрузки (None - показатели не пишутся)
+        self.metrics = None
+        self.metrics_csv = None
+        self.metrics_server = None
+        if metrics_csv is not None or metrics_port is not None:
+            self.metrics = TimeSeries()
+            self.measurePaint()
+        if metrics_csv is not None:
+            self.metrics_csv = CsvExport(metrics_csv, self.metrics)
+        if metrics_port is not None:
+            self.metrics_server = MetricsServer(self.metrics, metrics_port)
 
         # Создание кнопок
         self.setupButtons()  # Вызываем метод для создания кнопок
 
         # Создание меток
         self.current_label = None
+        # Информационные панели по имени; создаются при первом показе
+        self.panels = {}
+        self.info_fish = None  # Рыба, показанная в панели информации
         # Метка для отображения здоровья
         self.health_label = QLabel(self)
         # Устанавливаем размер и положение метки
-        self.health_label.setGeometry(1300, 50, 200, 50)
+        self.health_label.setGeometry(1300, 50, 250, 80)
         self.health_label.setStyleSheet(
             "color: white; font-weight: bold;")
         # Обновляем текст метки здоровья
         self.update_health_label()
-        # Список меток для отображения голода каждой рыбы
-        self.hunger_labels = []
-        for i, fish in enumerate(self.fishes):
-            # Создаем метку для отображения голода рыбы
-            hunger_label = QLabel(self)
-            # Устанавливаем размер и положение метки
-            hunger_label.setGeometry(100, 250 + i * 100, 200, 50)
-            hunger_label.setStyleSheet(
-                "color: white; font-weight: bold;")
-            # Добавляем метку в список
-            self.hunger_labels.append(hunger_label)
-
-        # Метка для отображения чистоты воды
-        self.water_cleanliness_label = QLabel(self)
-        # Устанавливаем размер и положение метки
-        self.water_cleanliness_label.setGeometry(1300, 150, 200, 50)
-        self.water_cleanliness_label.setStyleSheet(
-            "color: white; font-weight: bold;")
-        # Обновляем текст метки чистоты воды
-        self.update_water_cleanliness_label()
+        # Метка с самыми затратными функциями создается только
+        # при включенных замерах (см. setupProfiling)
+        self.water_cleanliness_label = None
 
         # Создание таймеров
 
-        # Таймер для уменьшения чистоты аквариума
-        self.cleanliness_timer = QTimer(self)
-        # Подключаем метод decreaseCleanliness
-        self.cleanliness_timer.timeout.connect(self.decreaseCleanliness)
-        # Запускаем таймер
-        self.cleanliness_timer.start(TIMER_CLEAN_AQUARIUM)
-
-        # Таймер для уменьшения чистоты воды
-        self.water_change_timer = QTimer(self)
-        self.water_change_timer.timeout.connect(
-            self.decreaseWaterCleanliness)
-        # Запускаем таймер
-        self.water_change_timer.start(TIMER_CLEAN_WATER)
+        # Единственный таймер, продвигающий модель аквариума. Все правила
+        # (движение, голод, падение корма, загрязнение) выполняет
+        # планировщик модели, поэтому число таймеров не зависит
+        # от количества рыб и корма
+        self.clock = QElapsedTimer()
+        self.clock.start()
+        self.tick_timer = QTimer(self)
+        self.tick_timer.setTimerType(Qt.PreciseTimer)
+        self.tick_timer.timeout.connect(self.tick)
+        self.tick_timer.start(TIMER_UPDATE_HEALTH)
 
         # Таймер для блокировки кнопки "Накормить рыб"
         self.feed_timer = QTimer(self)
@@ -405,74 +430,603 @@ class MyWindow(QMainWindow):
         palette.setColor(QPalette.Window, QColor(0, 123, 186))
         self.setPalette(palette)  # Применяем палитру
 
+        # Количество показанных кадров
+        self.frames = 0
+        # Метка здоровья лежит под центральным виджетом, поднимаем ее
+        self.health_label.raise_()
+
+        if profile:
+            self.setupProfiling()
+
+        # Автосохранение первого аквариума (None - сохранение выключено)
+        self.autosaver = None
+        # Модельное время следующего автосохранения
+        self.autosave_due = None
+        if snapshot_path is not None:
+            from snapshot import Autosaver, AUTOSAVE_INTERVAL
+            self.autosaver = Autosaver(snapshot_path)
+            self.autosave_interval = AUTOSAVE_INTERVAL
+            self.autosave_due = self.group.time + AUTOSAVE_INTERVAL
+
+        if record_path is not None:
+            from eventlog import Recorder
+            self.tanks[0].recorder = Recorder(record_path,
+                                              self.tanks[0].aquarium)
+
+        if threaded:
+            # С этого момента модель меняет только поток модели
+            from worker import SimulationWorker
+            self.worker = SimulationWorker(self.group, self.stepModel,
+                                           self.loop)
+            for tank in self.tanks:
+                tank.fish_layer.detached = True
+        self.markStartup("ui")
+
+    def setupRendering(self, render_mode):
+        """Настраивает режим обновления вида и кэширование элементов."""
+        self.render_mode = render_mode
+        self.view.setViewportUpdateMode(RENDER_MODES[render_mode])
+        if render_mode == RENDER_FULL:
+            # Прежнее поведение: без кэшей, вид перерисовывается целиком
+            self.item_cache_mode = QGraphicsItem.NoCache
+            self.item_index_method = QGraphicsScene.BspTreeIndex
+            return
+
+        # Статичный фон отрисовывается один раз и берется из кэша
+        self.view.setCacheMode(QGraphicsView.CacheBackground)
+        # Готовые изображения рыб и корма кэшируются в координатах экрана
+        self.item_cache_mode = QGraphicsItem.DeviceCoordinateCache
+        # Почти все элементы движутся на каждом кадре, поэтому
+        # перестраивать BSP-индекс сцен бессмысленно
+        self.item_index_method = QGraphicsScene.NoIndex
+
+    def createTank(self, aquarium, restored=False):
+        """Создает сцену и элементы сцены для модели aquarium.
+
+        Если restored истинно, рыбы и корм уже есть в модели и для них
+        создаются только изображения, иначе в модель добавляются рыбы
+        по умолчанию.
+        """
+        # Создание сцены
+        scene = QGraphicsScene(self)  # Создаем сцену
+        scene.setSceneRect(0, 0, 1525, 700)  # Устанавливаем размер сцены
+        scene.setItemIndexMethod(self.item_index_method)
+        scene.setBackgroundBrush(self.background_brush)  # Фон сцены
+        tank = Tank(aquarium, scene)
+        # Изображение очистки воды создается при первой очистке
+
+        # Пулы элементов сцены: исчезнувшие элементы скрываются
+        # и используются повторно вместо создания новых
+        tank.food_pool = ItemPool(partial(self.createFoodItem, scene),
+                                  reset=self.hideItem,
+                                  dispose=scene.removeItem,
+                                  capacity=FOOD_POOL_CAPACITY)
+        tank.overlay_pool = ItemPool(partial(self.createOverlayItem, scene),
+                                     reset=self.hideItem,
+                                     dispose=scene.removeItem,
+                                     capacity=OVERLAY_POOL_CAPACITY)
+
+        tank.fish_layer = FishLayer(aquarium, self.sprite_cache,
+                                    self.layerLevel())
+        tank.fish_layer.setVisible(self.renderer == RENDERER_BATCHED)
+
+        # Создание рыб
+        if restored:
+            # Рыбы и корм уже есть в восстановленной модели,
+            # для них создаются только изображения на сцене
+            for state in aquarium.fishes:
+                self.addFishView(state, tank)
+            for food in aquarium.food:
+                food_item = tank.food_pool.acquire()
+                food_item.setPos(food.x, food.y)
+                food_item.show()
+                tank.food_items[food] = food_item
+        else:
+            # Рыбы каждого вида добавляются в модель одним пакетом,
+            # затем для них создаются изображения на сцене. Описание
+            # вида читается из реестра при первом обращении к нему
+            for state in species_config.populate(
+                    aquarium, self.species, read_text=self.assets.text,
+                    image_size=self.spriteSize):
+                self.addFishView(state, tank)
+        scene.addItem(tank.fish_layer)
+        return tank
+
+    def switchTank(self, index):
+        """Показывает аквариум с номером index."""
+        if index == self.tanks.index(self.tank):
+            return
+        self.tank = self.tanks[index]
+        if self.worker is not None:
+            # Кадры нового аквариума появятся после следующего шага модели
+            self.worker.visible = index
+        # Уровень детализации мог смениться, пока аквариум был скрыт
+        for fish in self.fishes:
+            fish.setDetail(self.detail)
+        self.fish_layer.setLevel(self.layerLevel())
+        self.fish_layer.setVisible(self.renderer == RENDERER_BATCHED
+                                   or self.detail == LOD_POINTS)
+        # Интерполяция от позиций другого аквариума невозможна
+        self.previous_positions = None
+        self.view.setScene(self.scene)
+        self.updateFishBoundaries()
+        self.moveFishes()
+        self.syncFood()
+        if len(self.tanks) > 1:
+            self.tank_button.setText(self.tankTitle())
+        self.update_health_label()
+
+    def tankTitle(self):
+        """Возвращает подпись кнопки переключения аквариумов."""
+        return (f"Аквариум {self.tanks.index(self.tank) + 1}"
+                f"/{len(self.tanks)}")
+
+    def nextTank(self):
+        """Показывает следующий аквариум."""
+        self.switchTank((self.tanks.index(self.tank) + 1) % len(self.tanks))
+
+    def createFoodItem(self, scene):
+        """Создает элемент корма на сцене scene для пула."""
+        food_item = QGraphicsPixmapItem(self.sprite_cache.get("food.gif"))
+        food_item.setCacheMode(self.item_cache_mode)
+        scene.addItem(food_item)
+        return food_item
+
+    def createOverlayItem(self, scene):
+        """Создает накладываемое изображение на сцене scene для пула."""
+        overlay_item = QGraphicsPixmapItem()
+        overlay_item.setZValue(-1)
+        overlay_item.setTransformationMode(Qt.SmoothTransformation)
+        scene.addItem(overlay_item)
+        return overlay_item
+
+    @staticmethod
+    def hideItem(item):
+        """Скрывает элемент, возвращенный в пул."""
+        item.hide()
+
+    def pool_lines(self):
+        """Возвращает строки со статистикой пулов элементов."""
+        lines = []
+        for name, pool in (("Корм", self.food_pool),
+                           ("Наложения", self.overlay_pool)):
+            stats = pool.stats()
+            lines.append(
+                f"{name}: {stats['in_use']} в работе, {stats['free']} "
+                f"в пуле, создано {stats['created']}, "
+                f"повторно {stats['reused']}")
+        return lines
+
+    def markStartup(self, phase):
+        """Отмечает окончание этапа запуска, если запуск замеряется."""
+        if self.startup is not None:
+            self.startup.mark(phase)
+
+    def firstPaint(self):
+        """Завершает запуск после первой отрисовки аквариума.
+
+        Изображения, которых еще нет на сцене, декодируются в фоне,
+        а замер запуска печатается.
+        """
+        self.first_paint_pending = False
+        self.assets.preload(DEFERRED_ASSETS, background=True)
+        if self.startup is not None:
+            self.startup.mark("first_paint")
+            print("\n".join(self.startup.lines()))
+            self.startup = None
+
+    def measurePaint(self):
+        """Включает замер времени отрисовки вида."""
+        if not self.measure_paint:
+            self.measure_paint = True
+            # Отрисовка замеряется через фильтр событий области вида
+            self.view.viewport().installEventFilter(self)
+
+    def layerLevel(self):
+        """Возвращает уровень детализации, которым рисует слой рыб."""
+        if self.renderer == RENDERER_BATCHED:
+            return self.detail
+        # Рядом с элементами рыб слой нужен только для точек
+        return LOD_POINTS
+
+    def addFishView(self, state, tank=None):
+        """Создает изображение рыбы state из модели.
+
+        tank - аквариум окна, которому принадлежит рыба (по умолчанию
+        текущий).
+        """
+        tank = tank if tank is not None else self.tank
+        tank.shown += 1
+        # При модели в отдельном потоке размер рыбы задан при добавлении
+        # (см. spawnFishes), и окно не пишет в модель
+        attach = self.worker is None
+        if self.renderer == RENDERER_BATCHED:
+            if attach:
+                tank.fish_layer.attach(state)
+            return
+        fish = MovingFish(state, state.species.image, self.sprite_cache,
+                          attach=attach)
+        fish.setCacheMode(self.item_cache_mode)
+        if self.detail != LOD_FULL:
+            fish.setDetail(self.detail)
+        tank.scene.addItem(fish)
+        tank.fishes.append(fish)
+
+    def setDetail(self, level):
+        """Переключает уровень детализации рыб."""
+        self.detail = level
+        for fish in self.fishes:
+            fish.setDetail(level)
+        self.fish_layer.setLevel(self.layerLevel())
+        self.fish_layer.setVisible(self.renderer == RENDERER_BATCHED
+                                   or level == LOD_POINTS)
+        # Скрытые рыбы не синхронизировались, переносим позиции сразу
+        self.moveFishes()
+
+    def spriteSize(self, image):
+        """Возвращает ширину и высоту изображения image."""
+        pixmap = self.sprite_cache.original(image)
+        return pixmap.width(), pixmap.height()
+
+    def spawnFishes(self, count):
+        """Добавляет count рыб существующих видов в случайные места.
+
+        Рыбы распределяются по видам поровну и добавляются в модель
+        одним пакетом на вид.
+        """
+        species_list = self.aquarium.population.species
+        batches = []
+        for index, species in enumerate(species_list):
+            share = (count // len(species_list)
+                     + (index < count % len(species_list)))
+            width, height = (self.spriteSize(species.image)
+                             if species.image else (0, 0))
+            batches.append(partial(self.aquarium.spawn_fish, species, share,
+                                   width, height))
+        if self.worker is not None:
+            # Изображения рыб создаются, когда рыбы появятся в кадре
+            for batch in batches:
+                self.worker.post(batch)
+            return
+        for batch in batches:
+            for state in batch():
+                self.addFishView(state)
+
+    def setupProfiling(self):
+        """Включает замеры горячих участков и показывает их поверх сцены.
+
+        Замеряются правила планировщика модели, движение рыб, перенос
+        модели на сцену и отрисовка вида. Клавиша F3 скрывает и показывает
+        наложение, F4 сбрасывает накопленные замеры.
+        """
+        from profiler import Profiler
+        self.profiler = Profiler()
+        self.profiler.instrument(self.group.scheduler)
+        # Обертки в атрибутах объектов заменяют методы только для них
+        for aquarium in self.group:
+            aquarium.move_fishes = self.profiler.wrap(
+                "move_fishes", aquarium.move_fishes)
+        self.moveFishes = self.profiler.wrap("moveFishes", self.moveFishes)
+        self.syncFood = self.profiler.wrap("syncFood", self.syncFood)
+        self.measurePaint()
+
+        # Метка здоровья и метка затратных функций служат наложением
+        self.water_cleanliness_label = QLabel(self)
+        for label, y in ((self.health_label, 20),
+                         (self.water_cleanliness_label, 120)):
+            label.setGeometry(1300, y, 420, 100)
+            label.setStyleSheet(
+                "color: white; font-weight: bold; "
+                "background-color: rgba(0, 0, 0, 120);")
+            label.raise_()
+            label.show()
+
     def update_health_label(self):
-        """Обновляет метку здоровья и запускает таймер для движения рыб."""
-        self.move_timer = QTimer()
-        self.move_timer.timeout.connect(self.moveFishes)
-        self.move_timer.start(TIMER_UPDATE_HEALTH)
+        """Обновляет текстовое значение метки здоровья.
 
-    def showFishInfo(self, fish):
-        """Показывает диалоговое окно с информацией о выбранной рыбе."""
-        dialog = QDialog(self)
-        dialog.setWindowTitle(
-            f"Информация о рыбе - {fish.fish_type.capitalize()}")
-        fish_info = (
+        Метка показывает сводку здоровья и голода рыб, а при включенных
+        замерах - статистику кадров.
+        """
+        if not self.health_label.isVisible():
+            return
+        if self.profiler is not None:
+            self.health_label.setText(
+                "\n".join(self.profiler.frame_lines() + self.loop.lines()
+                          + self.pool_lines()))
+            return
+        summary = self.tankSummary()
+        if summary is None:
+            return
+        self.health_label.setText(
+            f"Рыб: {summary['fish']}\n"
+            f"Здоровье: {summary['health_mean']:.0f}%\n"
+            f"Голод: {summary['hunger_mean']:.0f}%, "
+            f"голодают: {summary['starving']}")
+
+    def tankSummary(self):
+        """Возвращает сводку текущего аквариума (см. AquariumStats.as_dict).
+
+        Сводка ведется моделью, поэтому окно не перебирает рыб. При модели
+        в отдельном потоке сводка берется из последнего кадра (None -
+        кадра текущего аквариума еще нет).
+        """
+        if self.worker is None:
+            return self.aquarium.stats.as_dict()
+        if not self.frameShown():
+            return None
+        return self.frame.summary
+
+    def frameShown(self):
+        """Проверяет, что последний кадр потока модели - кадр текущего
+        аквариума."""
+        return (self.frame is not None
+                and self.frame.tank == self.tanks.index(self.tank))
+
+    def tick(self):
+        """Продвигает модель на прошедшее время и обновляет сцену."""
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin_frame()
+        start = time.perf_counter()
+        if self.worker is not None:
+            if self.worker.error is not None:
+                self.stopOnWorkerError()
+                return
+            # Модель продвигает поток модели, окно показывает его кадры
+            render = self.takeFrame()
+        else:
+            steps = self.loop.advance(self.clock.restart())
+            if steps:
+                if steps > 1:
+                    # Догоняющие шаги выполняются одним вызовом модели
+                    self.stepModel((steps - 1) * self.loop.step)
+                count = self.aquarium.movement.count
+                self.previous_positions = (
+                    self.aquarium.movement.position[:, :count].copy())
+                self.stepModel(self.loop.step)
+            # Под нагрузкой часть кадров не переносится на сцену
+            render = self.loop.should_render(steps)
+        # Снимок собирается между кадрами, а запись на диск выполняет
+        # фоновый поток, поэтому кадр не ждет диска. Снимок внутри шага
+        # разбил бы пачку шагов движения и нарушил повтор по журналу
+        if (self.autosaver is not None
+                and self.group.time >= self.autosave_due):
+            self.runCommand(partial(self.autosaver.submit, self.group[0]))
+            self.autosave_due = self.group.time + self.autosave_interval
+        if render:
+            self.moveFishes()
+            self.syncFood()
+        # Работа кадра: шаг модели, перенос на сцену и отрисовка
+        frame_ms = (time.perf_counter() - start) * 1000 + self.paint_ms
+        if self.metrics is not None:
+            if self.worker is None:
+                self.metrics.record(self.aquarium.time,
+                                    aquarium_metrics(self.aquarium, frame_ms))
+            elif self.frameShown():
+                self.metrics.record(self.frame.time,
+                                    self.frame.metrics + (frame_ms,))
+            if self.metrics_csv is not None:
+                self.metrics_csv.poll()
+        if self.detail_controller is not None:
+            level = self.detail_controller.update(frame_ms, self.fishCount())
+            if level != self.detail:
+                self.setDetail(level)
+        self.frames += 1
+        if profiler is not None:
+            profiler.end_frame()
+            # Наложение обновляется реже кадров, чтобы не мешать замерам
+            if profiler.frames % PROFILE_OVERLAY_FRAMES == 0:
+                self.update_health_label()
+                self.update_water_cleanliness_label()
+        elif self.frames % HUD_UPDATE_FRAMES == 0:
+            # Сводка берется из готовых счетчиков, без перебора рыб
+            self.update_health_label()
+        if self.frames % HUD_UPDATE_FRAMES == 0:
+            # Открытые панели обновляются с той же частотой, что и сводка
+            self.refreshPanels()
+
+    def fishCount(self):
+        """Возвращает количество рыб текущего аквариума.
+
+        При модели в отдельном потоке количество берется из последнего
+        кадра, а до кадра текущего аквариума - по изображениям рыб.
+        """
+        if self.worker is None:
+            return self.aquarium.population.count
+        if self.frameShown():
+            return self.frame.count
+        return self.tank.shown
+
+    def stopOnWorkerError(self):
+        """Останавливает кадры окна и показывает ошибку потока модели.
+
+        Поток модели уже остановлен исключением (его трассировка выведена
+        в поток ошибок), поэтому кадров больше не будет.
+        """
+        self.tick_timer.stop()
+        error = self.worker.error
+        QMessageBox.critical(
+            self, "Ошибка модели",
+            f"Модель аквариума остановлена из-за ошибки:\n"
+            f"{type(error).__name__}: {error}")
+
+    def stepModel(self, dt):
+        """Продвигает модели всех аквариумов на dt мс.
+
+        Шаг записывается в журнал аквариума, если запись включена.
+        """
+        self.group.step(dt)
+        for tank in self.tanks:
+            if tank.recorder is not None:
+                tank.recorder.tick(dt)
+
+    def runCommand(self, command):
+        """Выполняет command - действие над моделью без аргументов.
+
+        При модели в отдельном потоке действие ставится в очередь команд
+        и выполняется потоком модели между шагами.
+        """
+        if self.worker is not None:
+            self.worker.post(command)
+        else:
+            command()
+
+    def takeFrame(self):
+        """Берет у потока модели последний кадр.
+
+        Возвращает True, если это новый кадр текущего аквариума и его
+        нужно перенести на сцену.
+        """
+        self.frame = self.worker.latest()
+        if self.frame is None or self.frame.sequence == self.frame_sequence:
+            return False
+        self.frame_sequence = self.frame.sequence
+        if not self.frameShown():
+            return False
+        # Рыбам, добавленным в модель после прошлого кадра, нужны
+        # изображения
+        tank = self.tank
+        for state in tank.aquarium.fishes[tank.shown:self.frame.count]:
+            self.addFishView(state)
+        return True
+
+    def renderPositions(self):
+        """Возвращает позиции рыб для отрисовки.
+
+        Позиции интерполируются между двумя последними шагами модели
+        по остатку времени игрового цикла. При модели в отдельном потоке
+        берутся позиции из последнего кадра (None - кадра текущего
+        аквариума еще нет).
+        """
+        if self.worker is not None:
+            return self.frame.positions if self.frameShown() else None
+        movement = self.aquarium.movement
+        return interpolate(self.previous_positions,
+                           movement.position[:, :movement.count],
+                           self.loop.alpha)
+
+    def panel(self, name, title, text=None):
+        """Возвращает информационную панель name.
+
+        Панель создается при первом обращении (см. panels.InfoPanel),
+        text - функция, возвращающая текст для обновления на ходу.
+        """
+        panel = self.panels.get(name)
+        if panel is None:
+            panel = InfoPanel(self, title, text)
+            self.panels[name] = panel
+        return panel
+
+    def refreshPanels(self):
+        """Обновляет текст открытых информационных панелей."""
+        for panel in self.panels.values():
+            panel.refresh()
+
+    def fishCondition(self, fish):
+        """Возвращает здоровье и голод рыбы fish.
+
+        При модели в отдельном потоке значения берутся из последнего
+        кадра (None, если рыбы в нем нет).
+        """
+        if self.worker is None:
+            return fish.health, fish.hunger
+        frame = self.frame
+        if (not self.frameShown() or fish.aquarium is not self.aquarium
+                or fish.index >= frame.count):
+            return None, None
+        return int(frame.health[fish.index]), int(frame.hunger[fish.index])
+
+    def fishInfoText(self, fish):
+        """Возвращает текст панели с информацией о рыбе fish."""
+        health, hunger = self.fishCondition(fish)
+        if health is None:
+            condition = "Состояние рыбы еще не получено"
+        else:
+            condition = (f"<b>Здоровье:</b> {health}%<br>"
+                         f"<b>Голод:</b> {hunger}%")
+        return (
             f"<b>Тип рыбы:</b> {fish.fish_type.capitalize()}<br>"
             f"<b>Описание:</b> {fish.description}<br>"
-            f"<b>Здоровье:</b> {fish.health}%<br>"
-            f"<b>Голод:</b> {fish.hunger}%"
+            f"{condition}"
         )
-        text_label = QLabel(fish_info)
-        text_label.setFont(QFont(None, 14))
-        text_label.setWordWrap(True)
-        layout = QVBoxLayout()
-        layout.addWidget(text_label)
-        ok_button = QPushButton("OK")
-        ok_button.clicked.connect(dialog.close)
-        layout.addWidget(ok_button)
-        dialog.setLayout(layout)
-        dialog.setFixedWidth(dialog.sizeHint().width())
-        dialog.exec_()
 
-    def moveFishes(self):
-        """Запускает обновление позиции для каждой рыбы."""
-        for fish in self.fishes:
-            fish.updatePosition()
+    def showFishInfo(self, fish):
+        """Показывает панель с информацией о рыбе fish из модели.
+
+        Пока панель открыта, здоровье и голод рыбы обновляются на ходу.
+        """
+        if self.recorder is not None:
+            self.runCommand(partial(self.tank.click, fish))
+        self.info_fish = fish
+        panel = self.panel("fish", "Информация о рыбе",
+                           lambda: self.fishInfoText(self.info_fish))
+        panel.showPanel(f"Информация о рыбе - {fish.fish_type.capitalize()}")
 
-    def decreaseCleanliness(self):
-        """Уменьшает уровень чистоты аквариума для каждой рыбы."""
+    def moveFishes(self):
+        """Переносит позиции рыб из модели на сцену."""
+        positions = self.renderPositions()
+        if positions is None:
+            # Слой не должен рисовать из кадра, отданного потоку модели
+            self.fish_layer.positions = None
+            return
+        if self.fish_layer.isVisible():
+            # Слой рисует рыб прямо из массивов позиций, а при модели
+            # в отдельном потоке - и из размеров и видов рыб кадра
+            if self.worker is None:
+                self.fish_layer.setArrays(positions)
+            else:
+                self.fish_layer.setArrays(positions, self.frame.extents,
+                                          self.frame.kinds)
+        if self.detail == LOD_POINTS:
+            # Элементы рыб скрыты
+            return
+        xs, ys = positions.tolist()
         for fish in self.fishes:
-            fish.aquarium_cleanliness -= 1
-            fish.aquarium_cleanliness = max(0, fish.aquarium_cleanliness)
-        self.update_water_cleanliness_label()
+            index = fish.state.index
+            fish.syncPosition(xs[index], ys[index])
+
+    def syncFood(self):
+        """Переносит позиции корма на сцену, показывает новый корм
+        и убирает исчезнувший."""
+        if self.worker is None:
+            foods = [(food, food.x, food.y) for food in self.aquarium.food]
+        elif self.frameShown():
+            foods = self.frame.food
+        else:
+            return
+        falling = set()
+        for food, x, y in foods:
+            falling.add(food)
+            food_item = self.food_items.get(food)
+            if food_item is None:
+                # Берем из пула уже добавленный на сцену элемент корма
+                food_item = self.food_pool.acquire()
+                food_item.show()
+                self.food_items[food] = food_item
+            food_item.setPos(x, y)
+        for food in [food for food in self.food_items
+                     if food not in falling]:
+            self.food_pool.release(self.food_items.pop(food))
 
     def update_water_cleanliness_label(self):
-        """Обновляет текстовое значение метки для чистоты воды."""
-        return
+        """Обновляет текстовое значение метки для чистоты воды.
 
-    def decreaseWaterCleanliness(self):
-        """Уменьшает уровень чистоты воды для каждой рыбы."""
-        for fish in self.fishes:
-            fish.water_cleanliness -= 1
-            fish.water_cleanliness = max(0, fish.water_cleanliness)
-        self.update_water_cleanliness_label()
+        При включенных замерах метка показывает самые затратные функции.
+        """
+        if (self.profiler is not None
+                and self.water_cleanliness_label.isVisible()):
+            self.water_cleanliness_label.setText(
+                "\n".join(self.profiler.latency_lines(5)))
 
     def feedFish(self):
         """Создает объекты еды и запускает их анимацию."""
         if not self.feed_timer.isActive():
-            x_values = [200, 450, 700, 900, 1100]  # Координаты X для еды
-            y_values = [1, 1, 1, 1, 1]  # Координаты Y для еды
-
-            for x, y in zip(x_values, y_values):
-                food_image_path = os.path.join(
-                    self.current_directory, "assets", "food.gif")
-                food_pixmap = QPixmap(food_image_path)
-                create_food_item(self.scene,
-                                 food_pixmap, duration=5000, x=x, y=y)
-
-            # Обновляем состояние рыб после кормления
-            for fish in self.fishes:
-                fish.feedFish()
+            self.runCommand(self.tank.feed)
+            # Корм появляется на сцене вместе с позициями из модели
+            self.syncFood()
+
+            # Рыбы сами находят корм и съедают его в модели аквариума,
+            # поэтому здесь обновляются только метки
             self.update_health_label()
             self.update_status_label()
             QApplication.processEvents()
@@ -510,6 +1064,15 @@ class MyWindow(QMainWindow):
         layout.addWidget(self.button3)
         layout.addWidget(self.rules_button)
         layout.addWidget(self.state_button)
+        buttons = [self.button1, self.button2, self.button3,
+                   self.rules_button, self.state_button]
+        if len(self.tanks) > 1:
+            # Кнопка переключения аквариумов нужна, только если их много
+            self.tank_button = QPushButton(self.tankTitle(), self)
+            self.tank_button.clicked.connect(self.nextTank)
+            layout.addWidget(self.tank_button)
+            buttons.append(self.tank_button)
+        self.buttons = buttons  # Кнопки в порядке расположения
 
         # Создание виджета для кнопок
         self.button_widget = QWidget(self)
@@ -547,18 +1110,11 @@ class MyWindow(QMainWindow):
                                                   stop: 1 #00347a);
             }
         """
-        self.button1.setStyleSheet(button_style)
-        self.button2.setStyleSheet(button_style)
-        self.button3.setStyleSheet(button_style)
-        self.rules_button.setStyleSheet(button_style)
-        self.state_button.setStyleSheet(button_style)
-
-        # Установка высоты кнопок
-        self.button1.setFixedHeight(button_height)
-        self.button2.setFixedHeight(button_height)
-        self.button3.setFixedHeight(button_height)
-        self.rules_button.setFixedHeight(button_height)
-        self.state_button.setFixedHeight(button_height)
+        # Стиль задается один раз для виджета и действует на все кнопки
+        self.button_widget.setStyleSheet(button_style)
+        for button in buttons:
+            # Установка высоты кнопок
+            button.setFixedHeight(button_height)
 
         self.button_widget.installEventFilter(self)
 
@@ -569,75 +1125,63 @@ class MyWindow(QMainWindow):
 
     def clearAquarium(self):
         """Очищает аквариум, показывая анимацию и обновляя состояние."""
+        if self.clean_water_image_item is None:
+            # Добавление изображения для очистки воды
+            # Берем масштабированное изображение из кэша
+            clean_pixmap = self.sprite_cache.get("clean.gif", 750, 750)
+            # Создаем объект изображения
+            self.clean_water_image_item = QGraphicsPixmapItem(clean_pixmap)
+            # Устанавливаем позицию
+            self.clean_water_image_item.setPos(350, 100)
+            # Добавляем изображение на сцену
+            self.scene.addItem(self.clean_water_image_item)
         self.clean_water_image_item.show()
-        QTimer.singleShot(2000, self.hideCleanWater)
+        # Изображение скрывается в том аквариуме, где началась очистка,
+        # даже если к этому времени показан другой
+        QTimer.singleShot(2000, partial(self.hideCleanWater, self.tank))
 
-        for fish in self.fishes:
-            fish.aquarium_cleanliness = AQUARIUM_CLEAN
+        self.runCommand(self.tank.clean)
         QApplication.processEvents()
 
-    def hideCleanWater(self):
-        """Скрывает изображение чистой воды."""
-        self.clean_water_image_item.hide()
+    def hideCleanWater(self, tank):
+        """Скрывает изображение чистой воды в аквариуме tank."""
+        if tank.clean_water_image_item is not None:
+            tank.clean_water_image_item.hide()
 
     def changeWater(self):
         """Меняет воду в аквариуме, показывая анимацию и обновляя состояние."""
-        if self.water_item:
-            self.scene.removeItem(self.water_item)
+        self.hideWater(self.tank, self.water_item)
 
-        water_image_path = os.path.join(
-            self.current_directory, "assets", "water.gif")
-        water_pixmap = QPixmap(water_image_path)
-        water_item = QGraphicsPixmapItem(water_pixmap)
+        water_item = self.overlay_pool.acquire()
+        water_item.setPixmap(self.sprite_cache.get(
+            "water.gif", self.width(), self.height()))
         water_item.setPos(0, 0)
-        water_item.setZValue(-1)
-        water_item.setTransformationMode(Qt.SmoothTransformation)
-        water_item.setPixmap(water_pixmap.scaled(
-            self.width(), self.height()))
-        self.scene.addItem(water_item)
+        water_item.show()
         self.water_item = water_item
 
         # Обновляем состояние рыб после смены воды
-        for fish in self.fishes:
-            fish.water_cleanliness = 100
+        self.runCommand(self.tank.changeWater)
 
-        QTimer.singleShot(5000, lambda: self.scene.removeItem(water_item))
+        # Изображение возвращается в пул аквариума, где менялась вода,
+        # даже если к этому времени показан другой
+        QTimer.singleShot(5000, partial(self.hideWater, self.tank,
+                                        water_item))
 
-    def startWaterChange(self):
-        """Запускает таймер для уменьшения чистоты воды."""
-        self.update_water_cleanliness_label()
-        self.water_change_timer = QTimer()
-        self.water_change_timer.timeout.connect(
-            self.decreaseWaterCleanliness)
-        self.water_change_timer.start(TIMER_CLEAN_WATER)
+    def hideWater(self, tank, water_item):
+        """Возвращает изображение воды аквариума tank в пул, если оно еще
+        показано."""
+        if water_item is not None and water_item is tank.water_item:
+            tank.overlay_pool.release(water_item)
+            tank.water_item = None
 
     def showRulesInfo(self):
-        """Показывает диалоговое окно с правилами игры."""
-        current_directory = os.path.dirname(os.path.abspath(__file__))
-        instructions_file_path = os.path.join(
-            current_directory, "assets", "game_instructions.txt")
-        with open(instructions_file_path, "r", encoding="utf-8") as file:
-            game_instructions = file.read()
-
-        dialog = QDialog(self)
-        dialog.setWindowTitle("Правила")
-
-        # Устанавливаем стиль шрифта для текста
-        font = QFont(None, 14)
-
-        # Устанавливаем текст с переносом строк
-        text_label = QLabel(game_instructions.replace("\\n", "\n"))
-        text_label.setFont(font)
-        text_label.setWordWrap(True)
-        layout = QVBoxLayout()
-        layout.addWidget(text_label)
-
-        ok_button = QPushButton("OK")
-        ok_button.clicked.connect(dialog.close)
-        layout.addWidget(ok_button)
-
-        dialog.setLayout(layout)
-        dialog.exec_()
+        """Показывает панель с правилами игры."""
+        panel = self.panel("rules", "Правила")
+        if not panel.label.text():
+            # Правила не меняются, поэтому читаются при первом показе
+            game_instructions = self.assets.text("game_instructions.txt")
+            panel.setText(game_instructions.replace("\\n", "\n"))
+        panel.showPanel()
 
     def showClearLabel(self):
         """Скрывает текущую метку."""
@@ -659,12 +1203,15 @@ class MyWindow(QMainWindow):
         """Обрабатывает событие изменения размера окна, масштабируя фон."""
         super().resizeEvent(event)
 
-        if self.scene.backgroundBrush().texture():
+        if self.background_brush.texture():
             scaled_pixmap = self.background_pixmap.scaled(
                 self.width(), self.height(),
                 Qt.KeepAspectRatioByExpanding
             )
-            self.scene.setBackgroundBrush(QBrush(scaled_pixmap))
+            # Масштабированный фон общий для сцен всех аквариумов
+            self.background_brush = QBrush(scaled_pixmap)
+            for tank in self.tanks:
+                tank.scene.setBackgroundBrush(self.background_brush)
 
         # Обновляем положение виджета с кнопками
         self.button_widget.setGeometry(
@@ -677,54 +1224,92 @@ class MyWindow(QMainWindow):
         в соответствии с размером фона."""
         bg_rect = self.background_pixmap.rect()
         bg_scene_rect = self.view.mapToScene(bg_rect).boundingRect()
-        for fish in self.fishes:
-            fish.scene_width = bg_scene_rect.width()
-            fish.scene_height = bg_scene_rect.height()
+        # Сцены аквариумов одинаковы, поэтому границы общие
+        for tank in self.tanks:
+            self.runCommand(partial(tank.resize, bg_scene_rect.width(),
+                                    bg_scene_rect.height()))
+            tank.fish_layer.setBounds(bg_scene_rect.width(),
+                                      bg_scene_rect.height())
+
+    def aquariumStateText(self):
+        """Возвращает текст панели состояния текущего аквариума."""
+        summary = self.tankSummary()
+        if summary is None:
+            return "Состояние аквариума еще не получено"
+        hunger_buckets = ", ".join(
+            f"{start}-{start + STATS_BUCKET - 1}%: {number}"
+            for start, number in summary["hunger_buckets"].items())
+        return (
+            f"Уровень чистоты воды: {summary['water_cleanliness']}%\n"
+            f"Уровень чистоты аквариума: "
+            f"{summary['aquarium_cleanliness']}%\n"
+            f"Рыб: {summary['fish']}\n"
+            f"Здоровье: в среднем {summary['health_mean']:.0f}%, "
+            f"от {summary['health_min']}% до {summary['health_max']}%\n"
+            f"Голод: в среднем {summary['hunger_mean']:.0f}%, "
+            f"голодают {summary['starving']}, "
+            f"без здоровья {summary['dead']}\n"
+            f"Распределение голода: {hunger_buckets or 'нет рыб'}")
 
     def showAquariumState(self):
-        """Показывает диалоговое окно с информацией о состоянии аквариума."""
-        dialog = QDialog(self)
-        dialog.setWindowTitle("Состояние аквариума")
-
-        layout = QVBoxLayout()
-
-        # Вычисляем уровень чистоты воды
-        total_water_cleanliness = sum(
-            fish.water_cleanliness for fish in self.fishes) // len(
-                self.fishes)
-
-        # Создаем метку для уровня чистоты воды
-        water_cleanliness_label = QLabel()
-        water_cleanliness_label.setText(
-            f"Уровень чистоты воды: {total_water_cleanliness}%")
-        water_cleanliness_label.setFont(QFont(None, 14))
-        layout.addWidget(water_cleanliness_label)
-
-        # Вычисляем уровень чистоты аквариума
-        total_cleanliness = sum(
-            fish.aquarium_cleanliness for fish in self.fishes) // len(
-                self.fishes)
-
-        # Создаем метку для уровня чистоты аквариума
-        cleanliness_label = QLabel(
-            f"Уровень чистоты аквариума: {total_cleanliness}%")
-        cleanliness_label.setFont(QFont(None, 14))
-        layout.addWidget(cleanliness_label)
-
-        ok_button = QPushButton("OK", dialog)
-        ok_button.clicked.connect(dialog.close)
-        layout.addWidget(ok_button)
-
-        dialog.setLayout(layout)
-        dialog.exec_()
+        """Показывает панель с состоянием аквариума.
+
+        Пока панель открыта, состояние обновляется на ходу.
+        """
+        self.panel("state", "Состояние аквариума",
+                   self.aquariumStateText).showPanel()
+
+    def keyPressEvent(self, event):
+        """Переключает наложение замеров, сбрасывает их и переключает
+        аквариумы."""
+        if self.profiler is not None and event.key() == Qt.Key_F3:
+            for label in (self.health_label, self.water_cleanliness_label):
+                label.setVisible(not label.isVisible())
+        elif self.profiler is not None and event.key() == Qt.Key_F4:
+            self.profiler.reset()
+        elif Qt.Key_1 <= event.key() < Qt.Key_1 + len(self.tanks):
+            # Клавиши 1-9 показывают аквариум с этим номером
+            self.switchTank(event.key() - Qt.Key_1)
+        else:
+            super().keyPressEvent(event)
+
+    def closeEvent(self, event):
+        """Записывает замеры, последний снимок и журнал при закрытии."""
+        if self.worker is not None:
+            # Модель останавливается первой, чтобы снимок и журнал
+            # записывались из остановленной модели
+            self.worker.close()
+        if self.profiler is not None and self.profile_output:
+            self.profiler.export(self.profile_output)
+        if self.autosaver is not None:
+            self.autosaver.close(self.group[0])
+        for tank in self.tanks:
+            if tank.recorder is not None:
+                tank.recorder.close()
+        if self.metrics_csv is not None:
+            self.metrics_csv.close()
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+        super().closeEvent(event)
 
     def eventFilter(self, obj, event):
         """Фильтрация событий для обработки нажатий на кнопки."""
+        if ((self.measure_paint or self.first_paint_pending)
+                and event.type() == QEvent.Paint
+                and obj is self.view.viewport()):
+            # Отрисовку выполняем сами, чтобы замерить ее целиком
+            start = time.perf_counter()
+            self.view.viewportEvent(event)
+            self.paint_ms = (time.perf_counter() - start) * 1000
+            if self.profiler is not None:
+                self.profiler.record("paint", self.paint_ms)
+            if self.first_paint_pending:
+                self.firstPaint()
+            return True
         if (obj == self.button_widget
                 and event.type() == QEvent.MouseButtonPress):
             mouse_pos = event.pos()
-            for button in [self.button1, self.button2, self.button3,
-                           self.rules_button, self.state_button]:
+            for button in self.buttons:
                 if button.geometry().contains(mouse_pos):
                     button.click()
                     return True
@@ -733,10 +1318,79 @@ class MyWindow(QMainWindow):
 
 def main():
     """Точка входа в приложение."""
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Эмулятор аквариума")
+    parser.add_argument(
+        "--render-mode", choices=sorted(RENDER_MODES), default=RENDER_FULL,
+        help="режим перерисовки сцены (по умолчанию full)")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="замерять горячие участки и показывать их поверх сцены")
+    parser.add_argument(
+        "--profile-output", default=None, metavar="ФАЙЛ",
+        help="записать замеры в JSON-файл при закрытии окна")
+    parser.add_argument(
+        "--snapshot", default=None, metavar="ФАЙЛ",
+        help="восстановить аквариум из снимка и периодически сохранять его")
+    parser.add_argument(
+        "--record", default=None, metavar="ФАЙЛ",
+        help="записывать кадры и действия в журнал для воспроизведения")
+    parser.add_argument(
+        "--detail", choices=(LOD_AUTO,) + LOD_LEVELS, default=LOD_AUTO,
+        help="детализация рыб (по умолчанию auto - по времени кадра)")
+    parser.add_argument(
+        "--fish-renderer", choices=RENDERERS, default=RENDERER_ITEMS,
+        help="items - элемент сцены на каждую рыбу, "
+             "batched - все рыбы одним элементом")
+    parser.add_argument(
+        "--metrics-csv", default=None, metavar="ФАЙЛ",
+        help="дописывать поминутные показатели аквариума в CSV-файл")
+    parser.add_argument(
+        "--metrics-port", type=int, nargs="?", const=METRICS_PORT,
+        default=None, metavar="ПОРТ",
+        help="отдавать показатели в формате Prometheus на localhost "
+             f"(по умолчанию порт {METRICS_PORT})")
+    parser.add_argument(
+        "--species", default=None, metavar="ФАЙЛ",
+        help="файл описания видов рыб и их численности "
+             f"(по умолчанию assets/{species_config.SPECIES_FILE})")
+    parser.add_argument(
+        "--tanks", type=int, choices=range(1, MAX_TANKS + 1), default=1,
+        metavar="N",
+        help=f"количество аквариумов в окне, от 1 до {MAX_TANKS}; "
+             "переключаются кнопкой или клавишами 1-9")
+    parser.add_argument(
+        "--startup-profile", action="store_true",
+        help="напечатать длительность этапов запуска до первого кадра")
+    parser.add_argument(
+        "--simulation-thread", action="store_true",
+        help="продвигать модель в отдельном потоке, а окну оставить "
+             "только отрисовку")
+    # Остальные аргументы командной строки передаются в Qt
+    args, qt_args = parser.parse_known_args()
+    startup = StartupProfile() if args.startup_profile else None
+    if startup is not None:
+        startup.mark("import")
+
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setFont(QFont("Arial", 12))
-    window = MyWindow()
+    if startup is not None:
+        startup.mark("qt")
+    window = MyWindow(render_mode=args.render_mode,
+                      profile=args.profile or bool(args.profile_output),
+                      profile_output=args.profile_output,
+                      snapshot_path=args.snapshot,
+                      record_path=args.record,
+                      detail=args.detail,
+                      renderer=args.fish_renderer,
+                      metrics_csv=args.metrics_csv,
+                      metrics_port=args.metrics_port,
+                      tanks=args.tanks,
+                      species_path=args.species,
+                      startup=startup,
+                      threaded=args.simulation_thread)
     window.show()
+    if startup is not None:
+        startup.mark("show")
     sys.exit(app.exec_())
 
 
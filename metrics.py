@@ -0,0 +1,235 @@
+"""Временные ряды показателей аквариума в кольцевых буферах.
+
+Показатели (численность рыб, среднее здоровье и голод, чистота воды и
+аквариума, время кадра) записываются на каждом кадре. Ряд хранится в
+нескольких ступенях: последние кадры как есть и средние за секунду, за
+минуту и за час. Каждая ступень - кольцевой буфер фиксированной емкости,
+поэтому память не растет даже за недели работы.
+
+Ряд можно выгружать:
+
+* в CSV-файл: завершенные строки выбранной ступени дописываются в файл
+  фоновым потоком, так что кадр не ждет диска;
+* по HTTP на localhost в текстовом формате Prometheus (/metrics).
+
+Время ряда - модельное время аквариума в миллисекундах. Модуль не
+зависит от Qt.
+"""
+
+import csv
+import os
+import queue
+import threading
+
+import numpy as np
+
+# Имена показателей в порядке столбцов
+METRIC_NAMES = ("fish", "health_mean", "hunger_mean", "water_cleanliness",
+                "aquarium_cleanliness", "frame_ms")
+# Ступени ряда: имя, длительность интервала (мс, None - каждый кадр)
+# и емкость буфера. Вместе они покрывают минуту кадров, час по секундам,
+# сутки по минутам и месяц по часам
+METRIC_TIERS = (
+    ("frame", None, 3600),
+    ("second", 1000, 3600),
+    ("minute", 60 * 1000, 24 * 60),
+    ("hour", 60 * 60 * 1000, 30 * 24),
+)
+# Ступень, строки которой выгружаются в CSV
+METRICS_CSV_TIER = "minute"
+# Порт HTTP-выгрузки по умолчанию
+METRICS_PORT = 9464
+# Префикс имен показателей в формате Prometheus
+METRICS_PREFIX = "aquarium_"
+
+
+class RingBuffer:
+    """Кольцевой буфер строк показателей с отметками времени."""
+
+    def __init__(self, capacity, width):
+        """Создает буфер на capacity строк по width значений."""
+        self.times = np.zeros(capacity)  # Отметки времени строк
+        self.values = np.zeros((capacity, width))  # Значения строк
+        self.appended = 0  # Количество добавленных строк за все время
+
+    def __len__(self):
+        """Возвращает количество хранимых строк."""
+        return min(self.appended, len(self.times))
+
+    def append(self, time, values):
+        """Добавляет строку, вытесняя самую старую при заполнении."""
+        index = self.appended % len(self.times)
+        self.times[index] = time
+        self.values[index] = values
+        self.appended += 1
+
+    def last(self, count):
+        """Возвращает последние count строк по порядку времени."""
+        count = min(count, len(self))
+        capacity = len(self.times)
+        order = np.arange(self.appended - count, self.appended) % capacity
+        return self.times[order], self.values[order]
+
+
+class Tier:
+    """Ступень ряда: средние значения за интервалы одной длительности."""
+
+    def __init__(self, name, interval, capacity, width):
+        """Создает ступень с интервалом interval мс."""
+        self.name = name  # Имя ступени
+        self.interval = interval  # Длительность интервала (мс)
+        self.buffer = RingBuffer(capacity, width)  # Завершенные интервалы
+        self.start = None  # Начало текущего интервала
+        self.sums = np.zeros(width)  # Суммы значений текущего интервала
+        self.samples = 0  # Количество значений в текущем интервале
+
+    def add(self, time, values):
+        """Учитывает значения в момент time."""
+        if self.interval is None:
+            self.buffer.append(time, values)
+            return
+        start = time // self.interval * self.interval
+        if self.start is not None and start != self.start:
+            # Интервал завершен: сохраняем его среднее
+            self.buffer.append(self.start, self.sums / self.samples)
+            self.sums[:] = 0
+            self.samples = 0
+        self.start = start
+        self.sums += values
+        self.samples += 1
+
+
+class TimeSeries:
+    """Ряд показателей со ступенями прореживания."""
+
+    def __init__(self, names=METRIC_NAMES, tiers=METRIC_TIERS):
+        """Создает пустой ряд показателей names."""
+        self.names = names  # Имена показателей
+        self.tiers = {name: Tier(name, interval, capacity, len(names))
+                      for name, interval, capacity in tiers}
+        # Последние значения; словарь заменяется целиком, поэтому его
+        # можно читать из другого потока
+        self.latest = {}
+
+    def record(self, time, values):
+        """Записывает значения показателей в момент time (мс)."""
+        values = np.asarray(values, dtype=float)
+        for tier in self.tiers.values():
+            tier.add(time, values)
+        self.latest = dict(zip(self.names, values.tolist()))
+
+
+def aquarium_metrics(aquarium, frame_ms=0.0):
+    """Возвращает показатели аквариума в порядке METRIC_NAMES.
+
+    Показатели рыб берутся из сводной статистики, без перебора рыб.
+    """
+    stats = aquarium.stats
+    return (stats.health.count, stats.health.mean, stats.hunger.mean,
+            aquarium.water_cleanliness, aquarium.aquarium_cleanliness,
+            frame_ms)
+
+
+class CsvExport:
+    """Дописывание завершенных строк ступени ряда в CSV-файл.
+
+    Строки собираются в вызывающем потоке, а в файл их записывает
+    фоновый поток.
+    """
+
+    def __init__(self, path, series, tier=METRICS_CSV_TIER):
+        """Создает выгрузку ступени tier ряда series в файл path."""
+        self.path = path  # Файл выгрузки
+        self.series = series  # Выгружаемый ряд
+        self.tier = series.tiers[tier]  # Выгружаемая ступень
+        self.flushed = self.tier.buffer.appended  # Уже выгруженные строки
+        self.error = None  # Последняя ошибка записи
+        self.pending = queue.Queue()  # Строки, ожидающие записи
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def poll(self):
+        """Передает потоку записи новые завершенные строки ступени."""
+        buffer = self.tier.buffer
+        fresh = buffer.appended - self.flushed
+        if fresh <= 0:
+            return
+        # Строки, вытесненные из буфера до выгрузки, потеряны
+        times, values = buffer.last(fresh)
+        self.flushed = buffer.appended
+        self.pending.put([[time] + row
+                          for time, row in zip(times.tolist(),
+                                               values.tolist())])
+
+    def _run(self):
+        """Записывает строки из очереди, пока не придет None."""
+        while True:
+            rows = self.pending.get()
+            if rows is None:
+                return
+            try:
+                header = not os.path.exists(self.path)
+                with open(self.path, "a", newline="",
+                          encoding="utf-8") as file:
+                    writer = csv.writer(file)
+                    if header:
+                        writer.writerow(("time_ms",) + self.series.names)
+                    writer.writerows(rows)
+            except OSError as error:
+                self.error = error
+
+    def close(self):
+        """Выгружает оставшиеся строки и останавливает поток."""
+        self.poll()
+        self.pending.put(None)
+        self.thread.join()
+
+
+def prometheus_text(series):
+    """Возвращает последние значения ряда в текстовом формате Prometheus."""
+    lines = []
+    for name, value in series.latest.items():
+        lines.append(f"# TYPE {METRICS_PREFIX}{name} gauge")
+        lines.append(f"{METRICS_PREFIX}{name} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """HTTP-сервер на localhost, отдающий показатели по адресу /metrics."""
+
+    def __init__(self, series, port=METRICS_PORT, host="127.0.0.1"):
+        """Запускает сервер показателей ряда series в фоновом потоке."""
+        # Модуль HTTP-сервера заметно замедляет запуск, поэтому
+        # импортируется, только когда сервер действительно нужен
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.series = series  # Отдаваемый ряд
+
+        class Handler(BaseHTTPRequestHandler):
+            """Обработчик запросов к серверу показателей."""
+
+            def do_GET(self):
+                """Отдает показатели по адресу /metrics."""
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text(series).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                """Не засоряет вывод приложения журналом запросов."""
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]  # Фактический порт
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """Останавливает сервер."""
+        self.server.shutdown()
+        self.server.server_close()
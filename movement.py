@@ -0,0 +1,177 @@
+"""Векторизованное движение рыб на NumPy.
+
+Позиции, направления и размеры изображений всех рыб хранятся в непрерывных
+массивах формы (2, N): строка 0 относится к оси X, строка 1 - к оси Y.
+Шаг движения с отражением от стенок выполняется для всех рыб и обеих осей
+одной пакетной операцией, без цикла на Python.
+"""
+
+import numpy as np
+
+# Начальная емкость массивов движка
+INITIAL_CAPACITY = 16
+# Насколько рыба должна выйти за стенку, чтобы от нее отразиться (пиксели).
+# Рыба, вышедшая за стенку меньше, ставится на стенку без разворота: иначе
+# рыба, попадающая на стенку ровно (граница кратна скорости), отражалась бы
+# или нет в зависимости от ошибок округления накопленной суммы шагов
+WALL_TOLERANCE = 1e-6
+
+
+class MovementEngine:
+    """Хранилище позиций рыб и пакетный шаг их движения."""
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        """Создает пустой движок с заданной начальной емкостью."""
+        self.count = 0  # Количество рыб в движке
+        # Координаты рыб
+        self.position = np.zeros((2, capacity))
+        # Направления движения по осям (1 или -1)
+        self.direction = np.ones((2, capacity), dtype=np.int8)
+        # Размеры изображений рыб (ширина и высота)
+        self.extent = np.zeros((2, capacity))
+
+    # Отдельные оси как представления общих массивов
+    x = property(lambda self: self.position[0])
+    y = property(lambda self: self.position[1])
+    direction_x = property(lambda self: self.direction[0])
+    direction_y = property(lambda self: self.direction[1])
+    width = property(lambda self: self.extent[0])
+    height = property(lambda self: self.extent[1])
+
+    def _grow(self, needed=None):
+        """Увеличивает емкость массивов хотя бы до needed рыб.
+
+        Без needed емкость удваивается.
+        """
+        capacity = self.position.shape[1] * 2
+        while needed is not None and capacity < needed:
+            capacity *= 2
+        for name, fill in (("position", 0), ("direction", 1),
+                           ("extent", 0)):
+            old = getattr(self, name)
+            new = np.full((2, capacity), fill, dtype=old.dtype)
+            new[:, :self.count] = old[:, :self.count]
+            setattr(self, name, new)
+
+    def add(self, x, y, width=0, height=0):
+        """Добавляет рыбу и возвращает ее индекс в массивах."""
+        if self.count == self.position.shape[1]:
+            self._grow()
+        index = self.count
+        self.position[:, index] = (x, y)
+        self.direction[:, index] = 1
+        self.extent[:, index] = (width, height)
+        self.count += 1
+        return index
+
+    def add_many(self, xs, ys, width=0, height=0):
+        """Добавляет рыб с координатами xs, ys и возвращает индекс первой."""
+        count = len(xs)
+        if self.count + count > self.position.shape[1]:
+            self._grow(self.count + count)
+        start = self.count
+        end = start + count
+        self.position[0, start:end] = xs
+        self.position[1, start:end] = ys
+        self.direction[:, start:end] = 1
+        self.extent[0, start:end] = width
+        self.extent[1, start:end] = height
+        self.count = end
+        return start
+
+    def step(self, speed, scene_width, scene_height):
+        """Сдвигает всех рыб на один шаг и отражает их от границ сцены.
+
+        speed - скорость всех рыб или массив скоростей по рыбам.
+        """
+        n = self.count
+        if n == 0:
+            return
+        # Направления хранятся в int8, поэтому сдвиг считается в float:
+        # целая скорость иначе переполнила бы int8
+        speed = np.asarray(speed, dtype=np.float64)
+        position = self.position[:, :n]
+        direction = self.direction[:, :n]
+        position += direction * speed
+
+        # Правая и нижняя границы зависят от размера изображения рыбы
+        upper = np.array([[scene_width], [scene_height]]) - self.extent[:, :n]
+        low = position < 0
+        # Как и в исходной логике, левая (верхняя) граница проверяется первой
+        high = (position > upper) & ~low
+        # Разворачиваются только рыбы, вышедшие за стенку дальше допуска
+        turn = ((low & (position < -WALL_TOLERANCE))
+                | (high & (position > upper + WALL_TOLERANCE)))
+
+        # Прижимаем вышедших рыб к границе и разворачиваем их
+        np.copyto(position, 0, where=low)
+        np.copyto(position, upper, where=high)
+        np.negative(direction, out=direction, where=turn)
+
+    def advance(self, ticks, speed, scene_width, scene_height):
+        """Сдвигает всех рыб сразу на ticks шагов.
+
+        Результат совпадает с ticks вызовами step() с точностью до ошибок
+        округления (меньше WALL_TOLERANCE), но считается по формуле:
+        после первого отражения рыба ходит между стенками с периодом
+        2 * (floor((граница + WALL_TOLERANCE) / скорость) + 1) шагов.
+        Число шагов до отражения считается с тем же допуском, что и в
+        step(), поэтому рыбы, попадающие на стенку ровно, отражаются
+        на том же шаге.
+        """
+        n = self.count
+        if n == 0 or ticks <= 0:
+            return
+        speed = np.asarray(speed, dtype=np.float64)
+        upper = np.array([[scene_width], [scene_height]]) - self.extent[:, :n]
+        # Если рыба не помещается в сцену, считаем честно по шагам
+        if ticks == 1 or (upper < speed).any():
+            for _ in range(ticks):
+                self.step(speed, scene_width, scene_height)
+            return
+
+        position = self.position[:, :n]
+        direction = self.direction[:, :n]
+        # Рыбы за пределами сцены сначала прижимаются к ней обычным шагом
+        if (position < 0).any() or (position > upper).any():
+            self.step(speed, scene_width, scene_height)
+            self.advance(ticks - 1, speed, scene_width, scene_height)
+            return
+        forward = direction > 0
+        # Номер шага, на котором рыба впервые отразится от стенки
+        first = np.floor((np.where(forward, upper - position, position)
+                          + WALL_TOLERANCE) / speed) + 1
+        np.maximum(first, 1, out=first)
+        if (ticks < first).all():
+            # Ни одна рыба не дошла до стенки: все движутся по прямой
+            position += direction * (speed * ticks)
+            np.maximum(position, 0, out=position)
+            np.minimum(position, upper, out=position)
+            return
+        # Шагов от одной стенки до другой и полный период движения
+        half = np.floor((upper + WALL_TOLERANCE) / speed) + 1
+
+        # Рыбы, не дошедшие до стенки, просто движутся по прямой
+        free = ticks < first
+        straight = position + direction * (speed * ticks)
+
+        # Остальные: фаза внутри периода, отсчитанная от первой стенки
+        phase = np.mod(ticks - first, 2 * half)
+        back = phase < half
+        # Первая стенка: верхняя для плывущих вперед, иначе нулевая.
+        # В первой половине периода рыба плывет от первой стенки,
+        # во второй - от противоположной обратно к первой
+        bounced = np.where(
+            back,
+            upper * forward - direction * (phase * speed),
+            upper * ~forward + direction * ((phase - half) * speed))
+        bounced_direction = np.where(back, -direction, direction)
+        # Попадание ровно на вторую стенку прижимает рыбу к ней
+        np.maximum(bounced, 0, out=bounced)
+        np.minimum(bounced, upper, out=bounced)
+
+        position[...] = np.where(free, straight, bounced)
+        # Рыба, дошедшая до стенки в пределах допуска, стоит на стенке
+        np.maximum(position, 0, out=position)
+        np.minimum(position, upper, out=position)
+        direction[...] = np.where(free, direction, bounced_direction)
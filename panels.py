@@ -0,0 +1,65 @@
+"""Немодальные информационные панели окна.
+
+Панель создается при первом показе и затем переиспользуется: при
+повторном открытии и при обновлении на ходу меняется только текст ее
+метки. Панель не запускает вложенный цикл событий (exec_), поэтому таймер
+модели продолжает срабатывать вовремя, пока панель открыта.
+"""
+
+from PyQt5.QtWidgets import QDialog, QLabel, QPushButton, QVBoxLayout
+from PyQt5.QtGui import QFont
+
+
+class InfoPanel(QDialog):
+    """Немодальная панель с текстом и кнопкой OK."""
+
+    def __init__(self, parent, title, text=None):
+        """Создает скрытую панель с заголовком title.
+
+        text - функция без аргументов, возвращающая текст панели; по ней
+        панель обновляется на ходу (None - текст задается только явно).
+        """
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.setModal(False)
+        self.source = text  # Источник текста для обновления на ходу
+        # Метка с текстом панели
+        self.label = QLabel()
+        self.label.setFont(QFont(None, 14))
+        self.label.setWordWrap(True)
+        layout = QVBoxLayout()
+        layout.addWidget(self.label)
+        ok_button = QPushButton("OK")
+        # Закрытая панель только скрывается и остается для повторного показа
+        ok_button.clicked.connect(self.hide)
+        layout.addWidget(ok_button)
+        self.setLayout(layout)
+
+    def setText(self, text):
+        """Меняет текст панели, если он изменился."""
+        if text != self.label.text():
+            self.label.setText(text)
+
+    def showPanel(self, title=None, text=None):
+        """Показывает панель поверх окна.
+
+        title и text заменяют заголовок и текст; без text панель берет
+        текст из своего источника.
+        """
+        if title is not None:
+            self.setWindowTitle(title)
+        if text is None and self.source is not None:
+            text = self.source()
+        if text is not None:
+            self.setText(text)
+        # Размер подбирается под текст только при открытии, чтобы
+        # панель не меняла размер при обновлении на ходу
+        self.adjustSize()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+    def refresh(self):
+        """Обновляет текст открытой панели из ее источника."""
+        if self.source is not None and self.isVisible():
+            self.setText(self.source())
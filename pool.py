@@ -0,0 +1,71 @@
+"""Пул повторно используемых элементов сцены.
+
+Гранулы корма и накладываемые изображения появляются и исчезают много
+раз за сеанс. Вместо создания и удаления объектов Qt освободившийся
+элемент скрывается и ждет в пуле следующего использования. Модуль не
+зависит от Qt: создание, сброс и удаление элементов выполняют функции,
+переданные пулу.
+"""
+
+# Емкость пула по умолчанию
+POOL_CAPACITY = 32
+
+
+class ItemPool:
+    """Пул элементов с ограниченным числом свободных элементов."""
+
+    def __init__(self, factory, reset=None, dispose=None,
+                 capacity=POOL_CAPACITY):
+        """Создает пустой пул.
+
+        factory создает новый элемент, reset готовит освобожденный элемент
+        к хранению (например, скрывает его), а dispose удаляет элемент,
+        не поместившийся в пул. capacity - наибольшее число свободных
+        элементов в пуле.
+        """
+        self.factory = factory  # Создание нового элемента
+        self.reset = reset  # Сброс освобожденного элемента
+        self.dispose = dispose  # Удаление лишнего элемента
+        self.capacity = capacity  # Наибольшее число свободных элементов
+        self.free = []  # Свободные элементы
+        self.in_use = 0  # Количество выданных элементов
+        self.peak = 0  # Наибольшее число одновременно выданных элементов
+        self.created = 0  # Количество созданных элементов
+        self.reused = 0  # Количество выдач из пула
+        self.discarded = 0  # Количество удаленных лишних элементов
+
+    def acquire(self):
+        """Возвращает свободный элемент, создавая его при необходимости."""
+        if self.free:
+            item = self.free.pop()
+            self.reused += 1
+        else:
+            item = self.factory()
+            self.created += 1
+        self.in_use += 1
+        self.peak = max(self.peak, self.in_use)
+        return item
+
+    def release(self, item):
+        """Возвращает элемент в пул или удаляет его, если пул полон."""
+        self.in_use -= 1
+        if len(self.free) < self.capacity:
+            if self.reset is not None:
+                self.reset(item)
+            self.free.append(item)
+        else:
+            self.discarded += 1
+            if self.dispose is not None:
+                self.dispose(item)
+
+    def stats(self):
+        """Возвращает статистику пула в виде словаря."""
+        return {
+            "capacity": self.capacity,
+            "free": len(self.free),
+            "in_use": self.in_use,
+            "peak": self.peak,
+            "created": self.created,
+            "reused": self.reused,
+            "discarded": self.discarded,
+        }
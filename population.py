@@ -0,0 +1,121 @@
+"""Компактное хранение состояния рыб.
+
+Данные вида (название, описание, изображение, скорость и темпы голода)
+хранятся один раз на вид, а числовое состояние каждой рыбы (здоровье,
+голод, вид) - в типизированных массивах NumPy. Так аквариум с десятками
+тысяч рыб занимает немного памяти.
+"""
+
+import numpy as np
+
+# Начальная емкость массивов популяции
+INITIAL_CAPACITY = 16
+
+
+# Параметры правил, которые можно задать отдельно для вида
+SPECIES_PARAMETERS = ("speed", "health_decay", "hunger_rate")
+
+
+class Species:
+    """Вид рыбы: общие для всех рыб вида данные."""
+
+    __slots__ = ("index", "name", "_description", "image") + SPECIES_PARAMETERS
+
+    def __init__(self, index, name, description, image=None, speed=None,
+                 health_decay=None, hunger_rate=None):
+        """Создает вид рыбы.
+
+        description - строка или функция без аргументов, возвращающая
+        описание; функция вызывается при первом обращении к описанию.
+        Параметры правил со значением None берутся из параметров
+        аквариума.
+        """
+        self.index = index  # Номер вида в популяции
+        self.name = name  # Название вида
+        self._description = description  # Описание вида или его загрузчик
+        self.image = image  # Имя изображения вида в каталоге assets
+        self.speed = speed  # Скорость движения
+        self.health_decay = health_decay  # Потеря здоровья за период
+        self.hunger_rate = hunger_rate  # Рост голода за период
+
+    @property
+    def description(self):
+        """Описание вида; загружается при первом обращении."""
+        if callable(self._description):
+            self._description = self._description()
+        return self._description
+
+
+class Population:
+    """Числовое состояние всех рыб в виде массивов."""
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        """Создает пустую популяцию с заданной начальной емкостью."""
+        self.count = 0  # Количество рыб
+        self.species = []  # Список видов
+        self.health = np.zeros(capacity, dtype=np.int16)  # Здоровье рыб
+        self.hunger = np.zeros(capacity, dtype=np.int16)  # Голод рыб
+        self.kind = np.zeros(capacity, dtype=np.uint16)  # Номера видов рыб
+
+    def add_species(self, name, description, image=None, **parameters):
+        """Регистрирует вид рыбы и возвращает его.
+
+        parameters - параметры правил вида (см. SPECIES_PARAMETERS).
+        """
+        species = Species(len(self.species), name, description, image,
+                          **parameters)
+        self.species.append(species)
+        return species
+
+    def _grow(self, needed=None):
+        """Увеличивает емкость массивов хотя бы до needed рыб.
+
+        Без needed емкость удваивается.
+        """
+        capacity = len(self.health) * 2
+        while needed is not None and capacity < needed:
+            capacity *= 2
+        for name in ("health", "hunger", "kind"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, species, health, hunger):
+        """Добавляет рыбу вида species и возвращает ее индекс."""
+        if self.count == len(self.health):
+            self._grow()
+        index = self.count
+        self.health[index] = health
+        self.hunger[index] = hunger
+        self.kind[index] = species.index
+        self.count += 1
+        return index
+
+    def add_many(self, species, count, health, hunger):
+        """Добавляет count рыб вида species и возвращает индекс первой."""
+        if self.count + count > len(self.health):
+            self._grow(self.count + count)
+        start = self.count
+        end = start + count
+        self.health[start:end] = health
+        self.hunger[start:end] = hunger
+        self.kind[start:end] = species.index
+        self.count = end
+        return start
+
+    def values(self, name, default):
+        """Возвращает параметр правил name для рыб.
+
+        Если у всех видов параметр одинаков (или не задан и равен
+        default), возвращается одно число, иначе массив значений по рыбам.
+        """
+        values = [default if getattr(species, name) is None
+                  else getattr(species, name) for species in self.species]
+        if len(set(values)) <= 1:
+            return values[0] if values else default
+        return np.array(values)[self.kind[:self.count]]
+
+    def species_of(self, index):
+        """Возвращает вид рыбы с индексом index."""
+        return self.species[self.kind[index]]
@@ -0,0 +1,187 @@
+"""Замеры горячих участков приложения во время работы.
+
+Профилировщик оборачивает функции (правила планировщика, перенос модели
+на сцену, отрисовку) и собирает по каждой гистограмму длительностей.
+Кроме того, он считает кадры: пропущенные кадры относительно бюджета
+TIMER_UPDATE_HEALTH и отклонение фактического интервала таймера от
+заданного (дрейф). Модуль не зависит от Qt.
+"""
+
+import bisect
+import json
+import time
+
+from simulation import TIMER_UPDATE_HEALTH
+
+# Верхние границы корзин гистограммы длительностей (мс)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33, 66, 133)
+
+
+class Histogram:
+    """Гистограмма значений с фиксированными корзинами."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Создает пустую гистограмму."""
+        self.buckets = buckets  # Верхние границы корзин
+        # Счетчики корзин; последняя - для значений больше всех границ
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0  # Количество значений
+        self.total = 0.0  # Сумма значений
+        self.max = 0.0  # Наибольшее значение
+
+    def add(self, value):
+        """Добавляет значение в гистограмму."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        """Среднее значение."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """Оценивает q-й процентиль верхней границей его корзины."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def as_dict(self):
+        """Возвращает гистограмму в виде словаря."""
+        return {
+            "count": self.count,
+            "mean_ms": self.mean,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+            "buckets_ms": list(self.buckets) + ["inf"],
+            "counts": list(self.counts),
+        }
+
+
+class Profiler:
+    """Сборщик длительностей функций и статистики кадров."""
+
+    def __init__(self, budget=TIMER_UPDATE_HEALTH, clock=time.perf_counter):
+        """Создает профилировщик с бюджетом кадра budget мс."""
+        self.budget = budget  # Бюджет одного кадра (мс)
+        self.clock = clock  # Источник времени в секундах
+        self.enabled = True  # Флаг сбора замеров
+        self.histograms = {}  # Гистограммы длительностей по именам
+        self.frames = 0  # Количество кадров
+        self.missed_frames = 0  # Кадры, пропущенные из-за опоздания таймера
+        self.over_budget = 0  # Кадры, работа которых не уложилась в бюджет
+        # Отклонение интервала между кадрами от бюджета (мс)
+        self.drift = Histogram()
+        self.drift_total = 0.0  # Сумма отклонений со знаком
+        self.frame_start = None  # Начало текущего кадра
+        self.last_frame_start = None  # Начало предыдущего кадра
+
+    def record(self, name, milliseconds):
+        """Добавляет длительность вызова name."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add(milliseconds)
+
+    def wrap(self, name, function):
+        """Возвращает функцию, замеряющую каждый вызов function."""
+        clock = self.clock
+
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return function(*args, **kwargs)
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, (clock() - start) * 1000)
+
+        wrapper.__name__ = getattr(function, "__name__", name)
+        return wrapper
+
+    def instrument(self, scheduler):
+        """Оборачивает все задачи планировщика, уже стоящие в очереди."""
+        for _, _, task in scheduler.queue:
+            name = getattr(task.callback, "__name__", repr(task.callback))
+            task.callback = self.wrap(name, task.callback)
+
+    def begin_frame(self):
+        """Отмечает начало кадра и учитывает интервал от прошлого кадра."""
+        if not self.enabled:
+            return
+        now = self.clock()
+        if self.last_frame_start is not None:
+            interval = (now - self.last_frame_start) * 1000
+            deviation = interval - self.budget
+            self.drift.add(abs(deviation))
+            self.drift_total += deviation
+            # Каждый целый бюджет сверх одного - кадр, который не показан
+            self.missed_frames += max(0, int(interval // self.budget) - 1)
+        self.frame_start = self.last_frame_start = now
+
+    def end_frame(self):
+        """Отмечает конец кадра и учитывает время его работы."""
+        if not self.enabled or self.frame_start is None:
+            return
+        elapsed = (self.clock() - self.frame_start) * 1000
+        self.record("frame", elapsed)
+        self.frames += 1
+        if elapsed > self.budget:
+            self.over_budget += 1
+        self.frame_start = None
+
+    def reset(self):
+        """Сбрасывает все накопленные замеры."""
+        self.histograms.clear()
+        self.frames = self.missed_frames = self.over_budget = 0
+        self.drift = Histogram()
+        self.drift_total = 0.0
+        self.frame_start = self.last_frame_start = None
+
+    def frame_lines(self):
+        """Возвращает строки со статистикой кадров."""
+        frame = self.histograms.get("frame", Histogram())
+        drift = self.drift.count and self.drift_total / self.drift.count
+        return [
+            f"Кадров: {self.frames}",
+            f"Кадр: {frame.mean:.2f} мс (макс. {frame.max:.1f})",
+            f"Пропущено: {self.missed_frames}, "
+            f"дольше {self.budget} мс: {self.over_budget}",
+            f"Дрейф: {drift:+.2f} мс (макс. {self.drift.max:.1f})",
+        ]
+
+    def latency_lines(self, limit=6):
+        """Возвращает строки о самых затратных функциях."""
+        ranked = sorted(self.histograms.items(),
+                        key=lambda item: item[1].total, reverse=True)
+        return [f"{name}: {histogram.mean:.3f} мс, "
+                f"p99 {histogram.percentile(99):g}"
+                for name, histogram in ranked[:limit] if name != "frame"]
+
+    def as_dict(self):
+        """Возвращает все замеры в виде словаря."""
+        return {
+            "budget_ms": self.budget,
+            "frames": self.frames,
+            "missed_frames": self.missed_frames,
+            "over_budget": self.over_budget,
+            "drift_mean_ms": (self.drift_total / self.drift.count
+                              if self.drift.count else 0.0),
+            "drift": self.drift.as_dict(),
+            "latency": {name: histogram.as_dict()
+                        for name, histogram in self.histograms.items()},
+        }
+
+    def export(self, path):
+        """Записывает замеры в JSON-файл."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.as_dict(), file, ensure_ascii=False, indent=2)
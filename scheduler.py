@@ -0,0 +1,92 @@
+"""Единый планировщик периодических задач на очереди с приоритетом.
+
+Все правила аквариума (движение, голод, падение корма, загрязнение)
+регистрируются в одном планировщике. Он не создает таймеров: время
+продвигается явно методом advance(dt), поэтому планировщик одинаково
+работает и от одного QTimer в окне, и в модельном времени без Qt.
+"""
+
+import heapq
+import itertools
+
+
+class Task:
+    """Задача планировщика."""
+
+    def __init__(self, callback, due, interval=None, owner=None):
+        """Создает задачу, срабатывающую в момент due.
+
+        owner - объект, которому принадлежит задача (например, аквариум,
+        когда планировщик общий для нескольких аквариумов).
+        """
+        self.callback = callback  # Вызываемая функция
+        self.due = due  # Время следующего срабатывания (мс)
+        # Период повторения (None - одноразовая задача)
+        self.interval = interval
+        self.cancelled = False  # Флаг отмены задачи
+        self.owner = owner  # Владелец задачи (None - не указан)
+
+
+class Scheduler:
+    """Планировщик задач с модельным временем в миллисекундах."""
+
+    def __init__(self):
+        """Создает пустой планировщик."""
+        self.time = 0  # Текущее время планировщика (мс)
+        self.queue = []  # Куча (время, порядковый номер, задача)
+        # Порядковые номера сохраняют порядок задач с одинаковым временем
+        self.counter = itertools.count()
+
+    def _push(self, task):
+        """Помещает задачу в очередь."""
+        heapq.heappush(self.queue, (task.due, next(self.counter), task))
+
+    def every(self, interval, callback, owner=None):
+        """Регистрирует задачу, повторяющуюся каждые interval мс."""
+        task = Task(callback, self.time + interval, interval, owner)
+        self._push(task)
+        return task
+
+    def after(self, delay, callback, owner=None):
+        """Регистрирует задачу, срабатывающую один раз через delay мс."""
+        task = Task(callback, self.time + delay, owner=owner)
+        self._push(task)
+        return task
+
+    def tasks(self, owner):
+        """Возвращает задачи владельца owner в порядке очереди."""
+        return [task for _, _, task in sorted(self.queue,
+                                              key=lambda entry: entry[:2])
+                if task.owner is owner and not task.cancelled]
+
+    def cancel(self, task):
+        """Отменяет задачу; она будет удалена из очереди при извлечении."""
+        task.cancelled = True
+
+    def reschedule(self, task, due):
+        """Переносит следующее срабатывание задачи на момент due.
+
+        Как и при обычной постановке в очередь, среди задач с тем же
+        временем перенесенная задача выполняется последней.
+        """
+        task.due = due
+        # Задач немного, поэтому кучу проще построить заново
+        self.queue = [(entry.due,
+                       next(self.counter) if entry is task else order, entry)
+                      for _, order, entry in self.queue]
+        heapq.heapify(self.queue)
+
+    def advance(self, dt):
+        """Продвигает время на dt мс, выполняя задачи по порядку времени."""
+        end = self.time + dt
+        while self.queue and self.queue[0][0] <= end:
+            due, _, task = heapq.heappop(self.queue)
+            if task.cancelled:
+                continue
+            self.time = due
+            task.callback()
+            # Периодическая задача планируется заново без накопления дрейфа
+            if task.interval is not None and not task.cancelled:
+                task.due = due + task.interval
+                self._push(task)
+        self.time = end
@@ -0,0 +1,562 @@
+"""Модель аквариума, не зависящая от Qt.
+
+Модуль хранит все состояние мира (рыбы, корм, чистота воды и аквариума)
+и умеет продвигать его во времени методом Aquarium.step(dt). Графический
+интерфейс из main.py только отображает это состояние.
+"""
+
+import math
+import numbers
+import random
+
+import numpy as np
+
+from movement import MovementEngine
+from population import Population
+from scheduler import Scheduler
+from spatial import SpatialGrid
+from tank_stats import AquariumStats
+
+# Константы для управления временем
+
+# Таймер для уменьшения чистоты аквариума (в миллисекундах)
+TIMER_CLEAN_AQUARIUM = 120000
+# Таймер для уменьшения чистоты воды (в миллисекундах)
+TIMER_CLEAN_WATER = 60000
+# Таймер для обновления позиции рыбы (в миллисекундах)
+TIMER_FISH_POSITION = 60000
+# Таймер для обновления здоровья и голода рыбы (в миллисекундах)
+TIMER_UPDATE_HEALTH = 16
+# Интервал шага падения корма (в миллисекундах)
+TIMER_FOOD_FALL = 50
+# Интервал выбора направления рыбами (в миллисекундах)
+TIMER_FISH_BEHAVIOUR = 100
+
+# Константы для управления состоянием рыб и аквариума
+FISH_HEALTH = 100  # Начальное здоровье рыбы
+WATER_CLEAN = 100  # Начальная чистота воды
+AQUARIUM_CLEAN = 100  # Начальная чистота аквариума
+FISH_HUNGER = 100  # Максимальный уровень голода рыбы
+FISH_BASE_HUNGER = 0  # Базовый уровень голода рыбы
+FISH_SPEED = 1.2  # Скорость движения рыбы
+# На сколько уменьшается здоровье рыбы за период TIMER_FISH_POSITION
+FISH_HEALTH_DECAY = 2
+# На сколько растет голод рыбы за период TIMER_FISH_POSITION
+FISH_HUNGER_RATE = 1
+
+# Константы для управления кормом
+FOOD_DURATION = 5000  # Время падения корма (в миллисекундах)
+FOOD_BOTTOM = 899  # Координата Y дна для корма
+# Координаты X, в которых появляется корм при кормлении
+FOOD_POSITIONS = [200, 450, 700, 900, 1100]
+
+# Начальный размер области движения рыб
+AQUARIUM_WIDTH = 1600
+AQUARIUM_HEIGHT = 900
+
+# Константы поведения рыб
+FOOD_SIGHT = 300  # Расстояние, на котором рыба замечает корм
+FOOD_EAT_DISTANCE = 40  # Расстояние, с которого рыба съедает корм
+FISH_PERSONAL_SPACE = 60  # Расстояние, на котором рыбы избегают друг друга
+
+# Константы, которые можно переопределить для отдельного аквариума
+SETTING_NAMES = (
+    "TIMER_CLEAN_AQUARIUM", "TIMER_CLEAN_WATER", "TIMER_FISH_POSITION",
+    "TIMER_UPDATE_HEALTH", "TIMER_FOOD_FALL", "TIMER_FISH_BEHAVIOUR",
+    "FISH_HEALTH", "WATER_CLEAN", "AQUARIUM_CLEAN", "FISH_HUNGER",
+    "FISH_BASE_HUNGER", "FISH_SPEED", "FOOD_DURATION", "FOOD_SIGHT",
+    "FOOD_EAT_DISTANCE", "FISH_PERSONAL_SPACE", "FISH_HEALTH_DECAY",
+    "FISH_HUNGER_RATE",
+)
+# Константы, которые могут быть только целыми: здоровье и голод рыб
+# хранятся в целочисленных массивах (см. population.py), а чистота
+# изменяется на целые проценты
+INTEGER_SETTINGS = (
+    "FISH_HEALTH", "WATER_CLEAN", "AQUARIUM_CLEAN", "FISH_HUNGER",
+    "FISH_BASE_HUNGER", "FISH_HEALTH_DECAY", "FISH_HUNGER_RATE",
+)
+# Константы, которые должны быть больше нуля: с нулевым интервалом
+# правило выполнялось бы бесконечно, а нулевые длительность падения
+# корма и скорость рыб приводят к делению на ноль. Остальные константы
+# не могут быть меньше нуля
+POSITIVE_SETTINGS = (
+    "TIMER_CLEAN_AQUARIUM", "TIMER_CLEAN_WATER", "TIMER_FISH_POSITION",
+    "TIMER_UPDATE_HEALTH", "TIMER_FOOD_FALL", "TIMER_FISH_BEHAVIOUR",
+    "FOOD_DURATION", "FISH_SPEED",
+)
+# Константы здоровья и голода рыб; значения не могут быть больше
+# FISH_STATE_MAX, наибольшего числа в массивах здоровья и голода
+FISH_STATE_SETTINGS = (
+    "FISH_HEALTH", "FISH_HUNGER", "FISH_BASE_HUNGER", "FISH_HEALTH_DECAY",
+    "FISH_HUNGER_RATE",
+)
+FISH_STATE_MAX = int(np.iinfo(np.int16).max)
+
+
+def check_setting(name, value):
+    """Проверяет значение value константы name (имя в верхнем регистре).
+
+    Выбрасывает ValueError с объяснением, если значение не подходит
+    константе.
+    """
+    if (isinstance(value, bool) or not isinstance(value, numbers.Real)
+            or not math.isfinite(value)):
+        raise ValueError(f"значение {name} должно быть числом")
+    if name in INTEGER_SETTINGS and not float(value).is_integer():
+        raise ValueError(
+            f"значение {name} должно быть целым, получено {value}")
+    if name in POSITIVE_SETTINGS:
+        if value <= 0:
+            raise ValueError(f"значение {name} должно быть больше 0")
+    elif value < 0:
+        raise ValueError(f"значение {name} не может быть меньше 0")
+    if name in FISH_STATE_SETTINGS and value > FISH_STATE_MAX:
+        raise ValueError(
+            f"значение {name} не может быть больше {FISH_STATE_MAX}")
+
+
+class Settings:
+    """Параметры правил одного аквариума.
+
+    Атрибуты называются так же, как константы модуля, но строчными
+    буквами (fish_speed, timer_clean_water и т. д.), и по умолчанию
+    равны этим константам.
+    """
+
+    def __init__(self, **overrides):
+        """Создает параметры, заменяя значения по умолчанию из overrides.
+
+        Недопустимое значение (см. check_setting) вызывает ValueError.
+        """
+        for name in SETTING_NAMES:
+            if name.lower() in overrides:
+                value = overrides.pop(name.lower())
+                check_setting(name, value)
+            else:
+                value = globals()[name]
+            setattr(self, name.lower(), value)
+        if overrides:
+            raise TypeError(
+                f"Неизвестные параметры аквариума: {', '.join(overrides)}")
+
+    def as_dict(self):
+        """Возвращает параметры в виде словаря."""
+        return {name.lower(): getattr(self, name.lower())
+                for name in SETTING_NAMES}
+
+
+def _movement_field(name):
+    """Создает свойство рыбы, хранящееся в массиве движка движения."""
+
+    def getter(self):
+        return float(getattr(self.aquarium.movement, name)[self.index])
+
+    def setter(self, value):
+        getattr(self.aquarium.movement, name)[self.index] = value
+
+    return property(getter, setter)
+
+
+def _population_field(name):
+    """Создает свойство рыбы, хранящееся в массиве популяции.
+
+    Запись значения обновляет и сводную статистику аквариума.
+    """
+
+    def getter(self):
+        return int(getattr(self.aquarium.population, name)[self.index])
+
+    def setter(self, value):
+        array = getattr(self.aquarium.population, name)
+        old = int(array[self.index])
+        array[self.index] = value
+        getattr(self.aquarium.stats, name).replace(
+            old, int(array[self.index]))
+
+    return property(getter, setter)
+
+
+class Fish:
+    """Представление одной рыбы.
+
+    Само состояние рыбы хранится в массивах MovementEngine и Population,
+    а объект рыбы лишь обращается к ним по своему индексу.
+    """
+
+    __slots__ = ("aquarium", "index")
+
+    x = _movement_field("x")  # Координата X
+    y = _movement_field("y")  # Координата Y
+    # Направление движения по оси X (1 - вправо, -1 - влево)
+    direction_x = _movement_field("direction_x")
+    # Направление движения по оси Y (1 - вниз, -1 - вверх)
+    direction_y = _movement_field("direction_y")
+    width = _movement_field("width")  # Ширина изображения рыбы
+    height = _movement_field("height")  # Высота изображения рыбы
+    health = _population_field("health")  # Здоровье рыбы
+    hunger = _population_field("hunger")  # Уровень голода рыбы
+
+    def __init__(self, aquarium, index):
+        """Создает представление рыбы с индексом index."""
+        self.aquarium = aquarium  # Аквариум, хранящий состояние рыбы
+        self.index = index  # Индекс рыбы в массивах аквариума
+
+    @property
+    def species(self):
+        """Вид рыбы."""
+        return self.aquarium.population.species_of(self.index)
+
+    @property
+    def fish_type(self):
+        """Тип рыбы."""
+        return self.species.name
+
+    @property
+    def description(self):
+        """Описание рыбы."""
+        return self.species.description
+
+    def feed(self):
+        """Кормит рыбу, увеличивая ее здоровье и сбрасывая голод."""
+        # Здоровье не может быть больше начального
+        limit = self.aquarium.settings.fish_health
+        self.health = min(limit, self.health + limit)
+        self.hunger = 0  # Сбрасываем голод
+
+
+class Food:
+    """Состояние одной гранулы корма."""
+
+    def __init__(self, x, y, duration=FOOD_DURATION):
+        """Инициализирует гранулу корма."""
+        self.x = x  # Координата X
+        self.y = y  # Координата Y
+        self.duration = duration  # Время падения до дна
+        # Флаг присутствия корма в аквариуме
+        self.active = True
+
+    def fall(self, interval=TIMER_FOOD_FALL):
+        """Сдвигает корм вниз на один шаг длительностью interval мс.
+
+        Возвращает True, если корм достиг дна.
+        """
+        # Вычисляем расстояние до дна
+        distance = FOOD_BOTTOM - self.y
+        # Вычисляем скорость падения,
+        # чтобы корм упал за заданное время (duration)
+        speed = distance / (self.duration / interval)
+        self.y += speed
+        # Скорость убывает вместе с расстоянием, поэтому корм
+        # считается упавшим, когда до дна остается меньше пикселя
+        if FOOD_BOTTOM - self.y < 1:
+            self.active = False
+        return not self.active
+
+
+class Aquarium:
+    """Мир аквариума: рыбы, корм и общая чистота."""
+
+    def __init__(self, scene_width=AQUARIUM_WIDTH,
+                 scene_height=AQUARIUM_HEIGHT, seed=None, settings=None,
+                 scheduler=None):
+        """Инициализирует пустой аквариум заданного размера.
+
+        seed задает зерно генератора случайных чисел, чтобы прогоны
+        с одинаковым зерном можно было воспроизвести, а settings -
+        параметры правил (по умолчанию константы модуля). Если задан
+        scheduler, правила регистрируются в этом общем планировщике
+        (см. tanks.py), иначе аквариум создает собственный.
+        """
+        # Параметры правил аквариума
+        self.settings = settings if settings is not None else Settings()
+        settings = self.settings
+        self.scene_width = scene_width  # Ширина области движения рыб
+        self.scene_height = scene_height  # Высота области движения рыб
+        self.random = random.Random(seed)  # Генератор случайных чисел
+        self.food_dropped = 0  # Количество брошенных гранул корма
+        self.food_eaten = 0  # Количество съеденных гранул корма
+        self.fishes = []  # Представления рыб
+        # Движок, хранящий позиции всех рыб
+        self.movement = MovementEngine()
+        # Виды рыб и числовое состояние каждой рыбы
+        self.population = Population()
+        # Сводная статистика здоровья и голода рыб
+        self.stats = AquariumStats(self)
+        self.food = []  # Список падающего корма
+        # Пространственные индексы центров рыб и корма; обновляются при
+        # выборе направления рыбами (см. steer_fishes)
+        self.fish_grid = SpatialGrid(settings.fish_personal_space)
+        self.food_grid = SpatialGrid(settings.food_sight)
+        # Чистота воды
+        self.water_cleanliness = settings.water_clean
+        # Чистота аквариума
+        self.aquarium_cleanliness = settings.aquarium_clean
+
+        # Единый планировщик всех периодических правил аквариума
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        # Количество уже выполненных шагов движения. Движение
+        # выполняется лениво: шаги, накопившиеся с прошлого обращения
+        # к позициям, применяются сразу пачкой (см. move_fishes). В общем
+        # планировщике время уже может идти, поэтому шаги отсчитываются
+        # с момента создания аквариума
+        self.moves_done = int(self.scheduler.time
+                              // settings.timer_update_health)
+        for interval, rule in (
+                (settings.timer_fish_position, self.update_fish_status),
+                (settings.timer_clean_aquarium, self.decrease_cleanliness),
+                (settings.timer_clean_water,
+                 self.decrease_water_cleanliness),
+                (settings.timer_food_fall, self.fall_food),
+                (settings.timer_fish_behaviour, self.steer_fishes)):
+            self.scheduler.every(interval, rule, owner=self)
+
+    @property
+    def time(self):
+        """Модельное время аквариума (в миллисекундах)."""
+        return self.scheduler.time
+
+    def add_species(self, name, description, image=None, speed=None,
+                    health_decay=None, hunger_rate=None):
+        """Регистрирует вид рыбы и возвращает его.
+
+        description - описание или функция, загружающая его при первом
+        обращении. speed, health_decay и hunger_rate задают правила
+        для рыб вида; None - значение из параметров аквариума.
+        """
+        return self.population.add_species(
+            name, description, image, speed=speed,
+            health_decay=health_decay, hunger_rate=hunger_rate)
+
+    def add_fish(self, x, y, species, width=0, height=0):
+        """Добавляет рыбу вида species и возвращает ее представление."""
+        index = self.movement.add(x, y, width, height)
+        self.population.add(species, self.settings.fish_health,
+                            self.settings.fish_base_hunger)
+        self.stats.health.add(self.settings.fish_health)
+        self.stats.hunger.add(self.settings.fish_base_hunger)
+        fish = Fish(self, index)
+        self.fishes.append(fish)
+        return fish
+
+    def add_fishes(self, xs, ys, species, width=0, height=0):
+        """Добавляет рыб вида species одним пакетом.
+
+        xs и ys - координаты рыб. Возвращает список представлений рыб.
+        """
+        count = len(xs)
+        health = self.settings.fish_health
+        hunger = self.settings.fish_base_hunger
+        start = self.movement.add_many(xs, ys, width, height)
+        self.population.add_many(species, count, health, hunger)
+        self.stats.health.add(health, count)
+        self.stats.hunger.add(hunger, count)
+        fishes = [Fish(self, index) for index in range(start, start + count)]
+        self.fishes.extend(fishes)
+        return fishes
+
+    def spawn_fish(self, species, count, width=0, height=0):
+        """Добавляет count рыб вида species в случайные места аквариума."""
+        right = max(0, self.scene_width - width)
+        bottom = max(0, self.scene_height - height)
+        # Случайные числа берутся в том же порядке, что и при добавлении
+        # рыб по одной, а сами рыбы добавляются одним пакетом
+        uniform = self.random.uniform
+        choice = self.random.choice
+        places = [(uniform(0, right), uniform(0, bottom),
+                   choice((1, -1)), choice((1, -1))) for _ in range(count)]
+        if not places:
+            return []
+        xs, ys, directions_x, directions_y = zip(*places)
+        fishes = self.add_fishes(xs, ys, species, width, height)
+        start = fishes[0].index
+        self.movement.direction[:, start:start + count] = (directions_x,
+                                                           directions_y)
+        return fishes
+
+    def fish_at(self, x, y, positions=None, extent=None):
+        """Возвращает рыбу, изображение которой содержит точку, или None.
+
+        Если таких рыб несколько, возвращается добавленная последней,
+        то есть нарисованная поверх остальных. positions - позиции первых
+        рыб, по которым ведется поиск (например, нарисованные окном);
+        по умолчанию берутся текущие позиции всех рыб модели. extent -
+        размеры этих рыб (по умолчанию размеры из модели).
+        """
+        if positions is None:
+            self.move_fishes()
+            positions = self.movement.position[:, :self.movement.count]
+        count = positions.shape[1]
+        if extent is None:
+            extent = self.movement.extent[:, :count]
+        offset = np.array([[x], [y]]) - positions
+        hit = ((offset >= 0) & (offset <= extent)).all(axis=0)
+        indices = np.flatnonzero(hit)
+        if len(indices) == 0:
+            return None
+        return self.fishes[indices[-1]]
+
+    def add_food(self, x, y, duration=None):
+        """Добавляет гранулу корма и возвращает ее состояние."""
+        if duration is None:
+            duration = self.settings.food_duration
+        food = Food(x, y, duration)
+        self.food.append(food)
+        self.food_dropped += 1
+        return food
+
+    def drop_food(self):
+        """Бросает порцию корма и возвращает список новых гранул."""
+        return [self.add_food(x, 1) for x in FOOD_POSITIONS]
+
+    def remove_food(self, food):
+        """Убирает гранулу корма из аквариума."""
+        food.active = False
+        if food in self.food:
+            self.food.remove(food)
+
+    def resize(self, scene_width, scene_height):
+        """Меняет границы, в которых плавают рыбы."""
+        # Шаги, сделанные до изменения, считаются по старым границам
+        self.move_fishes()
+        self.scene_width = scene_width
+        self.scene_height = scene_height
+
+    def move_fishes(self):
+        """Применяет шаги движения, накопившиеся к текущему времени.
+
+        Рыба делает шаг каждые timer_update_health мс. Вместо отдельной
+        задачи планировщика на каждый шаг все накопившиеся шаги
+        выполняются одним вызовом MovementEngine.advance.
+        """
+        due = int(self.time // self.settings.timer_update_health)
+        # Скорость общая для всех рыб или своя у каждого вида
+        speed = self.population.values("speed", self.settings.fish_speed)
+        self.movement.advance(due - self.moves_done, speed,
+                              self.scene_width, self.scene_height)
+        self.moves_done = due
+
+    def update_fish_status(self):
+        """Уменьшает здоровье и увеличивает голод у всех рыб.
+
+        По умолчанию здоровье уменьшается на 2, а голод растет на 1;
+        виды могут задавать свои темпы.
+        """
+        count = self.population.count
+        health = self.population.health[:count]
+        hunger = self.population.hunger[:count]
+        decay = self.population.values("health_decay",
+                                       self.settings.fish_health_decay)
+        rate = self.population.values("hunger_rate",
+                                      self.settings.fish_hunger_rate)
+        # Здоровье не может быть меньше 0, а голод - больше
+        # максимального значения. Разность и сумма считаются в int32,
+        # чтобы не переполнить массивы int16
+        np.maximum(np.subtract(health, decay, dtype=np.int32), 0, out=health)
+        np.minimum(np.add(hunger, rate, dtype=np.int32),
+                   self.settings.fish_hunger, out=hunger)
+        if np.ndim(decay) or np.ndim(rate):
+            # Рыбы разных видов изменились по-разному, сдвинуть счетчики
+            # нельзя. Правило срабатывает раз в минуту, поэтому
+            # пересчет по массивам обходится недорого
+            self.stats.rebuild()
+            return
+        self.stats.health.shift(-decay, low=0)
+        self.stats.hunger.shift(rate, high=self.settings.fish_hunger)
+
+    def fall_food(self):
+        """Сдвигает весь корм вниз и убирает упавшие гранулы."""
+        self.food = [food for food in self.food
+                     if not food.fall(self.settings.timer_food_fall)]
+
+    def steer_fishes(self):
+        """Направляет рыб к ближайшему корму и в сторону от соседей.
+
+        Рыба, подплывшая к корму достаточно близко, съедает его. Рыбы
+        обрабатываются по порядку: гранулу, съеденную рыбой, рыбы с
+        большими номерами уже не видят. Ближайший корм и соседи ищутся
+        пакетно по пространственным индексам (см. spatial.py), а цикл на
+        Python идет только по съеденным гранулам. Если корма нет и рыбы
+        не лежат в соседних ячейках сетки, направления не меняются, и
+        поиск пропускается.
+        """
+        count = self.movement.count
+        if count == 0:
+            return
+        self.move_fishes()
+        # Центры рыб по осям
+        xs, ys = (self.movement.position[:, :count]
+                  + self.movement.extent[:, :count] / 2)
+        if not self.food and not self.fish_grid.crowded(xs, ys):
+            return
+        food = list(self.food)
+        food_xs = np.array([grain.x for grain in food], dtype=np.float64)
+        food_ys = np.array([grain.y for grain in food], dtype=np.float64)
+        self.fish_grid.update(xs, ys)
+        self.food_grid.update(food_xs, food_ys)
+        sight = self.settings.food_sight
+        targets, distances = self.food_grid.nearest(xs, ys, sight)
+
+        eat_limit = self.settings.food_eat_distance ** 2
+        fed = np.zeros(count, dtype=bool)
+        available = np.ones(len(food), dtype=bool)
+        start = 0
+        while True:
+            eaters = np.flatnonzero(distances[start:] <= eat_limit)
+            if len(eaters) == 0:
+                break
+            index = start + eaters[0]
+            grain = targets[index]
+            self.fishes[index].feed()
+            self.remove_food(food[grain])
+            self.food_eaten += 1
+            fed[index] = True
+            targets[index] = -1
+            available[grain] = False
+            start = index + 1
+            # Следующие рыбы, плывшие к съеденной грануле, ищут другую
+            lost = start + np.flatnonzero(targets[start:] == grain)
+            if len(lost):
+                targets[lost], distances[lost] = self.food_grid.nearest(
+                    xs[lost], ys[lost], sight, available)
+
+        direction = self.movement.direction[:, :count]
+        # Плывем к корму
+        seeking = targets >= 0
+        chosen = targets[seeking]
+        direction[0, seeking] = np.where(
+            food_xs[chosen] - xs[seeking] >= 0, 1, -1)
+        direction[1, seeking] = np.where(
+            food_ys[chosen] - ys[seeking] >= 0, 1, -1)
+        # Рыбы без корма в поле зрения отплывают от центра соседей на
+        # расстоянии fish_personal_space; при совпадении координат
+        # расходятся в зависимости от номера
+        crowded, crowd_xs, crowd_ys = self.fish_grid.crowd_centers(
+            self.settings.fish_personal_space)
+        avoiding = crowded & ~seeking & ~fed
+        tie = np.where(np.arange(count) % 2, 1, -1)
+        for axis, offset in enumerate((crowd_xs - xs, crowd_ys - ys)):
+            offset = np.where(offset == 0, tie, offset)
+            direction[axis, avoiding] = np.where(offset[avoiding] >= 0,
+                                                 -1, 1)
+
+    def decrease_cleanliness(self):
+        """Уменьшает уровень чистоты аквариума."""
+        self.aquarium_cleanliness = max(0, self.aquarium_cleanliness - 1)
+
+    def decrease_water_cleanliness(self):
+        """Уменьшает уровень чистоты воды."""
+        self.water_cleanliness = max(0, self.water_cleanliness - 1)
+
+    def clear_aquarium(self):
+        """Восстанавливает чистоту аквариума."""
+        self.aquarium_cleanliness = self.settings.aquarium_clean
+
+    def change_water(self):
+        """Восстанавливает чистоту воды."""
+        self.water_cleanliness = self.settings.water_clean
+
+    def step(self, dt):
+        """Продвигает аквариум на dt миллисекунд модельного времени."""
+        self.scheduler.advance(dt)
+        # После шага позиции рыб соответствуют текущему времени
+        self.move_fishes()
@@ -0,0 +1,305 @@
+"""Сохранение и восстановление состояния аквариума в двоичном формате.
+
+Снимок содержит все состояние мира: параметры правил, генератор случайных
+чисел, виды и массивы рыб, падающий корм, чистоту воды и аквариума, а
+также моменты следующего срабатывания правил планировщика. Массивы рыб
+записываются целиком, без цикла по рыбам, поэтому снимок даже большого
+аквариума пишется за миллисекунды.
+
+Формат файла:
+
+    заголовок   "<4sHH": сигнатура AQSN, версия, флаги
+    данные      сжатые zlib, если установлен флаг SNAPSHOT_COMPRESSED
+
+Все числа в данных записываются в порядке байтов little-endian.
+"""
+
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+from population import SPECIES_PARAMETERS
+from simulation import Aquarium, Settings, SETTING_NAMES
+
+# Сигнатура файла снимка
+SNAPSHOT_MAGIC = b"AQSN"
+# Текущая версия формата
+SNAPSHOT_VERSION = 3
+# Флаг сжатия данных снимка
+SNAPSHOT_COMPRESSED = 1
+# Интервал автосохранения по умолчанию (в миллисекундах)
+AUTOSAVE_INTERVAL = 60000
+
+_HEADER = struct.Struct("<4sHH")
+# Время, шаги движения, счетчики корма, чистота, размеры сцены
+_WORLD = struct.Struct("<dqqqiidd")
+_SETTINGS = struct.Struct(f"<{len(SETTING_NAMES)}d")
+# Состояние генератора Mersenne Twister: 624 слова и позиция
+_RANDOM = struct.Struct("<625I?d")
+_COUNT = struct.Struct("<I")
+_FOOD = struct.Struct("<ddd")
+# Параметры правил вида (NaN - значение из параметров аквариума)
+_SPECIES = struct.Struct(f"<{len(SPECIES_PARAMETERS)}d")
+# Номер правила и время его следующего срабатывания
+_TASK = struct.Struct("<Bd")
+# Правила аквариума, фазы которых сохраняются в снимке
+_RULES = ("update_fish_status", "decrease_cleanliness",
+          "decrease_water_cleanliness", "fall_food", "steer_fishes")
+# Массивы рыб: (объект-владелец, имя массива, тип элементов, форма строки)
+_ARRAYS = (
+    ("movement", "position", "<f8", 2),
+    ("movement", "direction", "i1", 2),
+    ("movement", "extent", "<f8", 2),
+    ("population", "health", "<i2", None),
+    ("population", "hunger", "<i2", None),
+    ("population", "kind", "<u2", None),
+)
+
+
+class SnapshotError(ValueError):
+    """Ошибка чтения снимка: чужой файл, неизвестная версия или обрыв."""
+
+
+class _Reader:
+    """Последовательное чтение двоичных данных снимка."""
+
+    def __init__(self, data):
+        """Создает чтение с начала data."""
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def take(self, size):
+        """Возвращает следующие size байт."""
+        end = self.offset + size
+        if end > len(self.data):
+            raise SnapshotError("снимок обрывается")
+        chunk = self.data[self.offset:end]
+        self.offset = end
+        return chunk
+
+    def unpack(self, layout):
+        """Читает значения по структуре layout."""
+        return layout.unpack(self.take(layout.size))
+
+    def text(self):
+        """Читает строку в UTF-8 с длиной впереди."""
+        size, = self.unpack(_COUNT)
+        return str(self.take(size), "utf-8")
+
+
+def _text(value):
+    """Кодирует строку в UTF-8 с длиной впереди."""
+    data = (value or "").encode("utf-8")
+    return _COUNT.pack(len(data)) + data
+
+
+def _rule_tasks(aquarium):
+    """Возвращает задачи правил аквариума по их именам.
+
+    Задачи перечисляются в порядке очереди планировщика, чтобы при
+    восстановлении правила с одинаковым временем срабатывали в прежнем
+    порядке. Задачи других аквариумов общего планировщика не входят
+    в снимок.
+    """
+    return {getattr(task.callback, "__name__", None): task
+            for task in aquarium.scheduler.tasks(aquarium)}
+
+
+def encode(aquarium):
+    """Возвращает несжатые данные снимка аквариума."""
+    # Позиции в массивах должны соответствовать текущему времени
+    aquarium.move_fishes()
+    settings = aquarium.settings.as_dict()
+    version, words, gauss = aquarium.random.getstate()
+    parts = [
+        _WORLD.pack(aquarium.time, aquarium.moves_done,
+                    aquarium.food_dropped, aquarium.food_eaten,
+                    aquarium.water_cleanliness, aquarium.aquarium_cleanliness,
+                    aquarium.scene_width, aquarium.scene_height),
+        _SETTINGS.pack(*(settings[name.lower()] for name in SETTING_NAMES)),
+        _RANDOM.pack(*words, gauss is not None, gauss or 0.0),
+    ]
+
+    # Моменты следующего срабатывания правил в порядке очереди
+    tasks = _rule_tasks(aquarium)
+    parts += [_TASK.pack(_RULES.index(name), task.due)
+              for name, task in tasks.items() if name in _RULES]
+
+    species = aquarium.population.species
+    parts.append(_COUNT.pack(len(species)))
+    for kind in species:
+        values = [getattr(kind, name) for name in SPECIES_PARAMETERS]
+        parts += [_text(kind.name), _text(kind.description),
+                  _text(kind.image),
+                  _SPECIES.pack(*(float("nan") if value is None else value
+                                  for value in values))]
+
+    count = aquarium.population.count
+    parts.append(_COUNT.pack(count))
+    for owner, name, dtype, _ in _ARRAYS:
+        array = getattr(getattr(aquarium, owner), name)
+        parts.append(np.ascontiguousarray(
+            array[..., :count], dtype=dtype).tobytes())
+
+    parts.append(_COUNT.pack(len(aquarium.food)))
+    parts += [_FOOD.pack(food.x, food.y, food.duration)
+              for food in aquarium.food]
+    return b"".join(parts)
+
+
+def pack(payload, compress=True):
+    """Добавляет к данным снимка заголовок и при необходимости сжимает их."""
+    if compress:
+        payload = zlib.compress(payload, 1)
+    return _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                        SNAPSHOT_COMPRESSED if compress else 0) + payload
+
+
+def dumps(aquarium, compress=True):
+    """Возвращает снимок аквариума в виде байтов."""
+    return pack(encode(aquarium), compress)
+
+
+def loads(data):
+    """Восстанавливает аквариум из снимка и возвращает его."""
+    if len(data) < _HEADER.size:
+        raise SnapshotError("снимок обрывается")
+    magic, version, flags = _HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("файл не является снимком аквариума")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"неизвестная версия снимка: {version}")
+    payload = data[_HEADER.size:]
+    if flags & SNAPSHOT_COMPRESSED:
+        try:
+            payload = zlib.decompress(payload)
+        except zlib.error as error:
+            raise SnapshotError(f"снимок поврежден: {error}")
+    reader = _Reader(payload)
+
+    (time, moves_done, food_dropped, food_eaten, water, cleanliness,
+     width, height) = reader.unpack(_WORLD)
+    settings = Settings(**{
+        name.lower(): int(value) if value.is_integer() else value
+        for name, value in zip(SETTING_NAMES, reader.unpack(_SETTINGS))})
+    aquarium = Aquarium(width, height, settings=settings)
+    state = reader.unpack(_RANDOM)
+    aquarium.random.setstate(
+        (3, tuple(state[:625]), state[626] if state[625] else None))
+
+    dues = [reader.unpack(_TASK) for _ in _RULES]
+    if sorted(rule for rule, _ in dues) != list(range(len(_RULES))):
+        raise SnapshotError("снимок поврежден: неизвестное правило")
+    species = []
+    for _ in range(reader.unpack(_COUNT)[0]):
+        name, description, image = (reader.text(), reader.text(),
+                                    reader.text())
+        parameters = {
+            parameter: None if value != value
+            else int(value) if value.is_integer() else value
+            for parameter, value in zip(SPECIES_PARAMETERS,
+                                        reader.unpack(_SPECIES))}
+        species.append(aquarium.add_species(name, description, image,
+                                            **parameters))
+
+    count, = reader.unpack(_COUNT)
+    if count and not species:
+        raise SnapshotError("снимок поврежден: рыбы без видов")
+    # Рыбы добавляются одним пакетом, затем массивы заменяются целиком
+    if count:
+        aquarium.add_fishes(np.zeros(count), np.zeros(count), species[0])
+    for owner, name, dtype, rows in _ARRAYS:
+        shape = (rows, count) if rows else (count,)
+        size = np.dtype(dtype).itemsize * int(np.prod(shape))
+        array = getattr(getattr(aquarium, owner), name)
+        array[..., :count] = np.frombuffer(
+            reader.take(size), dtype=dtype).reshape(shape)
+    if count and int(aquarium.population.kind[:count].max()) >= len(species):
+        raise SnapshotError("снимок поврежден: неизвестный вид рыбы")
+    # Массивы заменены целиком, сводку пересчитываем по ним
+    aquarium.stats.rebuild()
+
+    for _ in range(reader.unpack(_COUNT)[0]):
+        aquarium.add_food(*reader.unpack(_FOOD))
+
+    aquarium.scheduler.time = time
+    aquarium.moves_done = moves_done
+    aquarium.food_dropped = food_dropped
+    aquarium.food_eaten = food_eaten
+    aquarium.water_cleanliness = water
+    aquarium.aquarium_cleanliness = cleanliness
+    tasks = _rule_tasks(aquarium)
+    for rule, due in dues:
+        aquarium.scheduler.reschedule(tasks[_RULES[rule]], due)
+    return aquarium
+
+
+def write_file(path, data):
+    """Атомарно записывает данные в файл через временный файл."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+    os.replace(temporary, path)
+
+
+def save(aquarium, path, compress=True):
+    """Записывает снимок аквариума в файл."""
+    write_file(path, dumps(aquarium, compress))
+
+
+def load(path):
+    """Читает снимок аквариума из файла и возвращает аквариум."""
+    with open(path, "rb") as file:
+        return loads(file.read())
+
+
+class Autosaver:
+    """Запись снимков в фоновом потоке.
+
+    Данные снимка собираются в вызывающем потоке (это быстро и не требует
+    блокировок модели), а сжатие и запись на диск выполняет фоновый поток.
+    Если поток не успевает, незаписанный снимок заменяется более новым.
+    """
+
+    def __init__(self, path, compress=True):
+        """Создает автосохранение в файл path и запускает поток записи."""
+        self.path = path  # Файл снимка
+        self.compress = compress  # Флаг сжатия снимков
+        self.saved = 0  # Количество записанных снимков
+        self.error = None  # Последняя ошибка записи
+        # Очередь из одного снимка: новый снимок вытесняет старый
+        self.pending = queue.Queue(maxsize=1)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, aquarium):
+        """Ставит снимок текущего состояния аквариума в очередь записи."""
+        payload = encode(aquarium)
+        try:
+            self.pending.get_nowait()
+        except queue.Empty:
+            pass
+        self.pending.put(payload)
+
+    def _run(self):
+        """Записывает снимки из очереди, пока не придет None."""
+        while True:
+            payload = self.pending.get()
+            if payload is None:
+                return
+            try:
+                write_file(self.path, pack(payload, self.compress))
+                self.saved += 1
+            except OSError as error:
+                self.error = error
+
+    def close(self, aquarium=None):
+        """Записывает последний снимок и останавливает поток."""
+        if aquarium is not None:
+            self.submit(aquarium)
+        self.pending.put(None)
+        self.thread.join()
@@ -0,0 +1,338 @@
+"""Пространственный индекс на равномерной сетке.
+
+Сцена делится на квадратные ячейки, и каждый объект хранится в ячейке,
+в которую попадает его точка. Индекс хранится между вызовами и
+обновляется при движении объектов: меняется только положение объектов,
+сменивших ячейку, без сортировки всех объектов заново.
+
+Объекты лежат в массиве order по порядку ячеек, а внутри ячейки - по
+номерам, поэтому содержимое индекса зависит только от текущих
+координат, а не от истории движения (индекс, построенный заново после
+загрузки снимка, совпадает с обновлявшимся). Для ячеек прямоугольника,
+покрывающего все объекты, хранятся начало в order и количество
+объектов, так что объекты ячейки находятся за O(1).
+
+Запросы обрабатывают сразу все точки, переданные массивами NumPy, без
+цикла на Python по точкам: для каждой точки просматриваются объекты
+ее ячейки и восьми соседних. Радиус запроса не больше размера ячейки,
+поэтому этого достаточно, и запрос обходится примерно в O(1) на точку
+при равномерной плотности. В плотной стае центр соседей ищется по
+суммам координат ячеек, без перебора объектов.
+"""
+
+import numpy as np
+
+# Наибольшее количество пар (точка запроса, объект), обрабатываемых за
+# один раз; ограничивает память под расстояния в плотной стае
+PAIR_BLOCK = 1 << 20
+# Наибольшее количество объектов в ячейке и восьми соседних, при котором
+# соседи объекта ищутся точно, по расстоянию (см. crowd_centers)
+CROWD_EXACT_LIMIT = 64
+
+
+class SpatialGrid:
+    """Равномерная сетка для поиска ближайших объектов и соседей."""
+
+    def __init__(self, cell_size):
+        """Создает пустую сетку с ячейками размера cell_size.
+
+        Ячейки меньше 1 не используются: точный поиск на таком
+        расстоянии обходится так же с ячейками размера 1.
+        """
+        self.cell_size = max(cell_size, 1)  # Размер ячейки
+        self.xs = np.empty(0)  # Координаты объектов
+        self.ys = np.empty(0)
+        # Столбцы и строки ячеек объектов
+        self.columns = np.empty(0, dtype=np.int64)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.cells = np.empty(0, dtype=np.int64)  # Номера ячеек объектов
+        # Номера объектов по порядку ячеек, внутри ячейки - по номерам
+        self.order = np.empty(0, dtype=np.int64)
+        # Прямоугольник ячеек: первый столбец и строка, ширина и высота.
+        # Вокруг объектов оставляется рамка в одну ячейку, чтобы соседи
+        # любой занятой ячейки лежали внутри прямоугольника
+        self.origin = (0, 0)
+        self.shape = (0, 0)
+        # Начало ячейки в order и количество объектов в ней
+        self.starts = np.zeros(0, dtype=np.int64)
+        self.sizes = np.zeros(0, dtype=np.int64)
+        self.rebuilds = 0  # Количество построений индекса заново
+
+    def __len__(self):
+        """Возвращает количество объектов в сетке."""
+        return len(self.xs)
+
+    def _cell_coordinates(self, xs, ys):
+        """Возвращает столбцы и строки ячеек точек."""
+        return (np.floor_divide(xs, self.cell_size).astype(np.int64),
+                np.floor_divide(ys, self.cell_size).astype(np.int64))
+
+    def _number(self, columns, rows):
+        """Возвращает номера ячеек в прямоугольнике (-1 - вне его)."""
+        column0, row0 = self.origin
+        width, height = self.shape
+        columns = columns - column0
+        rows = rows - row0
+        inside = ((columns >= 0) & (columns < width)
+                  & (rows >= 0) & (rows < height))
+        return np.where(inside, rows * width + columns, -1)
+
+    def _interior(self, columns, rows):
+        """Проверяет, что ячейки лежат внутри рамки прямоугольника."""
+        column0, row0 = self.origin
+        width, height = self.shape
+        return bool(len(columns) == 0 or (
+            columns.min() > column0 and columns.max() < column0 + width - 1
+            and rows.min() > row0 and rows.max() < row0 + height - 1))
+
+    def _rebuild(self):
+        """Строит индекс заново по текущим ячейкам объектов."""
+        self.rebuilds += 1
+        columns, rows = self.columns, self.rows
+        if len(columns):
+            self.origin = (int(columns.min()) - 1, int(rows.min()) - 1)
+            self.shape = (int(columns.max()) - self.origin[0] + 2,
+                          int(rows.max()) - self.origin[1] + 2)
+        else:
+            self.origin = (0, 0)
+            self.shape = (0, 0)
+        self.cells = self._number(columns, rows)
+        self.order = np.argsort(self.cells, kind="stable")
+        self._count_cells()
+
+    def _count_cells(self):
+        """Пересчитывает начала и размеры ячеек по номерам объектов."""
+        self.sizes = np.bincount(self.cells,
+                                 minlength=self.shape[0] * self.shape[1])
+        self.starts = np.cumsum(self.sizes) - self.sizes
+
+    def update(self, xs, ys):
+        """Переносит объекты в точки с координатами xs и ys.
+
+        Объект с номером i получает координаты xs[i], ys[i]. Если
+        количество объектов изменилось или объект вышел за прямоугольник
+        ячеек, индекс строится заново; иначе в order переставляются
+        только объекты, сменившие ячейку.
+        """
+        xs = np.array(xs, dtype=np.float64)
+        ys = np.array(ys, dtype=np.float64)
+        columns, rows = self._cell_coordinates(xs, ys)
+        rebuild = len(xs) != len(self.xs)
+        self.xs, self.ys = xs, ys
+        if rebuild:
+            self.columns, self.rows = columns, rows
+            self._rebuild()
+            return
+        moved = np.flatnonzero((columns != self.columns)
+                               | (rows != self.rows))
+        self.columns, self.rows = columns, rows
+        if len(moved) == 0:
+            return
+        if not self._interior(columns[moved], rows[moved]):
+            self._rebuild()
+            return
+        self.cells[moved] = self._number(columns[moved], rows[moved])
+        # Оставшиеся объекты уже упорядочены; сменившие ячейку
+        # вставляются на свои места по ключу (ячейка, номер)
+        count = len(xs)
+        staying = np.ones(count, dtype=bool)
+        staying[moved] = False
+        kept = self.order[staying[self.order]]
+        keys = self.cells[kept] * count + kept
+        moved_keys = self.cells[moved] * count + moved
+        ranked = np.argsort(moved_keys)
+        moved, moved_keys = moved[ranked], moved_keys[ranked]
+        self.order = np.insert(kept, np.searchsorted(keys, moved_keys),
+                               moved)
+        self._count_cells()
+
+    def _ranges(self, xs, ys):
+        """Находит объекты ячейки каждой точки и восьми соседних.
+
+        Ячейки одной строки идут в order подряд, поэтому на точку
+        приходится три отрезка order - по одному на строку. Возвращает
+        начала и длины отрезков (массивы размера количество точек x 3).
+        """
+        count = len(xs)
+        if len(self.xs) == 0 or count == 0:
+            empty = np.zeros((count, 3), dtype=np.int64)
+            return empty, empty
+        column0, row0 = self.origin
+        width, height = self.shape
+        columns, rows = self._cell_coordinates(xs, ys)
+        columns -= column0
+        rows = rows[:, None] + np.arange(-1 - row0, 2 - row0)
+        left = np.clip(columns - 1, 0, width - 1)[:, None]
+        right = np.clip(columns + 1, 0, width - 1)[:, None]
+        inside = ((rows >= 0) & (rows < height)
+                  & (columns >= -1)[:, None] & (columns <= width)[:, None])
+        rows = np.clip(rows, 0, height - 1) * width
+        begins = self.starts[rows + left]
+        ends = self.starts[rows + right] + self.sizes[rows + right]
+        return begins, np.where(inside, ends - begins, 0)
+
+    @staticmethod
+    def _pairs(begins, lengths):
+        """Перебирает пары (точка запроса, объект) по отрезкам order.
+
+        begins и lengths - отрезки точек (см. _ranges). Возвращает блоки
+        пар: срез номеров точек блока, количество пар каждой из этих
+        точек и места объектов в order. Пары идут по порядку точек.
+        """
+        totals = lengths.sum(axis=1)
+        # Точки делятся на блоки так, чтобы пар в блоке было не больше
+        # PAIR_BLOCK (точка с большим количеством пар - отдельный блок)
+        bounds = np.cumsum(totals)
+        first = 0
+        while first < len(totals):
+            limit = (bounds[first - 1] if first else 0) + PAIR_BLOCK
+            last = max(first + 1,
+                       int(np.searchsorted(bounds, limit, side="right")))
+            block_lengths = lengths[first:last].ravel()
+            total = int(block_lengths.sum())
+            if total:
+                # Сдвиг от места пары в блоке к месту объекта в order
+                shifts = begins[first:last].ravel() - (
+                    np.cumsum(block_lengths) - block_lengths)
+                positions = (np.arange(total)
+                             + np.repeat(shifts, block_lengths))
+                yield slice(first, last), totals[first:last], positions
+            first = last
+
+    def nearest(self, xs, ys, radius, allowed=None):
+        """Находит для каждой точки ближайший объект в пределах radius.
+
+        radius не больше размера ячейки. allowed - маска объектов, среди
+        которых ведется поиск (по умолчанию все). Возвращает номера
+        объектов (-1 - объекта в пределах radius нет) и квадраты
+        расстояний до них (inf для точек без объекта). Из объектов на
+        одинаковом расстоянии выбирается объект с меньшим номером.
+        """
+        if radius > self.cell_size:
+            raise ValueError("радиус поиска больше размера ячейки")
+        count = len(xs)
+        targets = np.full(count, -1)
+        distances = np.full(count, np.inf)
+        limit = radius * radius
+        for block, counts, positions in self._pairs(*self._ranges(xs, ys)):
+            queries = np.repeat(np.arange(block.start, block.stop), counts)
+            objects = self.order[positions]
+            dx = self.xs[objects] - xs[queries]
+            dy = self.ys[objects] - ys[queries]
+            squared = dx * dx + dy * dy
+            inside = squared <= limit
+            if allowed is not None:
+                inside &= allowed[objects]
+            queries = queries[inside]
+            objects = objects[inside]
+            squared = squared[inside]
+            # Пары по возрастанию точки, расстояния и номера объекта:
+            # первая пара каждой точки - ее ближайший объект
+            ranked = np.lexsort((objects, squared, queries))
+            queries = queries[ranked]
+            first = np.ones(len(queries), dtype=bool)
+            first[1:] = queries[1:] != queries[:-1]
+            targets[queries[first]] = objects[ranked][first]
+            distances[queries[first]] = squared[ranked][first]
+        return targets, distances
+
+    def within(self, xs, ys, radius):
+        """Находит объекты на расстоянии не больше radius от точек.
+
+        radius не больше размера ячейки. Возвращает пары: номера точек
+        и номера объектов рядом с ними.
+        """
+        if radius > self.cell_size:
+            raise ValueError("радиус поиска больше размера ячейки")
+        limit = radius * radius
+        found_queries = [np.empty(0, dtype=np.int64)]
+        found_objects = [np.empty(0, dtype=np.int64)]
+        for block, counts, positions in self._pairs(*self._ranges(xs, ys)):
+            queries = np.repeat(np.arange(block.start, block.stop), counts)
+            objects = self.order[positions]
+            dx = self.xs[objects] - xs[queries]
+            dy = self.ys[objects] - ys[queries]
+            inside = dx * dx + dy * dy <= limit
+            found_queries.append(queries[inside])
+            found_objects.append(objects[inside])
+        return np.concatenate(found_queries), np.concatenate(found_objects)
+
+    def crowd_centers(self, radius):
+        """Находит центры соседей каждого объекта сетки.
+
+        Соседи - остальные объекты на расстоянии не больше radius (не
+        больше размера ячейки). Если в ячейке объекта и восьми соседних
+        больше CROWD_EXACT_LIMIT объектов, расстояния не проверяются, и
+        соседями считаются все объекты этих ячеек: в плотной стае центр
+        находится по суммам координат за O(1), а не перебором сотен
+        объектов. Возвращает маску объектов, у которых есть соседи, и
+        координаты центров их соседей (для объектов без соседей - сами
+        объекты).
+        """
+        if radius > self.cell_size:
+            raise ValueError("радиус поиска больше размера ячейки")
+        count = len(self.xs)
+        limit = radius * radius
+        # Объекты перебираются в порядке order: соседи каждого объекта
+        # лежат рядом в памяти, и места в order служат номерами
+        xs = self.xs[self.order]
+        ys = self.ys[self.order]
+        begins, lengths = self._ranges(xs, ys)
+        totals = lengths.sum(axis=1)
+        # Каждый объект попадает в отрезки своей ячейки, его вычитаем
+        others = (totals - 1).astype(np.float64)
+        ends = begins + lengths
+        prefix_x = np.concatenate(([0.0], np.cumsum(xs)))
+        prefix_y = np.concatenate(([0.0], np.cumsum(ys)))
+        sum_x = (prefix_x[ends] - prefix_x[begins]).sum(axis=1) - xs
+        sum_y = (prefix_y[ends] - prefix_y[begins]).sum(axis=1) - ys
+        exact = np.flatnonzero(totals <= CROWD_EXACT_LIMIT)
+        for block, counts, positions in self._pairs(begins[exact],
+                                                    lengths[exact]):
+            queries = exact[block]
+            near_x = xs[positions]
+            near_y = ys[positions]
+            squared = near_x - np.repeat(xs[queries], counts)
+            squared *= squared
+            dy = near_y - np.repeat(ys[queries], counts)
+            dy *= dy
+            squared += dy
+            own = np.repeat(queries, counts)
+            inside = (squared <= limit) & (positions != own)
+            near_x *= inside
+            near_y *= inside
+            # Ячейка объекта всегда среди его отрезков, поэтому у каждой
+            # точки есть пары и отрезки пар точек не пусты
+            offsets = np.cumsum(counts) - counts
+            others[queries] = np.add.reduceat(inside.view(np.uint8),
+                                              offsets, dtype=np.float64)
+            sum_x[queries] = np.add.reduceat(near_x, offsets)
+            sum_y[queries] = np.add.reduceat(near_y, offsets)
+        crowded = np.empty(count, dtype=bool)
+        centers_x = np.empty(count)
+        centers_y = np.empty(count)
+        crowded[self.order] = others > 0
+        divisor = np.maximum(others, 1)
+        centers_x[self.order] = np.where(others > 0, sum_x / divisor, xs)
+        centers_y[self.order] = np.where(others > 0, sum_y / divisor, ys)
+        return crowded, centers_x, centers_y
+
+    def crowded(self, xs, ys):
+        """Проверяет, есть ли точки в одной или соседних ячейках.
+
+        Если таких точек нет, ни у одной точки нет соседей на расстоянии
+        размера ячейки, и поиск соседей можно пропустить. Сетка при этом
+        не обновляется. Попарно сравниваются ячейки не более
+        CROWD_EXACT_LIMIT точек; при большем количестве точки считаются
+        тесными без проверки.
+        """
+        if len(xs) < 2:
+            return False
+        if len(xs) > CROWD_EXACT_LIMIT:
+            return True
+        columns, rows = self._cell_coordinates(np.asarray(xs),
+                                               np.asarray(ys))
+        near = ((np.abs(columns[:, None] - columns) <= 1)
+                & (np.abs(rows[:, None] - rows) <= 1))
+        # Каждая точка соседствует сама с собой
+        return bool(near.sum() > len(xs))
@@ -0,0 +1,172 @@
+"""Описание видов рыб и начального заселения аквариума.
+
+Виды и их численность задаются файлом assets/species.json:
+
+    {
+      "species": [
+        {
+          "name": "Карась",                      название вида
+          "image": "fish1.gif",                  спрайт в каталоге assets
+          "description": "Karas_description.txt",  файл с описанием
+          "speed": 1.2,                          скорость движения
+          "health_decay": 2,                     потеря здоровья за период
+          "hunger_rate": 1,                      рост голода за период
+          "positions": [[200, 200]],             рыбы на заданных местах
+          "count": 100                           рыбы в случайных местах
+        }
+      ]
+    }
+
+Обязательно только название. Параметры правил, которые не заданы,
+берутся из параметров аквариума (simulation.Settings). Описание читается
+только при первом обращении к нему, а виды без рыб не регистрируются в
+аквариуме, поэтому их изображения и описания не загружаются. Рыбы каждого
+вида добавляются одним пакетом. Модуль не зависит от Qt.
+"""
+
+import json
+from functools import partial
+
+from population import SPECIES_PARAMETERS
+from simulation import INTEGER_SETTINGS, check_setting
+
+# Имя файла с описанием видов в каталоге assets
+SPECIES_FILE = "species.json"
+
+# Константы аквариума, которые параметры вида заменяют для его рыб.
+# Параметр проверяется так же, как константа (см. check_setting)
+_PARAMETER_SETTINGS = {"speed": "FISH_SPEED",
+                       "health_decay": "FISH_HEALTH_DECAY",
+                       "hunger_rate": "FISH_HUNGER_RATE"}
+
+
+class ConfigError(ValueError):
+    """Ошибка в описании видов: неизвестное поле или неверное значение."""
+
+
+class SpeciesConfig:
+    """Описание одного вида и его начальной численности."""
+
+    def __init__(self, name, image=None, description=None, positions=(),
+                 count=0, **parameters):
+        """Создает описание вида name.
+
+        parameters - параметры правил вида (см. SPECIES_PARAMETERS).
+        """
+        self.name = name  # Название вида
+        self.image = image  # Имя изображения в каталоге assets
+        self.description = description  # Имя файла с описанием
+        # Места рыб, добавляемых в заданные точки
+        self.positions = [tuple(position) for position in positions]
+        self.count = count  # Количество рыб в случайных местах
+        # Параметры правил вида (None - из параметров аквариума)
+        self.parameters = {name: parameters.get(name)
+                           for name in SPECIES_PARAMETERS}
+
+    @property
+    def total(self):
+        """Начальное количество рыб вида."""
+        return len(self.positions) + self.count
+
+
+def _check(entry, index):
+    """Проверяет описание вида из файла и возвращает SpeciesConfig."""
+    if not isinstance(entry, dict):
+        raise ConfigError(f"вид {index}: ожидается объект")
+    known = {"name", "image", "description", "positions", "count"}
+    unknown = set(entry) - known - set(SPECIES_PARAMETERS)
+    if unknown:
+        raise ConfigError(
+            f"вид {index}: неизвестные поля {', '.join(sorted(unknown))}")
+    if not isinstance(entry.get("name"), str) or not entry["name"]:
+        raise ConfigError(f"вид {index}: не задано название")
+    name = entry["name"]
+    for field in ("image", "description"):
+        if not isinstance(entry.get(field, ""), str):
+            raise ConfigError(f"{name}: {field} должно быть строкой")
+    count = entry.get("count", 0)
+    if isinstance(count, bool) or not isinstance(count, int) or count < 0:
+        raise ConfigError(f"{name}: count должно быть целым, не меньше 0")
+    positions = entry.get("positions", [])
+    if not isinstance(positions, list) or not all(
+            isinstance(position, list) and len(position) == 2
+            and all(isinstance(value, (int, float)) for value in position)
+            for position in positions):
+        raise ConfigError(f"{name}: positions должно быть списком пар чисел")
+    parameters = {}
+    for field, setting in _PARAMETER_SETTINGS.items():
+        value = entry.get(field)
+        if value is None:
+            continue
+        try:
+            check_setting(setting, value)
+        except ValueError as error:
+            raise ConfigError(f"{name}: неверное значение {field}: {error}")
+        if setting in INTEGER_SETTINGS:
+            value = int(value)
+        parameters[field] = value
+    return SpeciesConfig(**dict(entry, **parameters))
+
+
+def loads(text):
+    """Разбирает описание видов из строки JSON и возвращает список видов."""
+    try:
+        data = json.loads(text)
+    except ValueError as error:
+        raise ConfigError(f"файл видов не является JSON: {error}")
+    if not isinstance(data, dict) or not isinstance(data.get("species"),
+                                                    list):
+        raise ConfigError("ожидается объект со списком species")
+    configs = [_check(entry, index)
+               for index, entry in enumerate(data["species"])]
+    names = [config.name for config in configs]
+    if len(set(names)) != len(names):
+        raise ConfigError("названия видов повторяются")
+    return configs
+
+
+def load(path):
+    """Читает описание видов из файла path."""
+    with open(path, "r", encoding="utf-8") as file:
+        return loads(file.read())
+
+
+def used_assets(configs):
+    """Возвращает имена изображений видов, у которых есть рыбы."""
+    return sorted({config.image for config in configs
+                   if config.total and config.image})
+
+
+def populate(aquarium, configs, read_text=None, image_size=None,
+             count=None):
+    """Регистрирует виды в аквариуме и добавляет их рыб.
+
+    read_text(имя) читает файл описания; он вызывается только при
+    первом обращении к описанию вида (None - описания пустые).
+    image_size(имя) возвращает размер изображения вида (ширину и высоту).
+    Если задан count, вместо численности из описания в случайные места
+    добавляется по count рыб каждого вида. Возвращает список
+    добавленных рыб.
+    """
+    fishes = []
+    for config in configs:
+        number = config.total if count is None else count
+        if count is None and number == 0:
+            # Вид без рыб ничего не стоит: он даже не регистрируется
+            continue
+        description = ""
+        if read_text is not None and config.description:
+            description = partial(read_text, config.description)
+        species = aquarium.add_species(config.name, description,
+                                       config.image, **config.parameters)
+        width = height = 0
+        if image_size is not None and config.image:
+            width, height = image_size(config.image)
+        if count is not None:
+            fishes += aquarium.spawn_fish(species, count, width, height)
+            continue
+        if config.positions:
+            xs, ys = zip(*config.positions)
+            fishes += aquarium.add_fishes(xs, ys, species, width, height)
+        fishes += aquarium.spawn_fish(species, config.count, width, height)
+    return fishes
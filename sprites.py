@@ -0,0 +1,66 @@
+"""Общий кэш масштабированных изображений.
+
+Масштабирование QPixmap - это полная передискретизация картинки, поэтому
+готовые спрайты хранятся в кэше по ключу (ресурс, размер, отражение) и
+переиспользуются всеми рыбами и гранулами корма.
+"""
+
+from collections import OrderedDict
+
+from PyQt5.QtGui import QPixmap, QTransform
+
+# Максимальное количество масштабированных спрайтов в кэше
+SPRITE_CACHE_SIZE = 64
+
+
+class SpriteCache:
+    """LRU-кэш спрайтов, общий для всех элементов сцены."""
+
+    def __init__(self, capacity=SPRITE_CACHE_SIZE, loader=QPixmap):
+        """Создает кэш заданной емкости.
+
+        loader - функция, возвращающая исходное изображение по имени ресурса.
+        """
+        self.capacity = capacity  # Максимальное число спрайтов
+        self.loader = loader  # Загрузчик исходных изображений
+        self.originals = {}  # Исходные изображения по имени ресурса
+        self.sprites = OrderedDict()  # Готовые спрайты в порядке LRU
+        self.hits = 0  # Количество попаданий в кэш
+        self.misses = 0  # Количество промахов кэша
+
+    def original(self, name):
+        """Возвращает исходное изображение, загружая его один раз."""
+        pixmap = self.originals.get(name)
+        if pixmap is None:
+            pixmap = self.loader(name)
+            self.originals[name] = pixmap
+        return pixmap
+
+    def get(self, name, width=None, height=None, mirrored=False):
+        """Возвращает спрайт заданного размера и ориентации.
+
+        Если размер не указан, используется размер исходного изображения.
+        """
+        key = (name, width, height, mirrored)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        sprite = self.original(name)
+        if width is not None and height is not None:
+            sprite = sprite.scaled(int(width), int(height))
+        if mirrored:
+            sprite = sprite.transformed(QTransform().scale(-1, 1))
+
+        self.sprites[key] = sprite
+        # Вытесняем давно не использованные спрайты
+        while len(self.sprites) > self.capacity:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        """Очищает кэш спрайтов."""
+        self.sprites.clear()
@@ -0,0 +1,47 @@
+"""Замер этапов запуска приложения.
+
+main.py импортирует этот модуль раньше остальных модулей приложения,
+поэтому момент его импорта служит началом этапа импорта. Этапы
+отмечаются по мере запуска, а после первой отрисовки аквариума окно
+печатает их длительность. Модуль не зависит от Qt.
+"""
+
+import time
+
+# Момент импорта модуля: начало запуска приложения
+STARTED = time.perf_counter()
+
+# Подписи этапов запуска
+STARTUP_PHASES = {
+    "import": "Импорт модулей",
+    "qt": "Создание QApplication",
+    "assets": "Загрузка ресурсов",
+    "scene": "Построение сцены",
+    "ui": "Интерфейс окна",
+    "show": "Показ окна",
+    "first_paint": "Первая отрисовка",
+}
+
+
+class StartupProfile:
+    """Длительности этапов запуска."""
+
+    def __init__(self, start=STARTED):
+        """Создает замер, отсчитываемый от момента start."""
+        self.start = start  # Начало запуска (perf_counter, с)
+        self.last = start  # Конец последнего отмеченного этапа
+        self.phases = []  # Пары (этап, длительность в мс)
+
+    def mark(self, phase):
+        """Отмечает окончание этапа phase."""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def lines(self):
+        """Возвращает строки с длительностью этапов и всего запуска."""
+        lines = [f"{STARTUP_PHASES.get(phase, phase)}: {ms:.1f} мс"
+                 for phase, ms in self.phases]
+        lines.append(f"Всего до первого кадра: "
+                     f"{(self.last - self.start) * 1000:.1f} мс")
+        return lines
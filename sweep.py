@@ -0,0 +1,180 @@
+"""Перебор параметров аквариума на всех ядрах процессора.
+
+Каждая комбинация значений констант прогоняется пакетным режимом
+(batch.run) в отдельном процессе пула. Результаты печатаются по мере
+готовности, а в конце сводятся в одну таблицу со средними по зернам.
+
+Пример: подбор скорости рыб и скорости загрязнения воды
+
+    python sweep.py --hours 24 --seeds 3 \\
+        --set FISH_SPEED=1.2,2.4 --set TIMER_CLEAN_WATER=60000,120000
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import batch
+
+# Показатели, которые сводятся в итоговую таблицу
+TABLE_METRICS = [
+    "health_mean", "hunger_mean", "starving", "dead",
+    "water_cleanliness", "aquarium_cleanliness", "food_eaten",
+]
+
+
+def parse_grid(text):
+    """Разбирает строку «ИМЯ=v1,v2,...» в пару (имя, [значения])."""
+    name, _, values = text.partition("=")
+    settings = [batch.parse_setting(f"{name}={value}")
+                for value in values.split(",")]
+    return settings[0][0], [value for _, value in settings]
+
+
+def build_jobs(grid, seeds, **options):
+    """Строит список прогонов: все комбинации значений для каждого зерна.
+
+    options передаются в batch.run без изменений.
+    """
+    names = [name for name, _ in grid]
+    jobs = []
+    for values in itertools.product(*(values for _, values in grid)):
+        for seed in seeds:
+            jobs.append(dict(options, seed=seed,
+                             settings=dict(zip(names, values))))
+    return jobs
+
+
+def run_job(job):
+    """Выполняет один прогон в процессе пула и возвращает его сводку."""
+    return batch.run(report=None, **job)
+
+
+def sweep(jobs, workers=None, on_result=None):
+    """Распределяет прогоны по процессам и возвращает пары (прогон, сводка).
+
+    Функция on_result вызывается для каждого прогона сразу после его
+    завершения, в порядке готовности.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            result = (job, future.result())
+            results.append(result)
+            if on_result is not None:
+                on_result(result, len(results), len(jobs))
+    return results
+
+
+def describe(settings):
+    """Возвращает короткую подпись набора параметров."""
+    return " ".join(f"{name.upper()}={value}"
+                    for name, value in settings.items()) or "по умолчанию"
+
+
+def aggregate(results):
+    """Сводит результаты в строки таблицы: средние по зернам.
+
+    Каждая строка - словарь с параметрами, числом прогонов и средними
+    значениями показателей TABLE_METRICS.
+    """
+    groups = {}
+    for job, summary in results:
+        key = tuple(sorted(job["settings"].items()))
+        groups.setdefault(key, []).append(summary)
+
+    rows = []
+    for key in sorted(groups):
+        summaries = groups[key]
+        row = dict(key)
+        row["runs"] = len(summaries)
+        for metric in TABLE_METRICS:
+            row[metric] = sum(s[metric] for s in summaries) / len(summaries)
+        rows.append(row)
+    return rows
+
+
+def format_table(rows):
+    """Форматирует строки таблицы в виде выровненного текста."""
+    if not rows:
+        return ""
+    columns = list(rows[0])
+    cells = [[f"{row[c]:.2f}" if isinstance(row[c], float) else str(row[c])
+              for c in columns] for row in rows]
+    widths = [max(len(c), *(len(line[i]) for line in cells))
+              for i, c in enumerate(columns)]
+    lines = ["  ".join(c.rjust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.rjust(w) for v, w in zip(line, widths))
+              for line in cells]
+    return "\n".join(lines)
+
+
+def write_csv(path, rows):
+    """Записывает строки таблицы в CSV-файл."""
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    """Точка входа перебора параметров."""
+    parser = argparse.ArgumentParser(
+        description="Перебор параметров аквариума в нескольких процессах")
+    parser.add_argument("--hours", type=float, required=True,
+                        help="длительность каждого прогона в модельных часах")
+    parser.add_argument("--set", type=parse_grid, action="append",
+                        default=[], metavar="ИМЯ=v1,v2,...",
+                        help="значения константы для перебора")
+    parser.add_argument("--seeds", type=int, default=1,
+                        help="количество зерен на каждую комбинацию")
+    parser.add_argument("--fish", type=int, default=None,
+                        help="количество рыб каждого вида")
+    parser.add_argument("--feed-every", type=float, default=None,
+                        help="кормить рыб каждые N минут")
+    parser.add_argument("--clean-every", type=float, default=None,
+                        help="чистить аквариум каждые N минут")
+    parser.add_argument("--water-every", type=float, default=None,
+                        help="менять воду каждые N минут")
+    parser.add_argument("--fast-steering", action="store_true",
+                        help="выбирать направление рыб каждые "
+                             f"{batch.BATCH_FISH_BEHAVIOUR} мс вместо "
+                             "интервала окна")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="количество процессов (по умолчанию все ядра)")
+    parser.add_argument("--output", default=None,
+                        help="записать итоговую таблицу в CSV-файл")
+    args = parser.parse_args(argv)
+
+    jobs = build_jobs(args.set, range(args.seeds), hours=args.hours,
+                      fish=args.fish, feed_every=args.feed_every,
+                      clean_every=args.clean_every,
+                      water_every=args.water_every,
+                      fast_steering=args.fast_steering)
+
+    def on_result(result, done, total):
+        """Печатает результат прогона сразу после его завершения."""
+        job, summary = result
+        print(f"[{done}/{total}] {describe(job['settings'])} "
+              f"seed={job['seed']}: здоровье {summary['health_mean']:.1f}, "
+              f"голод {summary['hunger_mean']:.1f}, "
+              f"вода {summary['water_cleanliness']}, "
+              f"аквариум {summary['aquarium_cleanliness']} "
+              f"({summary['wall_seconds']:.1f} с)", flush=True)
+
+    start = time.perf_counter()
+    rows = aggregate(sweep(jobs, args.workers, on_result))
+    print(f"\nПрогонов: {len(jobs)}, "
+          f"время: {time.perf_counter() - start:.1f} с\n")
+    print(format_table(rows))
+    if args.output and rows:
+        write_csv(args.output, rows)
+
+
+if __name__ == "__main__":
+    main()
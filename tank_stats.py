@@ -0,0 +1,149 @@
+"""Сводная статистика рыб, обновляемая вместе с состоянием аквариума.
+
+Здоровье и голод рыб - небольшие целые числа, поэтому для каждого из них
+хранится количество рыб с каждым значением. Правила аквариума меняют
+значения всех рыб одинаково (здоровье уменьшается на 2, голод растет
+на 1), и такое изменение сдвигает счетчики, не перебирая рыб. Среднее,
+минимум, максимум, число голодающих и распределение по диапазонам
+вычисляются по счетчикам, поэтому их стоимость не зависит от численности
+рыб. Модуль не зависит от Qt.
+"""
+
+import numpy as np
+
+# Ширина диапазона значений в распределениях сводки
+STATS_BUCKET = 10
+
+
+class ValueCounts:
+    """Количество рыб с каждым целым значением показателя."""
+
+    def __init__(self):
+        """Создает пустые счетчики."""
+        self.counts = {}  # Количество рыб по значению
+        self.count = 0  # Количество рыб
+        self.total = 0  # Сумма значений
+
+    def add(self, value, number=1):
+        """Учитывает number рыб со значением value."""
+        self.counts[value] = self.counts.get(value, 0) + number
+        self.count += number
+        self.total += value * number
+
+    def remove(self, value, number=1):
+        """Убирает number рыб со значением value."""
+        left = self.counts[value] - number
+        if left:
+            self.counts[value] = left
+        else:
+            del self.counts[value]
+        self.count -= number
+        self.total -= value * number
+
+    def replace(self, old, new):
+        """Учитывает изменение значения одной рыбы с old на new."""
+        if old != new:
+            self.remove(old)
+            self.add(new)
+
+    def shift(self, delta, low=None, high=None):
+        """Сдвигает значения всех рыб на delta в пределах [low, high]."""
+        counts = self.counts
+        self.counts = {}
+        self.count = self.total = 0
+        for value, number in counts.items():
+            value += delta
+            if low is not None:
+                value = max(low, value)
+            if high is not None:
+                value = min(high, value)
+            self.add(value, number)
+
+    def clear(self):
+        """Убирает всех рыб."""
+        self.counts = {}
+        self.count = self.total = 0
+
+    @property
+    def mean(self):
+        """Среднее значение."""
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def min(self):
+        """Наименьшее значение (0 без рыб)."""
+        return min(self.counts) if self.counts else 0
+
+    @property
+    def max(self):
+        """Наибольшее значение (0 без рыб)."""
+        return max(self.counts) if self.counts else 0
+
+    def at_least(self, value):
+        """Возвращает количество рыб со значением не меньше value."""
+        return sum(number for key, number in self.counts.items()
+                   if key >= value)
+
+    def buckets(self, width=STATS_BUCKET):
+        """Возвращает распределение по диапазонам ширины width.
+
+        Ключ словаря - нижняя граница диапазона.
+        """
+        result = {}
+        for value, number in self.counts.items():
+            start = value // width * width
+            result[start] = result.get(start, 0) + number
+        return dict(sorted(result.items()))
+
+
+class AquariumStats:
+    """Сводная статистика здоровья и голода рыб аквариума."""
+
+    def __init__(self, aquarium):
+        """Создает статистику для аквариума aquarium."""
+        self.aquarium = aquarium  # Аквариум, к которому относится сводка
+        self.health = ValueCounts()  # Счетчики здоровья
+        self.hunger = ValueCounts()  # Счетчики голода
+
+    def rebuild(self):
+        """Пересчитывает счетчики по массивам популяции.
+
+        Нужен только после замены массивов целиком (например, при
+        восстановлении из снимка) и перебирает всех рыб.
+        """
+        population = self.aquarium.population
+        count = population.count
+        for counts, array in ((self.health, population.health),
+                              (self.hunger, population.hunger)):
+            counts.clear()
+            values, numbers = np.unique(array[:count], return_counts=True)
+            for value, number in zip(values.tolist(), numbers.tolist()):
+                counts.add(value, number)
+
+    @property
+    def starving(self):
+        """Количество голодающих рыб."""
+        return self.hunger.at_least(self.aquarium.settings.fish_hunger)
+
+    @property
+    def dead(self):
+        """Количество рыб без здоровья."""
+        return self.health.counts.get(0, 0)
+
+    def as_dict(self):
+        """Возвращает сводку в виде словаря."""
+        aquarium = self.aquarium
+        return {
+            "fish": self.health.count,
+            "health_mean": self.health.mean,
+            "health_min": self.health.min,
+            "health_max": self.health.max,
+            "health_buckets": self.health.buckets(),
+            "hunger_mean": self.hunger.mean,
+            "hunger_max": self.hunger.max,
+            "hunger_buckets": self.hunger.buckets(),
+            "starving": self.starving,
+            "dead": self.dead,
+            "water_cleanliness": aquarium.water_cleanliness,
+            "aquarium_cleanliness": aquarium.aquarium_cleanliness,
+        }
@@ -0,0 +1,66 @@
+"""Несколько независимых аквариумов в одном процессе.
+
+Каждый аквариум группы хранит собственное состояние (рыбы, корм,
+чистота, генератор случайных чисел) и собственные правила, но все
+правила зарегистрированы в одном общем планировщике. Группа продвигает
+время один раз на всех, поэтому число очередей и таймеров не растет
+с количеством аквариумов. Общие ресурсы (изображения, описания видов)
+хранятся вне группы, в реестре ресурсов и кэше спрайтов окна. Модуль не
+зависит от Qt.
+"""
+
+from simulation import Aquarium
+from scheduler import Scheduler
+
+
+class TankGroup:
+    """Аквариумы с общим планировщиком и общим модельным временем."""
+
+    def __init__(self, scheduler=None):
+        """Создает пустую группу.
+
+        scheduler - общий планировщик; например, планировщик аквариума,
+        восстановленного из снимка. По умолчанию создается новый.
+        """
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.aquariums = []  # Аквариумы группы по порядку
+
+    def __len__(self):
+        """Возвращает количество аквариумов группы."""
+        return len(self.aquariums)
+
+    def __getitem__(self, index):
+        """Возвращает аквариум с номером index."""
+        return self.aquariums[index]
+
+    @property
+    def time(self):
+        """Общее модельное время группы (в миллисекундах)."""
+        return self.scheduler.time
+
+    def create(self, *args, **kwargs):
+        """Создает аквариум с правилами в общем планировщике.
+
+        Аргументы передаются в конструктор Aquarium.
+        """
+        aquarium = Aquarium(*args, scheduler=self.scheduler, **kwargs)
+        self.aquariums.append(aquarium)
+        return aquarium
+
+    def add(self, aquarium):
+        """Добавляет в группу аквариум, созданный с общим планировщиком."""
+        if aquarium.scheduler is not self.scheduler:
+            raise ValueError("аквариум использует другой планировщик")
+        self.aquariums.append(aquarium)
+        return aquarium
+
+    def step(self, dt):
+        """Продвигает все аквариумы на dt миллисекунд модельного времени.
+
+        Правила всех аквариумов выполняются одним проходом общего
+        планировщика, после чего позиции рыб каждого аквариума
+        приводятся к текущему времени.
+        """
+        self.scheduler.advance(dt)
+        for aquarium in self.aquariums:
+            aquarium.move_fishes()
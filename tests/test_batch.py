@@ -0,0 +1,35 @@
+"""Тесты пакетного прогона (batch.py)."""
+
+import os
+import struct
+
+import pytest
+
+import batch
+import species_config
+
+
+def test_read_image_size_png_and_gif(tmp_path):
+    png = tmp_path / "fish.gif"
+    png.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0\0\0\rIHDR"
+                    + struct.pack(">II", 220, 148))
+    gif = tmp_path / "food.gif"
+    gif.write_bytes(b"GIF89a" + struct.pack("<HH", 438, 450) + b"\0" * 8)
+    assert batch.read_image_size(png) == (220, 148)
+    assert batch.read_image_size(gif) == (438, 450)
+
+
+def test_read_image_size_rejects_unknown_format(tmp_path):
+    image = tmp_path / "main.gif"
+    image.write_bytes(b"\xff\xd8\xff\xe0" + b"\0" * 20)
+    with pytest.raises(ValueError):
+        batch.read_image_size(image)
+
+
+def test_species_sprites_have_size():
+    configs = species_config.load(os.path.join(
+        batch.ASSETS_DIRECTORY, species_config.SPECIES_FILE))
+    for image in species_config.used_assets(configs):
+        width, height = batch.read_image_size(
+            os.path.join(batch.ASSETS_DIRECTORY, image))
+        assert width > 0 and height > 0
@@ -0,0 +1,92 @@
+"""Тесты записи и воспроизведения журнала действий (eventlog.py)."""
+
+import pytest
+
+import batch
+import eventlog
+import snapshot
+from simulation import Aquarium
+
+
+def record_session(path, checkpoint_every=eventlog.CHECKPOINT_EVERY):
+    """Записывает короткий сеанс и возвращает состояния после кадров."""
+    aquarium = Aquarium(seed=3)
+    batch.populate(aquarium, fish=10)
+    recorder = eventlog.Recorder(path, aquarium, checkpoint_every)
+    states = []
+    actions = {
+        5: (aquarium.drop_food, recorder.feed),
+        20: (aquarium.clear_aquarium, recorder.clean),
+        30: (aquarium.change_water, recorder.water),
+    }
+    for tick in range(60):
+        aquarium.step(500)
+        recorder.tick(500)
+        states.append(snapshot.dumps(aquarium))
+        if tick in actions:
+            action, record = actions[tick]
+            action()
+            record()
+        if tick == 40:
+            aquarium.resize(700, 500)
+            recorder.resize(700, 500)
+        if tick == 45:
+            recorder.click(aquarium.fishes[3])
+    recorder.close()
+    return aquarium, states
+
+
+def test_replay_reproduces_session(tmp_path):
+    path = tmp_path / "session.aqlog"
+    aquarium, _ = record_session(path)
+    clicked = []
+    replayed = eventlog.replay(path, on_click=clicked.append)
+    assert snapshot.dumps(replayed) == snapshot.dumps(aquarium)
+    assert [fish.index for fish in clicked] == [3]
+
+
+@pytest.mark.parametrize("tick", [1, 7, 25, 31, 46, 60])
+def test_replay_to_tick_uses_checkpoints(tmp_path, tick):
+    path = tmp_path / "session.aqlog"
+    _, states = record_session(path, checkpoint_every=8)
+    assert len(eventlog.checkpoints(path)) == 1 + 60 // 8
+    replayed = eventlog.replay(path, tick=tick)
+    # Действия после кадра tick относятся к следующим кадрам
+    assert snapshot.dumps(replayed) == states[tick - 1]
+
+
+def test_records_reach_disk_before_close(tmp_path):
+    path = tmp_path / "session.aqlog"
+    aquarium = Aquarium(seed=3)
+    batch.populate(aquarium, fish=10)
+    # Кадры сами по себе не сбрасываются, действия - сразу
+    recorder = eventlog.Recorder(path, aquarium, flush_interval=3600)
+    for _ in range(3):
+        aquarium.step(500)
+        recorder.tick(500)
+    aquarium.drop_food()
+    recorder.feed()
+    assert (snapshot.dumps(eventlog.replay(path))
+            == snapshot.dumps(aquarium))
+    # По истечении интервала сбрасываются и кадры
+    recorder.flush_interval = 0
+    aquarium.step(500)
+    recorder.tick(500)
+    assert (snapshot.dumps(eventlog.replay(path))
+            == snapshot.dumps(aquarium))
+    recorder.close()
+
+
+def test_truncated_log_is_read_up_to_last_record(tmp_path):
+    path = tmp_path / "session.aqlog"
+    record_session(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+    eventlog.replay(path)
+
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / "foreign.aqlog"
+    path.write_bytes(b"PNG\0" + bytes(16))
+    with pytest.raises(eventlog.EventLogError):
+        eventlog.replay(path)
@@ -0,0 +1,70 @@
+"""Тесты пакетного движения рыб (movement.py)."""
+
+import numpy as np
+
+from movement import MovementEngine
+import species_config
+from simulation import Aquarium
+
+
+def make_engine(xs, ys, width=100, height=60):
+    """Создает движок с рыбами в точках xs, ys."""
+    engine = MovementEngine()
+    engine.add_many(xs, ys, width, height)
+    return engine
+
+
+def test_integer_speed_does_not_overflow_directions():
+    engine = make_engine([10.0, 500.0], [10.0, 300.0])
+    engine.step(200, 1600, 900)
+    engine.advance(15, 10, 1600, 900)
+    assert np.isfinite(engine.position[:, :2]).all()
+
+
+def test_integer_species_speed_in_aquarium():
+    aquarium = Aquarium(seed=1)
+    configs = species_config.loads(
+        '{"species": [{"name": "Быстрый", "speed": 8, "count": 20}]}')
+    species_config.populate(aquarium, configs)
+    aquarium.step(60000)
+    assert aquarium.population.count == 20
+
+
+def assert_same_motion(engine, other):
+    """Проверяет, что рыбы двух движков в одних местах и плывут одинаково."""
+    n = engine.count
+    np.testing.assert_allclose(engine.position[:, :n], other.position[:, :n],
+                               atol=1e-6)
+    np.testing.assert_array_equal(engine.direction[:, :n],
+                                  other.direction[:, :n])
+
+
+def test_advance_matches_steps_when_bound_is_multiple_of_speed():
+    # 900 - 60 - 104.4 = 735.6 = 613 * 1.2: рыба попадает на стенку ровно
+    engine = make_engine([300.0], [104.4])
+    other = make_engine([300.0], [104.4])
+    ticks = 20000
+    engine.advance(ticks, 1.2, 1600, 900)
+    for _ in range(ticks):
+        other.step(1.2, 1600, 900)
+    assert_same_motion(engine, other)
+
+
+def test_advance_matches_steps_random():
+    rng = np.random.default_rng(7)
+    for _ in range(40):
+        width, height = rng.choice([800, 1525, 1600]), rng.choice([600, 900])
+        count = 30
+        speeds = rng.choice([0.5, 1, 1.2, 1.5, 2, 2.5, 3, 0.7], count)
+        xs = rng.uniform(0, width - 100, count)
+        ys = rng.uniform(0, height - 60, count)
+        directions = rng.choice([-1, 1], (2, count))
+        engine = make_engine(xs, ys)
+        other = make_engine(xs, ys)
+        engine.direction[:, :count] = directions
+        other.direction[:, :count] = directions
+        ticks = int(rng.integers(2, 3000))
+        engine.advance(ticks, speeds, width, height)
+        for _ in range(ticks):
+            other.step(speeds, width, height)
+        assert_same_motion(engine, other)
@@ -0,0 +1,105 @@
+"""Тесты проверки параметров аквариума и описания видов."""
+
+import argparse
+
+import pytest
+
+import batch
+import species_config
+import sweep
+from simulation import Aquarium, Settings, FISH_STATE_MAX
+
+
+def test_parse_setting_accepts_numbers():
+    assert batch.parse_setting("fish_speed=1.5") == ("fish_speed", 1.5)
+    assert batch.parse_setting("FISH_HEALTH_DECAY=3") == (
+        "fish_health_decay", 3)
+    assert batch.parse_setting("FISH_HEALTH_DECAY=3.0") == (
+        "fish_health_decay", 3)
+
+
+@pytest.mark.parametrize("text", [
+    "FISH_HEALTH_DECAY=1.5", "FISH_HUNGER_RATE=0.5", "FISH_HEALTH=99.5",
+    "FISH_SPEED=быстро", "NO_SUCH_SETTING=1", "FISH_SPEED",
+    "TIMER_FOOD_FALL=0", "TIMER_UPDATE_HEALTH=0", "FOOD_DURATION=0",
+    "TIMER_FISH_BEHAVIOUR=-100", "FISH_SPEED=0", "FOOD_SIGHT=-1",
+    "FISH_HEALTH=40000", f"FISH_HUNGER_RATE={FISH_STATE_MAX + 1}",
+    "FISH_SPEED=inf", "FISH_SPEED=nan",
+])
+def test_parse_setting_rejects_bad_values(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        batch.parse_setting(text)
+
+
+def test_parse_grid_checks_every_value():
+    assert sweep.parse_grid("TIMER_FOOD_FALL=25,50") == (
+        "timer_food_fall", [25, 50])
+    with pytest.raises(argparse.ArgumentTypeError):
+        sweep.parse_grid("TIMER_FOOD_FALL=50,0")
+
+
+@pytest.mark.parametrize("settings", [
+    {"timer_food_fall": 0}, {"food_duration": 0}, {"fish_health": 40000},
+    {"fish_hunger_rate": -1}, {"fish_health_decay": 1.5},
+])
+def test_settings_reject_bad_values(settings):
+    with pytest.raises(ValueError):
+        Settings(**settings)
+
+
+def test_extreme_fish_state_settings_run():
+    aquarium = Aquarium(seed=1, settings=Settings(
+        fish_health=FISH_STATE_MAX, fish_hunger=FISH_STATE_MAX,
+        fish_base_hunger=FISH_STATE_MAX, fish_hunger_rate=FISH_STATE_MAX,
+        fish_health_decay=FISH_STATE_MAX))
+    batch.populate(aquarium, fish=1)
+    aquarium.step(2 * 60 * 1000)
+    assert aquarium.stats.hunger.max == FISH_STATE_MAX
+    assert aquarium.stats.health.max == 0
+
+
+def test_feeding_restores_configured_health():
+    aquarium = Aquarium(seed=1, settings=Settings(fish_health=150))
+    batch.populate(aquarium, fish=1)
+    fish = aquarium.fishes[0]
+    fish.health = 20
+    fish.feed()
+    assert fish.health == 150
+
+
+def test_parsed_integer_settings_run():
+    name, value = batch.parse_setting("FISH_HEALTH_DECAY=3")
+    aquarium = Aquarium(seed=1, settings=Settings(**{name: value}))
+    batch.populate(aquarium, fish=2)
+    aquarium.step(5 * 60 * 1000)
+    assert aquarium.stats.health.count == 10
+
+
+@pytest.mark.parametrize("parameters", [
+    '"health_decay": 1.5', '"hunger_rate": 0.5', '"health_decay": "2"',
+    '"speed": 0', '"speed": true', '"hunger_rate": -1', '"color": 1',
+    '"health_decay": 40000', '"speed": -2',
+])
+def test_species_rejects_bad_parameters(parameters):
+    with pytest.raises(species_config.ConfigError):
+        species_config.loads(
+            '{"species": [{"name": "Карась", %s}]}' % parameters)
+
+
+def test_species_integer_parameters():
+    config, = species_config.loads(
+        '{"species": [{"name": "Карась", "health_decay": 2.0, '
+        '"hunger_rate": 3, "speed": 2}]}')
+    assert config.parameters == {"speed": 2, "health_decay": 2,
+                                 "hunger_rate": 3}
+    assert isinstance(config.parameters["health_decay"], int)
+
+
+@pytest.mark.parametrize("text", [
+    "не json", '{"species": {}}', '{"species": [{"count": 1}]}',
+    '{"species": [{"name": "А"}, {"name": "А"}]}',
+    '{"species": [{"name": "А", "positions": [[1]]}]}',
+])
+def test_species_rejects_bad_files(text):
+    with pytest.raises(species_config.ConfigError):
+        species_config.loads(text)
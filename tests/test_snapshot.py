@@ -0,0 +1,56 @@
+"""Тесты снимков аквариума (snapshot.py)."""
+
+import numpy as np
+import pytest
+
+import batch
+import snapshot
+from simulation import Aquarium
+
+
+def make_aquarium():
+    """Создает аквариум с рыбами, кормом и прошедшим временем."""
+    aquarium = Aquarium(seed=5)
+    batch.populate(aquarium, fish=20)
+    aquarium.step(90 * 1000)
+    aquarium.drop_food()
+    aquarium.step(1000)
+    return aquarium
+
+
+def test_round_trip_is_exact():
+    aquarium = make_aquarium()
+    data = snapshot.dumps(aquarium)
+    restored = snapshot.loads(data)
+    assert snapshot.dumps(restored) == data
+    assert restored.time == aquarium.time
+    assert len(restored.fishes) == len(aquarium.fishes) == 100
+    assert restored.stats.as_dict() == aquarium.stats.as_dict()
+
+
+def test_restored_aquarium_continues_identically():
+    aquarium = make_aquarium()
+    restored = snapshot.loads(snapshot.dumps(aquarium, compress=False))
+    for model in (aquarium, restored):
+        model.step(5 * 60 * 1000)
+    count = aquarium.movement.count
+    np.testing.assert_array_equal(aquarium.movement.position[:, :count],
+                                  restored.movement.position[:, :count])
+    np.testing.assert_array_equal(aquarium.population.health[:count],
+                                  restored.population.health[:count])
+    assert aquarium.food_eaten == restored.food_eaten
+
+
+def test_fish_without_species_is_rejected():
+    aquarium = make_aquarium()
+    aquarium.population.species = []
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.loads(snapshot.dumps(aquarium))
+
+
+@pytest.mark.parametrize("data", [
+    b"", b"NOPE" + bytes(10), snapshot.dumps(Aquarium())[:-5],
+])
+def test_broken_snapshots_are_rejected(data):
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.loads(data)
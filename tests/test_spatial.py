@@ -0,0 +1,110 @@
+"""Тесты пространственного индекса (spatial.py)."""
+
+import numpy as np
+import pytest
+
+from spatial import CROWD_EXACT_LIMIT, SpatialGrid
+
+
+def brute_within(xs, ys, points_x, points_y, radius):
+    """Возвращает множество пар (точка, объект) перебором всех пар."""
+    return {(query, item)
+            for query in range(len(points_x)) for item in range(len(xs))
+            if (xs[item] - points_x[query]) ** 2
+            + (ys[item] - points_y[query]) ** 2 <= radius * radius}
+
+
+def test_incremental_update_matches_fresh_grid():
+    rng = np.random.default_rng(1)
+    xs = rng.uniform(0, 1000, 2000)
+    ys = rng.uniform(0, 600, 2000)
+    # Крайние точки задают прямоугольник ячеек с самого начала
+    xs[:2] = ys[:2] = 0
+    xs[2], ys[2] = 1000, 600
+    grid = SpatialGrid(60)
+    grid.update(xs, ys)
+    for _ in range(50):
+        xs = np.clip(xs + rng.normal(0, 5, len(xs)), 0, 1000)
+        ys = np.clip(ys + rng.normal(0, 5, len(ys)), 0, 600)
+        grid.update(xs, ys)
+        fresh = SpatialGrid(60)
+        fresh.update(xs, ys)
+        np.testing.assert_array_equal(grid.order, fresh.order)
+        np.testing.assert_array_equal(grid.sizes, fresh.sizes)
+        np.testing.assert_array_equal(grid.starts, fresh.starts)
+    # Объекты не покидали прямоугольник ячеек, индекс строился один раз
+    assert grid.rebuilds == 1
+
+
+def test_update_outside_cells_rebuilds():
+    grid = SpatialGrid(10)
+    grid.update([5, 15], [5, 5])
+    grid.update([5, 500], [5, 5])
+    assert grid.rebuilds == 2
+    assert grid.within(np.array([500.0]), np.array([5.0]), 10)[1].tolist() \
+        == [1]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_queries_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    xs = rng.uniform(0, 500, 300)
+    ys = rng.uniform(0, 300, 300)
+    points_x = rng.uniform(-50, 550, 200)
+    points_y = rng.uniform(-50, 350, 200)
+    grid = SpatialGrid(40)
+    grid.update(xs, ys)
+    queries, items = grid.within(points_x, points_y, 40)
+    assert (set(zip(queries.tolist(), items.tolist()))
+            == brute_within(xs, ys, points_x, points_y, 40))
+    allowed = rng.random(300) < 0.5
+    targets, distances = grid.nearest(points_x, points_y, 40, allowed)
+    for query in range(200):
+        squared = (xs - points_x[query]) ** 2 + (ys - points_y[query]) ** 2
+        squared[~allowed | (squared > 1600)] = np.inf
+        if np.isinf(squared.min()):
+            assert targets[query] == -1
+        else:
+            assert targets[query] == squared.argmin()
+            assert distances[query] == squared.min()
+
+
+def test_crowd_centers_see_neighbours_across_cells():
+    grid = SpatialGrid(60)
+    # Две рыбы в пикселе друг от друга, но в разных ячейках, и одиночка
+    grid.update([59.5, 60.5, 300], [10, 10, 10])
+    crowded, centers_x, centers_y = grid.crowd_centers(60)
+    assert crowded.tolist() == [True, True, False]
+    assert centers_x.tolist() == [60.5, 59.5, 300]
+    assert grid.crowded([59.5, 60.5, 300], [10, 10, 10])
+    assert not grid.crowded([10, 200, 400], [10, 10, 10])
+    # Соседние по диагонали ячейки тоже тесные
+    assert grid.crowded([10, 100], [10, 100])
+    grid.update([10, 200, 400], [10, 10, 10])
+    assert not grid.crowd_centers(60)[0].any()
+
+
+def test_dense_crowd_uses_cell_block_centers():
+    rng = np.random.default_rng(7)
+    # Плотная стая в одной ячейке и редкие рыбы вдали от нее
+    xs = np.concatenate([rng.uniform(0, 50, CROWD_EXACT_LIMIT + 1),
+                         [500, 530, 900]])
+    ys = np.concatenate([rng.uniform(0, 50, CROWD_EXACT_LIMIT + 1),
+                         [500, 500, 900]])
+    grid = SpatialGrid(60)
+    grid.update(xs, ys)
+    crowded, centers_x, centers_y = grid.crowd_centers(60)
+    dense = CROWD_EXACT_LIMIT + 1
+    assert crowded.tolist() == [True] * (dense + 2) + [False]
+    # Центр остальных рыб стаи, без проверки расстояния
+    expected = (xs[:dense].sum() - xs[:dense]) / (dense - 1)
+    np.testing.assert_allclose(centers_x[:dense], expected)
+    assert centers_x[dense:].tolist() == [530, 500, 900]
+    assert centers_y[dense:].tolist() == [500, 500, 900]
+
+
+def test_radius_larger_than_cell_is_rejected():
+    grid = SpatialGrid(10)
+    grid.update([0], [0])
+    with pytest.raises(ValueError):
+        grid.nearest(np.zeros(1), np.zeros(1), 20)
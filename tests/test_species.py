@@ -0,0 +1,41 @@
+"""Тесты описания видов и начальной численности (species_config.py)."""
+
+import os
+
+import species_config
+from simulation import Aquarium
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "assets")
+
+
+def test_shipped_species_file_populates_aquarium():
+    configs = species_config.load(os.path.join(ASSETS,
+                                               species_config.SPECIES_FILE))
+    for config in configs:
+        assert os.path.exists(os.path.join(ASSETS, config.image))
+    aquarium = Aquarium(seed=4)
+    fishes = species_config.populate(aquarium, configs,
+                                     image_size=lambda image: (30, 20))
+    assert len(fishes) == sum(config.total for config in configs)
+    assert (aquarium.movement.extent[:, :len(fishes)] > 0).all()
+
+
+def test_descriptions_are_read_on_first_use():
+    configs = species_config.loads(
+        '{"species": [{"name": "Карась", "description": "karas.txt", '
+        '"count": 3}, {"name": "Щука", "description": "shuka.txt"}]}')
+    read = []
+
+    def read_text(name):
+        read.append(name)
+        return "описание " + name
+
+    aquarium = Aquarium(seed=4)
+    fishes = species_config.populate(aquarium, configs, read_text=read_text)
+    # Вид без рыб не регистрируется, описания еще не прочитаны
+    assert len(aquarium.population.species) == 1
+    assert read == []
+    assert fishes[0].description == "описание karas.txt"
+    assert fishes[1].description == "описание karas.txt"
+    assert read == ["karas.txt"]
@@ -0,0 +1,102 @@
+"""Тесты пакетного выбора направления рыб (Aquarium.steer_fishes)."""
+
+import numpy as np
+import pytest
+
+from simulation import Aquarium
+from spatial import CROWD_EXACT_LIMIT
+
+
+def make_aquarium(seed, fish, food):
+    """Создает аквариум с тесной стаей рыб и кормом среди нее."""
+    rng = np.random.default_rng(seed)
+    aquarium = Aquarium(seed=seed)
+    species = aquarium.add_species("Карась", "")
+    aquarium.add_fishes(rng.uniform(300, 700, fish),
+                        rng.uniform(200, 500, fish), species, 40, 20)
+    for x, y in zip(rng.uniform(300, 700, food), rng.uniform(200, 500, food)):
+        aquarium.add_food(x, y)
+    return aquarium
+
+
+def reference_steer(aquarium):
+    """Выбирает направления рыб по одной, как описано в steer_fishes."""
+    count = aquarium.movement.count
+    centers = (aquarium.movement.position[:, :count]
+               + aquarium.movement.extent[:, :count] / 2)
+    xs, ys = centers.tolist()
+    space = aquarium.settings.fish_personal_space
+    cells = [(x // space, y // space) for x, y in zip(xs, ys)]
+    sight = aquarium.settings.food_sight ** 2
+    eat = aquarium.settings.food_eat_distance ** 2
+    direction = aquarium.movement.direction
+    for index in range(count):
+        x, y = xs[index], ys[index]
+        distances = [((food.x - x) ** 2 + (food.y - y) ** 2, number)
+                     for number, food in enumerate(aquarium.food)]
+        distances = [item for item in distances if item[0] <= sight]
+        if distances:
+            distance, number = min(distances)
+            food = aquarium.food[number]
+            if distance <= eat:
+                aquarium.fishes[index].feed()
+                aquarium.remove_food(food)
+                aquarium.food_eaten += 1
+            else:
+                direction[0, index] = 1 if food.x - x >= 0 else -1
+                direction[1, index] = 1 if food.y - y >= 0 else -1
+            continue
+        # Рыбы из ячейки рыбы и восьми соседних; в плотной стае все они
+        # считаются соседями без проверки расстояния
+        block = [other for other in range(count)
+                 if abs(cells[other][0] - cells[index][0]) <= 1
+                 and abs(cells[other][1] - cells[index][1]) <= 1]
+        neighbours = [other for other in block if other != index and (
+            len(block) > CROWD_EXACT_LIMIT
+            or (xs[other] - x) ** 2 + (ys[other] - y) ** 2 <= space ** 2)]
+        if not neighbours:
+            continue
+        crowd_x = sum(xs[other] for other in neighbours) / len(neighbours)
+        crowd_y = sum(ys[other] for other in neighbours) / len(neighbours)
+        tie = 1 if index % 2 else -1
+        direction[0, index] = -1 if (crowd_x - x or tie) >= 0 else 1
+        direction[1, index] = -1 if (crowd_y - y or tie) >= 0 else 1
+
+
+@pytest.mark.parametrize("seed, fish, food", [
+    (1, 300, 0), (2, 300, 5), (3, 1000, 25), (4, 50, 40),
+])
+def test_steer_matches_reference(seed, fish, food):
+    aquarium = make_aquarium(seed, fish, food)
+    expected = make_aquarium(seed, fish, food)
+    for aquarium_ in (aquarium, expected):
+        # Половина рыб плывет назад, чтобы повороты были заметны
+        aquarium_.movement.direction[:, ::2] = -1
+        for grain in aquarium_.food[::3]:
+            aquarium_.remove_food(grain)
+    aquarium.steer_fishes()
+    reference_steer(expected)
+    np.testing.assert_array_equal(aquarium.movement.direction[:, :fish],
+                                  expected.movement.direction[:, :fish])
+    np.testing.assert_array_equal(aquarium.population.health[:fish],
+                                  expected.population.health[:fish])
+    assert aquarium.food_eaten == expected.food_eaten
+    assert ([(grain.x, grain.y) for grain in aquarium.food]
+            == [(grain.x, grain.y) for grain in expected.food])
+
+
+def test_steer_skips_lonely_fish_without_food():
+    aquarium = Aquarium(seed=1)
+    species = aquarium.add_species("Карась", "")
+    space = aquarium.settings.fish_personal_space
+    aquarium.add_fishes([0, 3 * space, 6 * space], [0, 3 * space, 0],
+                        species, 40, 20)
+    aquarium.movement.direction[:, :3] = -1
+    aquarium.steer_fishes()
+    # Поиск пропущен: сетка не строилась, направления не изменились
+    assert aquarium.fish_grid.rebuilds == 0
+    assert (aquarium.movement.direction[:, :3] == -1).all()
+    # Корм в аквариуме снова включает поиск
+    aquarium.add_food(3 * space, 0)
+    aquarium.steer_fishes()
+    assert aquarium.fish_grid.rebuilds == 1
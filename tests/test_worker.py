@@ -0,0 +1,72 @@
+"""Тесты потока модели (worker.py)."""
+
+import time
+
+import numpy as np
+import pytest
+
+import batch
+from simulation import Aquarium
+from tanks import TankGroup
+from worker import Frame, SimulationWorker
+
+
+def wait_for(condition, timeout=5.0):
+    """Ждет, пока condition() не станет истинным."""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline
+        time.sleep(0.01)
+
+
+def test_frame_holds_read_only_copies():
+    aquarium = Aquarium(seed=1)
+    batch.populate(aquarium, fish=10)
+    frame = Frame()
+    frame.fill(0, 0, aquarium)
+    count = aquarium.movement.count
+    np.testing.assert_array_equal(frame.positions,
+                                  aquarium.movement.position[:, :count])
+    np.testing.assert_array_equal(frame.extents,
+                                  aquarium.movement.extent[:, :count])
+    np.testing.assert_array_equal(frame.kinds,
+                                  aquarium.population.kind[:count])
+    assert frame.metrics[0] == frame.summary["fish"] == count
+    before = frame.health.copy()
+    aquarium.step(60 * 1000)
+    np.testing.assert_array_equal(frame.health, before)
+    for array in (frame.positions, frame.extents, frame.kinds,
+                  frame.health, frame.hunger):
+        with pytest.raises(ValueError):
+            array[..., 0] = 0
+    # Кадр заполняется повторно в той же памяти
+    frame.fill(1, 0, aquarium)
+    np.testing.assert_array_equal(frame.health,
+                                  aquarium.population.health[:count])
+
+
+def test_worker_publishes_frames_and_runs_commands():
+    group = TankGroup()
+    aquarium = group.create(seed=2)
+    batch.populate(aquarium, fish=5)
+    worker = SimulationWorker(group)
+    try:
+        worker.post(aquarium.drop_food)
+        wait_for(lambda: (worker.latest() is not None
+                          and len(worker.frame.food) > 0))
+    finally:
+        worker.close()
+    assert worker.error is None
+
+
+@pytest.mark.filterwarnings(
+    "ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_worker_keeps_error():
+    def step(dt):
+        raise RuntimeError("сбой модели")
+
+    group = TankGroup()
+    group.create()
+    worker = SimulationWorker(group, step=step)
+    worker.thread.join(5.0)
+    assert isinstance(worker.error, RuntimeError)
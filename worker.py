@@ -0,0 +1,211 @@
+"""Модель аквариумов в отдельном потоке.
+
+Поток модели продвигает группу аквариумов (tanks.TankGroup) шагами
+фиксированной длины в реальном времени, независимо от окна: отрисовка
+и открытые панели не задерживают модель, а шаги модели - отрисовку.
+
+После шагов поток публикует кадр - копию состояния показываемого
+аквариума (массивы рыб, падающий корм, сводку и показатели). Кадров
+два, и каждый в любой момент принадлежит либо потоку модели, либо окну:
+готовый кадр передается окну через очередь, а окно, взяв новый кадр,
+возвращает предыдущий. Поток модели заполняет только возвращенные
+кадры, поэтому кадр, который читает окно, не меняется, и ни модели, ни
+кадрам не нужны блокировки. Окно не читает и не меняет модель, пока
+работает поток модели. Если окно не успевает забрать кадр, поток модели
+продолжает шаги без публикации.
+
+Действия пользователя (кормление, чистка, смена воды и т.д.) окно не
+выполняет над моделью само, а ставит в очередь команд; поток модели
+выполняет их между шагами в порядке поступления.
+
+Поток модели выполняет код Python и делит с окном GIL, но векторные
+операции NumPy (движение рыб, правила голода и здоровья) отпускают GIL,
+поэтому при большом количестве рыб модель занимает второе ядро.
+Модуль не зависит от Qt.
+"""
+
+import collections
+import queue
+import threading
+import time
+
+import numpy as np
+
+from game_loop import FixedStepLoop
+from metrics import aquarium_metrics
+
+# Количество кадров, по очереди заполняемых потоком модели
+WORKER_FRAMES = 2
+
+
+class Frame:
+    """Состояние одного аквариума, опубликованное потоком модели.
+
+    Пока кадр у окна, поток модели его не меняет. Окно при модели в
+    отдельном потоке читает состояние аквариума только из кадров.
+    """
+
+    def __init__(self):
+        """Создает пустой кадр."""
+        self.sequence = -1  # Номер публикации
+        self.tank = None  # Номер аквариума в группе
+        self.time = 0.0  # Модельное время состояния (мс)
+        self.count = 0  # Количество рыб
+        # Массивы рыб, только для чтения: позиции и размеры (2 x count),
+        # номера видов, здоровье и голод (count)
+        self.positions = None
+        self.extents = None
+        self.kinds = None
+        self.health = None
+        self.hunger = None
+        self.food = ()  # Тройки (корм, x, y) для падающего корма
+        self.summary = None  # Сводка аквариума (AquariumStats.as_dict)
+        # Показатели аквариума (metrics.aquarium_metrics) без времени кадра
+        self.metrics = None
+        self.buffers = {}  # Память для массивов рыб по именам
+
+    def copy(self, name, source):
+        """Копирует массив source в память кадра и возвращает копию.
+
+        Память растет с запасом и переиспользуется следующими
+        публикациями.
+        """
+        count = source.shape[-1]
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape[-1] < count:
+            size = (count if buffer is None
+                    else max(count, 2 * buffer.shape[-1]))
+            buffer = np.empty(source.shape[:-1] + (size,), source.dtype)
+            self.buffers[name] = buffer
+        copy = buffer[..., :count]
+        copy.flags.writeable = True
+        copy[...] = source
+        copy.flags.writeable = False
+        return copy
+
+    def fill(self, sequence, tank, aquarium):
+        """Копирует в кадр состояние аквариума aquarium с номером tank."""
+        movement = aquarium.movement
+        population = aquarium.population
+        count = movement.count
+        self.sequence = sequence
+        self.tank = tank
+        self.time = aquarium.time
+        self.count = count
+        self.positions = self.copy("positions", movement.position[:, :count])
+        self.extents = self.copy("extents", movement.extent[:, :count])
+        self.kinds = self.copy("kinds", population.kind[:count])
+        self.health = self.copy("health", population.health[:count])
+        self.hunger = self.copy("hunger", population.hunger[:count])
+        self.food = tuple((food, food.x, food.y) for food in aquarium.food)
+        self.summary = aquarium.stats.as_dict()
+        self.metrics = aquarium_metrics(aquarium)[:-1]
+
+
+class SimulationWorker:
+    """Поток, продвигающий группу аквариумов в реальном времени."""
+
+    def __init__(self, group, step=None, loop=None):
+        """Создает и запускает поток модели группы group.
+
+        step(dt) - шаг модели на dt мс (по умолчанию group.step), loop -
+        игровой цикл, делящий прошедшее время на шаги (см. game_loop.py).
+        """
+        self.group = group  # Группа аквариумов
+        self.step = step if step is not None else group.step
+        self.loop = loop if loop is not None else FixedStepLoop()
+        self.visible = 0  # Номер аквариума, кадры которого публикуются
+        self.commands = queue.SimpleQueue()  # Команды окна
+        # Кадры, которые поток модели может заполнить
+        self.free = collections.deque(
+            Frame() for _ in range(WORKER_FRAMES))
+        self.ready = collections.deque()  # Опубликованные кадры
+        self.frame = None  # Кадр, взятый окном последним
+        self.published = 0  # Количество публикаций
+        self.error = None  # Исключение, остановившее поток
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def post(self, command):
+        """Ставит в очередь команду - функцию без аргументов.
+
+        Команда выполняется потоком модели между шагами.
+        """
+        self.commands.put(command)
+
+    def latest(self):
+        """Возвращает последний опубликованный кадр (вызывается окном).
+
+        Кадр, возвращенный прошлым вызовом, переходит потоку модели,
+        поэтому окно не должно читать его после этого вызова. Если новых
+        кадров нет, возвращается прежний кадр (None - кадров еще не было).
+        """
+        frame = self.frame
+        while True:
+            try:
+                newer = self.ready.popleft()
+            except IndexError:
+                break
+            if frame is not None:
+                self.free.append(frame)
+            frame = newer
+        self.frame = frame
+        return frame
+
+    def _execute(self):
+        """Выполняет команды из очереди и возвращает их количество."""
+        executed = 0
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                return executed
+            command()
+            executed += 1
+
+    def _publish(self):
+        """Публикует кадр показываемого аквариума, если есть свободный."""
+        try:
+            frame = self.free.popleft()
+        except IndexError:
+            # Окно еще не забрало прошлый кадр
+            return False
+        tank = self.visible
+        frame.fill(self.published, tank, self.group[tank])
+        self.published += 1
+        self.ready.append(frame)
+        return True
+
+    def _run(self):
+        """Выполняет команды и шаги модели, пока поток не остановят."""
+        try:
+            changed = True
+            last = time.perf_counter()
+            while not self.stopping.is_set():
+                changed = self._execute() > 0 or changed
+                now = time.perf_counter()
+                steps = self.loop.advance((now - last) * 1000)
+                last = now
+                if steps:
+                    # Догоняющие шаги выполняются одним вызовом модели
+                    self.step(steps * self.loop.step)
+                    changed = True
+                if changed and self._publish():
+                    changed = False
+                # Ждем до следующего шага модели
+                self.stopping.wait(
+                    (self.loop.step - self.loop.accumulator) / 1000)
+            # Команды, поставленные до остановки, не теряются
+            self._execute()
+        except BaseException as error:
+            self.error = error
+            raise
+
+    def close(self):
+        """Останавливает поток модели.
+
+        После возврата модель снова можно менять из вызывающего потока.
+        """
+        self.stopping.set()
+        self.thread.join()